@@ -0,0 +1,145 @@
+"""
+End-to-end benchmarks of the key flows against the local stand-in site, gated on stored baselines.
+
+Measures cold vs warm browser, new vs reused context and sync vs batched locators,
+reports the median of every scenario with its 95% bootstrap confidence interval and
+compares it with the baseline of the engine:
+
+    $ python -m benchmarks.run [--repeat 15] [--scenarios flow_new_context,flow_reused_context]
+    $ python -m benchmarks.run --update-baseline
+
+Exits 1 when a scenario is slower than its baseline median by more than `--threshold`
+over its whole confidence interval.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+from importlib import metadata
+from pathlib import Path
+
+from playwright.sync_api import sync_playwright
+
+from benchmarks.scenarios import BenchEnv, SCENARIOS, PAIRS
+from benchmarks.stats import summarize, is_regression
+from utils.local_site import LocalSite
+from utils.settings import settings
+
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+def machine():
+    """What the numbers depend on besides the code; a baseline from another machine is only indicative."""
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "playwright": metadata.version("playwright"),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(args):
+    """Run the selected scenarios, each `warmup` + `repeat` times, and summarize the measured repetitions."""
+    site = None
+    if args.url is None:
+        site = LocalSite().start()
+        args.url = site.url
+    results = {}
+    try:
+        with sync_playwright() as playwright:
+            env = BenchEnv(playwright, args.engine, args.url, args.user, args.password, headless=not args.headed)
+            try:
+                for name in args.scenarios:
+                    print(f"{name} ...", file=sys.stderr)
+                    samples = SCENARIOS[name](env, args.warmup + args.repeat)[args.warmup:]
+                    results[name] = {**summarize(samples), "samples": [round(sample, 2) for sample in samples]}
+            finally:
+                env.close()
+    finally:
+        if site is not None:
+            site.stop()
+    return results
+
+
+def compare(results, baseline, threshold: float):
+    """Return {scenario: (baseline summary or None, regressed)}."""
+    return {
+        name: (baseline.get(name), baseline.get(name) is not None and is_regression(summary, baseline[name], threshold))
+        for name, summary in results.items()
+    }
+
+
+def format_table(results, comparison):
+    """Render the results, their baselines and the path comparisons as a plain-text table."""
+    lines = [f"{'scenario':<22}{'n':>4}{'median ms':>11}{'95% CI ms':>21}{'baseline':>10}{'change':>9}  status"]
+    for name, summary in results.items():
+        baseline, regressed = comparison[name]
+        ci = f"{summary['ci_low_ms']:.1f}-{summary['ci_high_ms']:.1f}"
+        if baseline is None:
+            reference, change, status = "-", "-", "new"
+        else:
+            reference = f"{baseline['median_ms']:.1f}"
+            change = f"{(summary['median_ms'] / baseline['median_ms'] - 1) * 100:+.1f}%"
+            status = "REGRESSION" if regressed else "ok"
+        lines.append(f"{name:<22}{summary['n']:>4}{summary['median_ms']:>11.1f}{ci:>21}{reference:>10}{change:>9}  {status}")
+    for slow, fast in PAIRS:
+        if slow in results and fast in results:
+            lines.append(f"{fast} vs {slow}: {results[slow]['median_ms'] / results[fast]['median_ms']:.2f}x faster")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the key flows against the local stand-in site.")
+    parser.add_argument("--repeat", type=int, default=15, help="Measured repetitions per scenario")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured repetitions run first")
+    parser.add_argument(
+        "--scenarios", default=",".join(SCENARIOS), type=lambda value: [name.strip() for name in value.split(",") if name.strip()],
+        help=f"Comma-separated scenarios (default: all of {', '.join(SCENARIOS)})"
+    )
+    parser.add_argument("--engine", default="chromium", choices=("chromium", "firefox", "webkit"))
+    parser.add_argument("--url", default=None, help="Site under test (default: the bundled local stand-in)")
+    parser.add_argument("--user", default=settings.user("STANDARD") or "standard_user")
+    parser.add_argument("--password", default=settings.passwd or "secret_sauce")
+    parser.add_argument("--headed", action="store_true", help="Run the browsers headed")
+    parser.add_argument("--baseline", default=None, help="Baseline file (default: benchmarks/baselines/<engine>.json)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run's results as the baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=1.10, help="Slowdown factor over the baseline median that fails the run"
+    )
+    parser.add_argument("--json", default=None, help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios {unknown}, expected some of {list(SCENARIOS)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    baseline_path = Path(args.baseline or BASELINE_DIR / f"{args.engine}.json")
+    stored = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+    baseline = stored.get("scenarios", {})
+    if stored and stored.get("machine") != machine():
+        print(f"warning: {baseline_path} was recorded on another machine: {stored.get('machine')}", file=sys.stderr)
+
+    results = run(args)
+    comparison = compare(results, baseline, args.threshold)
+    print(format_table(results, comparison))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump({"machine": machine(), "engine": args.engine, "scenarios": results}, output, indent=2)
+    if args.update_baseline:
+        # Scenarios not run this time keep their stored baseline
+        scenarios = {**baseline, **{name: {key: value for key, value in summary.items() if key != "samples"} for name, summary in results.items()}}
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({"machine": machine(), "scenarios": scenarios}, indent=2), encoding="utf-8")
+        print(f"baseline written to {baseline_path}")
+        return 0
+    return 1 if any(regressed for _, regressed in comparison.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Benchmark scenarios over the flows of tests/test_login_logout.py and tests/test_selected_items.py.
+
+Each scenario runs its measured step `repeat` times and returns one duration in ms per
+repetition; the setup a step needs (a logged-in page, an empty cart) is done outside the timing.
+"""
+
+import time
+from dataclasses import dataclass, field
+
+from playwright.sync_api import expect
+
+from pages.pageactions import PageActions
+from utils.context_pool import ContextPool
+from utils.page_factory import PageFactory
+import elements.product_elements as productpage
+import elements.cartpage_elements as cartpage
+
+
+# Products added by the flows, as in test_add_products_to_cart
+PRODUCT_INDEXES = (0, 2, 4)
+
+
+@dataclass
+class BenchEnv:
+    """
+    What the scenarios run against.
+
+    Attributes:
+        playwright (Playwright): The started sync Playwright.
+        engine (str): chromium, firefox or webkit.
+        url (str): Login page of the site.
+        user (str): User name of the flows.
+        passwd (str): Password of the flows.
+        headless (bool): Whether the browsers run headless.
+    """
+    playwright: object
+    engine: str
+    url: str
+    user: str
+    passwd: str
+    headless: bool = True
+    _browser: object = field(default=None, repr=False)
+
+    def launch(self):
+        """Launch a new browser of the engine."""
+        return getattr(self.playwright, self.engine).launch(headless=self.headless)
+
+    @property
+    def browser(self):
+        """The warm browser shared by the scenarios, launched on first use."""
+        if self._browser is None:
+            self._browser = self.launch()
+        return self._browser
+
+    def close(self):
+        """Close the warm browser."""
+        if self._browser is not None:
+            self._browser.close()
+            self._browser = None
+
+
+def _measure(samples, step, *args):
+    started = time.perf_counter()
+    step(*args)
+    samples.append((time.perf_counter() - started) * 1000)
+
+
+def login(page, env):
+    """Land on the site and log in."""
+    page.goto(env.url)
+    PageActions(page).login(env.user, env.passwd)
+    page.wait_for_url("**/inventory.html")
+
+
+def run_flow(page, env):
+    """Land, log in, add products to the cart, open the cart, verify it and log out."""
+    actions = PageActions(page)
+    login(page, env)
+    products = actions.read_products()
+    names = [products[index].name for index in PRODUCT_INDEXES]
+    for product in actions.add_products(names):
+        assert product.in_cart, product.name
+    actions.open_cart()
+    expect(page.get_by_text("Your Cart")).to_be_visible()
+    assert sorted(page.locator(cartpage.CART_ITEM_NAMES).all_text_contents()) == sorted(names)
+    actions.logout()
+    expect(page.get_by_role("button", name="Login")).to_be_visible()
+
+
+def add_products_sync(page, names):
+    """Add products one locator round-trip at a time: read each card, click, wait for its button to flip."""
+    for card in page.locator(productpage.INVENTORY_ITEMS).all():
+        if card.locator(productpage.ITEM_NAME).text_content() not in names:
+            continue
+        button = card.locator(productpage.ITEM_BUTTON)
+        if button.text_content() == "Add to cart":
+            button.click()
+        expect(button).to_have_text("Remove")
+
+
+def add_products_batched(page, names):
+    """Add products through PageActions.add_products: one batched read, the clicks, one wait for every button to flip."""
+    for product in PageActions(page).add_products(names):
+        assert product.in_cart, product.name
+
+
+def browser_cold(env, repeat: int):
+    """Launch a browser, open a page on the site, close the browser."""
+    samples = []
+
+    def step():
+        browser = env.launch()
+        browser.new_page().goto(env.url)
+        browser.close()
+
+    for _ in range(repeat):
+        _measure(samples, step)
+    return samples
+
+
+def browser_warm(env, repeat: int):
+    """Open a page on the site in a new context of the already running browser."""
+    samples = []
+
+    def step():
+        context = env.browser.new_context()
+        context.new_page().goto(env.url)
+        context.close()
+
+    for _ in range(repeat):
+        _measure(samples, step)
+    return samples
+
+
+def flow_new_context(env, repeat: int):
+    """The full flow in a new context and page every time, as the `pages` fixture does by default."""
+    samples = []
+
+    def step():
+        context = env.browser.new_context()
+        run_flow(context.new_page(), env)
+        context.close()
+
+    for _ in range(repeat):
+        _measure(samples, step)
+    return samples
+
+
+def flow_reused_context(env, repeat: int):
+    """The full flow in a context reused through the ContextPool (reset and verified between uses)."""
+    samples = []
+    pool = ContextPool(PageFactory(lambda engine=None: env.browser), size=1, max_uses=repeat + 1)
+    pool.prewarm()
+
+    def step():
+        context = pool.acquire()
+        run_flow(context.new_page(), env)
+        pool.release(context)
+
+    try:
+        for _ in range(repeat):
+            _measure(samples, step)
+    finally:
+        pool.close()
+    return samples
+
+
+def _add_to_cart(env, repeat: int, add):
+    samples = []
+    context = env.browser.new_context()
+    try:
+        page = context.new_page()
+        login(page, env)
+        names = [product.name for product in PageActions(page).read_products()]
+        names = [names[index] for index in PRODUCT_INDEXES]
+        for _ in range(repeat):
+            # Empty cart, fresh inventory page: not measured
+            page.evaluate("() => localStorage.removeItem('cart-contents')")
+            page.reload()
+            _measure(samples, add, page, names)
+    finally:
+        context.close()
+    return samples
+
+
+def add_to_cart_sync(env, repeat: int):
+    """Add three products with one locator call per card read, click and check."""
+    return _add_to_cart(env, repeat, add_products_sync)
+
+
+def add_to_cart_batched(env, repeat: int):
+    """Add three products with batched card reads and a single wait for the cart state."""
+    return _add_to_cart(env, repeat, add_products_batched)
+
+
+SCENARIOS = {
+    "browser_cold": browser_cold,
+    "browser_warm": browser_warm,
+    "flow_new_context": flow_new_context,
+    "flow_reused_context": flow_reused_context,
+    "add_to_cart_sync": add_to_cart_sync,
+    "add_to_cart_batched": add_to_cart_batched,
+}
+
+# Scenarios compared against each other: (slower path, faster path)
+PAIRS = (
+    ("browser_cold", "browser_warm"),
+    ("flow_new_context", "flow_reused_context"),
+    ("add_to_cart_sync", "add_to_cart_batched"),
+)
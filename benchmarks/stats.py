@@ -0,0 +1,45 @@
+import numpy as np
+
+
+# Resamples of the bootstrap; fixed seed so the same samples always give the same interval
+BOOTSTRAP_RESAMPLES = 2000
+BOOTSTRAP_SEED = 0
+
+
+def median(samples):
+    """Median of the samples."""
+    return float(np.median(samples))
+
+
+def bootstrap_ci(samples, confidence: float = 0.95, resamples: int = BOOTSTRAP_RESAMPLES):
+    """
+    Percentile bootstrap confidence interval of the median.
+
+    The samples are resampled with replacement `resamples` times in one array operation;
+    the interval is the central `confidence` range of the resampled medians.
+
+    Returns (low, high).
+    """
+    values = np.asarray(samples, dtype=float)
+    if len(values) < 2:
+        return float(values[0]), float(values[0])
+    rng = np.random.default_rng(BOOTSTRAP_SEED)
+    medians = np.median(rng.choice(values, size=(resamples, len(values)), replace=True), axis=1)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(medians, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def summarize(samples):
+    """Median, 95% bootstrap interval and count of a scenario's samples in ms."""
+    low, high = bootstrap_ci(samples)
+    return {"n": len(samples), "median_ms": median(samples), "ci_low_ms": low, "ci_high_ms": high}
+
+
+def is_regression(summary, baseline, threshold: float):
+    """
+    Whether a scenario got slower than its baseline by more than `threshold` (e.g. 1.10 = 10%).
+
+    The whole confidence interval has to be above the limit, so run-to-run noise does not fail CI.
+    """
+    return summary["ci_low_ms"] > baseline["median_ms"] * threshold
@@ -3,24 +3,84 @@ Import modules for testing and browser interaction.
 
 - os: for file path manipulation
 - pytest: for testing framework
-- pytest_html: for generating HTML reports
 - datetime: for generating timestamps
-- playwright.sync_api: for launching and managing browsers
+- time: for the startup-time report
 
-Additionally, import the FilePath class from the 'utils.filepath' module.
+pytest_html (HTML report extras) and playwright.sync_api (launching and managing browsers)
+are imported where they are used, so collection-only runs never load Playwright;
+the pytest-playwright plugin is disabled in pytest.ini, the suite has its own browser fixtures.
+
+Additionally, import the FilePath class from the 'utils.filepath' module,
+the BrowserPool that owns this process' browsers (optionally taken from the BrowserDaemon), the ShardRunner used by `--workers`,
+the PageFactory every test module opens its pages with (optionally from a ContextPool), the SessionCache of logged-in users
+the LocalSite stand-in used by `--local-site`, the NetworkStore behind `--network`
+the AssetCache route layer that caches static assets and blocks unwanted requests
+the Timings instrumentation behind `--timings`, the failure-only TraceRecorder
+and the ScreenshotService the tests take their screenshots through
+(with the NumPy VisualComparator behind `--visual`, imported only when it is used)
+the MemoryWatchdog that recycles bloated browsers, the NavigationMetrics collector
+the DurationsDB history behind `--schedule` and the shard balancing,
+the user type x engine cells of `--matrix`,
+the AdaptiveTimeouts learned per test and selector behind `--adaptive-timeouts`
+and the streaming ResultsLog behind `--stream-results`.
 """
 
+import time
+
+# Start of the startup-time report: conftest imports, configure and collection are measured from here
+_startup = {"conftest": time.perf_counter()}
+
 import os
+import re
+import argparse
 import pytest
-import pytest_html
 from datetime import datetime
-from playwright.sync_api import sync_playwright
 from utils.filepath import FilePath
+from utils.browser_pool import BrowserPool
+from utils.browser_daemon import BrowserDaemon
+from utils.parallel import ShardRunner
+from utils.page_factory import PageFactory
+from utils.context_pool import ContextPool
+from utils.session_cache import SessionCache
+from utils.local_site import LocalSite
+from utils.network_store import NetworkStore
+from utils.asset_cache import AssetCache, TRACKER_PATTERNS
+from utils.timing import Timings
+from utils.trace_recorder import TraceRecorder
+from utils.memory_watchdog import MemoryWatchdog
+from utils.nav_metrics import NavigationMetrics, parse_budgets
+from utils.durations import DurationsDB, SCHEDULES
+from utils.adaptive_timeouts import AdaptiveTimeouts, parse_overrides
+from utils.results_log import ResultsLog, render, merge
+from utils.matrix import MatrixCell, USER_TYPES, ENGINES, build_cells, parse_list, grid_html
+from utils.screenshots import ScreenshotService, POLICIES, FORMATS
 
+_startup["imports"] = time.perf_counter()
 
+# Output directories are created on first use, once
 filepath = FilePath()
-screenshot_dir_path = filepath.screenshot_dir_path()
-report_dir = filepath.report_dir_path()
+
+# The user x engine grid section of a report, rewritten when worker reports are merged
+_MATRIX_GRID = re.compile(r'<div id="matrix-grid">.*?</table></div>', re.S)
+
+shard_runner_key = pytest.StashKey[ShardRunner]()
+local_site_key = pytest.StashKey[LocalSite]()
+asset_summary_key = pytest.StashKey[str]()
+timings_key = pytest.StashKey[Timings]()
+trace_recorder_key = pytest.StashKey[TraceRecorder]()
+test_failed_key = pytest.StashKey[bool]()
+trace_paths_key = pytest.StashKey[list]()
+screenshot_service_key = pytest.StashKey[ScreenshotService]()
+context_pool_summary_key = pytest.StashKey[str]()
+memory_watchdog_key = pytest.StashKey[MemoryWatchdog]()
+memory_sample_key = pytest.StashKey[dict]()
+nav_metrics_key = pytest.StashKey[NavigationMetrics]()
+durations_key = pytest.StashKey[DurationsDB]()
+matrix_cells_key = pytest.StashKey[list]()
+matrix_outcomes_key = pytest.StashKey[dict]()
+adaptive_timeouts_key = pytest.StashKey[AdaptiveTimeouts]()
+results_log_key = pytest.StashKey[ResultsLog]()
+startup_key = pytest.StashKey[dict]()
 
 
 def pytest_addoption(parser):
@@ -29,6 +89,43 @@ def pytest_addoption(parser):
 
     - --run-headed: Run the browser in headed mode (default: False)
     - --slow-mo: Run the browser with a delay between actions (in milliseconds, default: 0)
+    - --workers: Run test modules in N parallel worker processes (default: 1)
+    - --worker-id: Internal, set by the controller on each worker process
+    - --session-ttl: Seconds a cached login session stays valid (default: 600)
+    - --local-site: Run against the bundled local stand-in site instead of the live URLs (default: False)
+    - --network: live, record responses into the network store, or replay them from it (default: live)
+    - --network-store: Directory of the recorded responses (default: the network directory)
+    - --asset-cache: Serve images, fonts, scripts and stylesheets from a shared on-disk cache (default: False)
+    - --asset-cache-size: Size bound of the asset cache in MiB (default: 200)
+    - --block: URL pattern to abort, can be repeated (added to the `block_patterns` ini list)
+    - --block-trackers: Abort well-known analytics and ad requests (default: False)
+    - --block-images: Abort all image requests, for non-visual runs (default: False)
+    - --daemon: Connect to a warm browser from `python -m utils.browser_daemon` instead of launching (default: False)
+    - --timings: Time every PageActions call, navigation, expect and screenshot per test (default: False)
+    - --trace-failures: Record a trace chunk per test and keep it only for failed or retried tests (default: False)
+    - --trace-keep: Number of most recent traces kept on disk (default: 20)
+    - --shot-policy: always, failure-only or element-clip screenshots (default: always)
+    - --shot-format: png, jpeg or webp screenshots (default: png)
+    - --shot-quality: JPEG / WebP screenshot quality (default: 80)
+    - --visual: Compare every screenshot against its stored baseline (default: False)
+    - --update-baselines: Replace the baselines with this run's screenshots (default: False)
+    - --visual-threshold: Per-pixel perceptual difference threshold, 0 to 1 (default: 0.1)
+    - --visual-tolerance: Fraction of differing pixels still accepted (default: 0.0)
+    - --context-pool: Keep N reset browser contexts per option set for reuse, 0 disables (default: 0)
+    - --context-max-uses: Uses after which a pooled context is closed and replaced (default: 20)
+    - --memory-watchdog: Sample browser memory after every test and recycle bloated browsers (default: False)
+    - --max-browser-rss: Browser process memory (MiB) above which the browser is recycled (default: 1500)
+    - --max-js-heap: Summed page JS heap (MiB) above which the browser is recycled (default: 500)
+    - --nav-metrics: Collect TTFB, DCL, load, FCP, LCP and transferred bytes of every navigation (default: False)
+    - --nav-metrics-log: JSONL time series the navigations are appended to (default: reports/nav_metrics.jsonl)
+    - --schedule: Order module chains by recorded duration, longest-first or failed-first (default: none)
+    - --matrix: Run the matrix-enabled modules once per user type x engine cell, in parallel (default: False)
+    - --matrix-users: Comma-separated user types of the matrix (default: STANDARD,VISUAL,PROBLEM)
+    - --matrix-engines: Comma-separated engines of the matrix (default: chromium,firefox,webkit)
+    - --adaptive-timeouts: Set locator and expect timeouts from the latency learned per test and selector (default: False)
+    - --stream-results: Stream results to a JSONL log and an HTML page as tests finish (default: False)
+    - --startup-report: Report the time spent in conftest imports, configure and collection (default: False)
+    - --startup-budget-strict: Fail the run when startup exceeds the startup_budget_ms ini, instead of warning (default: False)
     """
     parser.addoption(
         "--run-headed", action="store_true", default=False, help="Run browser in headed mode"
@@ -37,6 +134,166 @@ def pytest_addoption(parser):
     parser.addoption(
         "--slow-mo", action="store", default=0, type=int, help="Run browser with slow motion (ms delay between actions)"
     )
+    # Option for sharded parallel execution
+    parser.addoption(
+        "--workers", action="store", default=1, type=int, help="Run test modules in N parallel worker processes"
+    )
+    parser.addoption(
+        "--worker-id", action="store", default=None, type=int, help=argparse.SUPPRESS
+    )
+    # Option for the authenticated storage-state cache
+    parser.addoption(
+        "--session-ttl", action="store", default=600, type=float, help="Seconds a cached login session stays valid"
+    )
+    # Option for the offline stand-in site
+    parser.addoption(
+        "--local-site", action="store_true", default=False, help="Serve saucedemo and playwright.dev from a local stand-in"
+    )
+    # Options for recording and replaying network traffic
+    parser.addoption(
+        "--network", action="store", default="live", choices=("live", "record", "replay"),
+        help="Use the live network, record responses into the store or replay them from it"
+    )
+    parser.addoption(
+        "--network-store", action="store", default=None, help="Directory of the recorded responses"
+    )
+    # Options for the static-asset cache and request blocking
+    parser.addoption(
+        "--asset-cache", action="store_true", default=False, help="Serve static assets from a shared on-disk LRU cache"
+    )
+    parser.addoption(
+        "--asset-cache-size", action="store", default=200, type=int, help="Size bound of the asset cache in MiB"
+    )
+    parser.addoption(
+        "--block", action="append", default=[], help="URL pattern (fnmatch) of requests to abort, can be repeated"
+    )
+    parser.addoption(
+        "--block-trackers", action="store_true", default=False, help="Abort well-known analytics and ad requests"
+    )
+    parser.addoption(
+        "--block-images", action="store_true", default=False, help="Abort all image requests"
+    )
+    # Option for the persistent browser daemon
+    parser.addoption(
+        "--daemon", action="store_true", default=False, help="Connect to a warm browser daemon slot instead of launching"
+    )
+    # Option for per-action timing instrumentation
+    parser.addoption(
+        "--timings", action="store_true", default=False, help="Collect per-action latency histograms per test"
+    )
+    # Options for failure-only tracing
+    parser.addoption(
+        "--trace-failures", action="store_true", default=False,
+        help="Trace every test, keep the trace only for failed or retried tests"
+    )
+    parser.addoption(
+        "--trace-keep", action="store", default=20, type=int, help="Number of most recent traces kept on disk"
+    )
+    # Options for the screenshot service
+    parser.addoption(
+        "--shot-policy", action="store", default="always", choices=POLICIES,
+        help="Take every screenshot, only those of failed tests, or element clips only"
+    )
+    parser.addoption(
+        "--shot-format", action="store", default="png", choices=FORMATS, help="Screenshot image format"
+    )
+    parser.addoption(
+        "--shot-quality", action="store", default=80, type=int, help="JPEG / WebP screenshot quality (0-100)"
+    )
+    # Options for visual regression
+    parser.addoption(
+        "--visual", action="store_true", default=False, help="Compare every screenshot against its stored baseline"
+    )
+    parser.addoption(
+        "--update-baselines", action="store_true", default=False, help="Replace the baselines with this run's screenshots"
+    )
+    parser.addoption(
+        "--visual-threshold", action="store", default=0.1, type=float,
+        help="Per-pixel perceptual difference threshold (0 = exact, 1 = anything goes)"
+    )
+    parser.addoption(
+        "--visual-tolerance", action="store", default=0.0, type=float, help="Fraction of differing pixels still accepted"
+    )
+    # Options for the browser context pool
+    parser.addoption(
+        "--context-pool", action="store", default=0, type=int,
+        help="Reuse up to N reset browser contexts per option set (0 = a new context every time)"
+    )
+    parser.addoption(
+        "--context-max-uses", action="store", default=20, type=int, help="Uses after which a pooled context is replaced"
+    )
+    # Options for the browser memory watchdog
+    parser.addoption(
+        "--memory-watchdog", action="store_true", default=False,
+        help="Sample browser memory after every test, recycle the browser at a module boundary past the limits"
+    )
+    parser.addoption(
+        "--max-browser-rss", action="store", default=1500, type=float, help="Browser process memory limit in MiB (0 = none)"
+    )
+    parser.addoption(
+        "--max-js-heap", action="store", default=500, type=float, help="Summed page JS heap limit in MiB (0 = none)"
+    )
+    # Options for navigation performance metrics
+    parser.addoption(
+        "--nav-metrics", action="store_true", default=False,
+        help="Collect navigation timing and paint metrics, enforce the nav_budgets ini"
+    )
+    parser.addoption(
+        "--nav-metrics-log", action="store", default=None, help="JSONL time series the navigation metrics are appended to"
+    )
+    # Option for duration-aware scheduling
+    parser.addoption(
+        "--schedule", action="store", default="none", choices=SCHEDULES,
+        help="Run module chains longest-first, or previously failed ones first, from the durations history"
+    )
+    # Options for the user type x engine matrix
+    parser.addoption(
+        "--matrix", action="store_true", default=False,
+        help="Run matrix-enabled modules for every user type and engine, one worker per cell unless --workers is given"
+    )
+    parser.addoption(
+        "--matrix-users", action="store", default=",".join(USER_TYPES), help="Comma-separated user types (<TYPE>_USER in .env)"
+    )
+    parser.addoption(
+        "--matrix-engines", action="store", default=",".join(ENGINES), help="Comma-separated browser engines"
+    )
+    # Option for adaptive timeouts, tuned by the adaptive_timeout_* and timeout_overrides ini values
+    parser.addoption(
+        "--adaptive-timeouts", action="store_true", default=False,
+        help="Time out locator actions and expect assertions at their learned high percentile plus a margin"
+    )
+    # Option for the streaming results log
+    parser.addoption(
+        "--stream-results", action="store_true", default=False,
+        help="Append every finished test to <report>.results.jsonl and <report>.stream.html, artifacts linked not embedded"
+    )
+    # Option for the startup-time report, checked against the startup_budget_ms ini
+    parser.addoption(
+        "--startup-report", action="store_true", default=False,
+        help="Print the time from conftest import to the end of collection, per phase"
+    )
+    parser.addoption(
+        "--startup-budget-strict", action="store_true", default=False,
+        help="Fail the run when startup exceeds startup_budget_ms (otherwise only a warning is printed)"
+    )
+    parser.addini("block_patterns", type="linelist", default=[], help="URL patterns (fnmatch) of requests to abort")
+    parser.addini(
+        "nav_budgets", type="linelist", default=[],
+        help="Navigation budgets: '<url pattern> metric=limit ...', e.g. '*/inventory.html lcp=1500 ttfb=300'"
+    )
+    parser.addini("adaptive_timeout_percentile", default="99", help="Percentile of a step's latencies its timeout starts from")
+    parser.addini("adaptive_timeout_margin_ms", default="1000", help="Margin added to the percentile, in ms")
+    parser.addini("adaptive_timeout_floor_ms", default="1000", help="Smallest adaptive timeout, in ms")
+    parser.addini("adaptive_timeout_ceiling_ms", default="30000", help="Largest adaptive timeout, in ms")
+    parser.addini("adaptive_timeout_min_samples", default="3", help="Successful calls a step needs before its timeout is learned")
+    parser.addini(
+        "startup_budget_ms", default="0",
+        help="Warn when conftest import + configure + collection take longer, fail with --startup-budget-strict (0 = no budget)"
+    )
+    parser.addini(
+        "timeout_overrides", type="linelist", default=[],
+        help="Fixed timeouts: '<test pattern> <step pattern> <ms>', e.g. 'tests/test_selected_items.py::* click *checkout* 15000'"
+    )
 
 @pytest.fixture(scope="session")
 def browser_context_args(pytestconfig):
@@ -56,24 +313,162 @@ Returns a dictionary containing headless and slow_mo values.
     }
 
 @pytest.fixture(scope="session")
-def browser(browser_context_args):
+def browser_pool(pytestconfig):
     """
-Fixture to launch and manage the browser instance:
+Fixture to own the browsers of this pytest process:
 
-- Uses sync_playwright() to create a Playwright instance.
-- Launches a Chromium browser based on headless and slow_mo arguments.
-- Yields the browser instance for tests.
-- Closes the browser instance after tests finish.
+- Uses sync_playwright() to create a Playwright instance; Playwright is imported here,
+  only once a browser test is set up.
+- Yields a BrowserPool; every `--workers` process gets its own pool and browsers.
+- With --daemon Chromium comes from a warm daemon slot when one is running
+  (closing it then only disconnects); otherwise it is launched and a slot is started for next time.
+- Closes all pooled browsers after tests finish.
 """
+    from playwright.sync_api import sync_playwright
+
+    daemon = BrowserDaemon() if pytestconfig.getoption("--daemon") else None
     with sync_playwright() as playwright_instance:
-        # Launch browser with headless and slow_mo options
-        browser = playwright_instance.chromium.launch(
-            headless=browser_context_args["headless"],
-            slow_mo=browser_context_args["slow_mo"]
-        )
-        yield browser
-        browser.close()
+        pool = BrowserPool(playwright_instance, daemon=daemon)
+        yield pool
+        pool.close_all()
+
+
+@pytest.fixture(scope="session")
+def browser(browser_pool, browser_context_args):
+    """
+Fixture to provide the browser instance:
+
+- Acquires a Chromium browser from the pool based on headless and slow_mo arguments.
+- The pool closes the browser after tests finish.
+"""
+    # Launch browser with headless and slow_mo options
+    return browser_pool.acquire(
+        headless=browser_context_args["headless"],
+        slow_mo=browser_context_args["slow_mo"]
+    )
+
 
+@pytest.fixture(scope="session")
+def network_store(pytestconfig):
+    """
+Fixture to provide the content-addressed response store used by --network record/replay.
+"""
+    store_dir = pytestconfig.getoption("--network-store") or filepath.network_dir_path()
+    return NetworkStore(store_dir)
+
+@pytest.fixture(scope="session")
+def asset_cache(pytestconfig):
+    """
+Fixture to provide the static-asset cache and request blocking route layer.
+
+- Assets are only cached against the live network; record/replay see every request themselves.
+- Saves the cache index and the run summary after tests finish.
+"""
+    block_patterns = pytestconfig.getini("block_patterns") + pytestconfig.getoption("--block")
+    if pytestconfig.getoption("--block-trackers"):
+        block_patterns += TRACKER_PATTERNS
+    cache = AssetCache(
+        filepath.asset_cache_dir_path(),
+        max_bytes=pytestconfig.getoption("--asset-cache-size") * 1024 * 1024,
+        block_patterns=block_patterns,
+        block_images=pytestconfig.getoption("--block-images"),
+        cache_assets=pytestconfig.getoption("--asset-cache") and pytestconfig.getoption("--network") == "live",
+    )
+    yield cache
+    cache.save()
+    if cache.enabled:
+        pytestconfig.stash[asset_summary_key] = cache.summary()
+
+@pytest.fixture(scope="session")
+def pages(browser_pool, browser_context_args, network_store, asset_cache, pytestconfig):
+    """
+Fixture to create the contexts and pages of the test modules:
+
+- Returns a PageFactory on top of the session browser, taken from the pool on every
+  new context so a browser recycled by --memory-watchdog is relaunched transparently.
+- `pages.open()` gives a page in a fresh context, `pages.close(page)` closes both.
+- With --network record/replay every new context records into / replays from the network store.
+- The asset cache / blocking layer is installed last, so it sees requests first.
+- With --trace-failures every new context is traced, one chunk per test, while it is checked out.
+- With --nav-metrics every new context reports the navigation metrics of its pages.
+- With --shot-policy failure-only every new context is tracked, so a failed test gets its open pages captured.
+- With --context-pool N released contexts are reset (cookies, storage, permissions, routes, headers),
+  verified clean and reused; the route layers are re-installed after each reset.
+- Closes the pooled contexts and keeps the pool summary after tests finish.
+"""
+    factory = PageFactory(lambda engine="chromium": browser_pool.acquire(
+        engine=engine,
+        headless=browser_context_args["headless"],
+        slow_mo=browser_context_args["slow_mo"]
+    ))
+    recorder = pytestconfig.stash.get(trace_recorder_key, None)
+    if recorder is not None:
+        factory.add_setup(recorder.install)
+        factory.add_pool_hooks(acquire=recorder.acquire, release=recorder.release)
+    nav_metrics = pytestconfig.stash.get(nav_metrics_key, None)
+    if nav_metrics is not None:
+        factory.add_setup(nav_metrics.install)
+    screenshot_service = pytestconfig.stash[screenshot_service_key]
+    if screenshot_service.policy == "failure-only":
+        factory.add_setup(screenshot_service.track)
+    network_mode = pytestconfig.getoption("--network")
+    if network_mode == "record":
+        factory.add_setup(network_store.record, rerun_on_reset=True)
+    elif network_mode == "replay":
+        factory.add_setup(network_store.replay, rerun_on_reset=True)
+    if asset_cache.enabled:
+        factory.add_setup(asset_cache.install, rerun_on_reset=True)
+    pool_size = pytestconfig.getoption("--context-pool")
+    if pool_size > 0:
+        factory.pool = ContextPool(factory, size=pool_size, max_uses=pytestconfig.getoption("--context-max-uses"))
+        factory.pool.prewarm()
+    watchdog = pytestconfig.stash.get(memory_watchdog_key, None)
+    if watchdog is not None:
+        watchdog.attach(browser_pool, factory)
+    yield factory
+    if factory.pool is not None:
+        factory.pool.close()
+        pytestconfig.stash[context_pool_summary_key] = factory.pool.summary()
+
+@pytest.fixture(scope="session")
+def session_cache(pytestconfig):
+    """
+Fixture to provide the authenticated storage-state cache:
+
+- Cached states live in the sessions directory, one file per user and site.
+- Entries expire after --session-ttl seconds.
+"""
+    return SessionCache(filepath.session_dir_path(), ttl=pytestconfig.getoption("--session-ttl"))
+
+@pytest.fixture(scope="module")
+def matrix_cell(request):
+    """
+Fixture to provide the user type and engine a module runs with:
+
+- With --matrix it is parametrized (module scope) over every user type x engine cell.
+- Otherwise it is the module's `user_type` marker (default STANDARD) on chromium.
+"""
+    if hasattr(request, "param"):
+        return request.param
+    marker = request.node.get_closest_marker("user_type")
+    return MatrixCell(marker.args[0] if marker else "STANDARD")
+
+def pytest_generate_tests(metafunc):
+    """Parametrize every test using `matrix_cell` over the --matrix cells, one module-scoped cell at a time."""
+    cells = metafunc.config.stash.get(matrix_cells_key, None)
+    if cells and "matrix_cell" in metafunc.fixturenames:
+        metafunc.parametrize("matrix_cell", cells, ids=[cell.id for cell in cells], scope="module", indirect=True)
+
+@pytest.fixture(scope="session")
+def screenshot(pytestconfig):
+    """
+Fixture to provide the screenshot service: `screenshot(web_page, full_page=True)`.
+
+- Captures follow --shot-policy / --shot-format; images are stored content-addressed
+  in the screenshots directory by a background pool and linked from the HTML report.
+- Can also be handed to PageActions so page objects take their own screenshots.
+"""
+    return pytestconfig.stash[screenshot_service_key]
 
 
 @pytest.hookimpl(hookwrapper=True)
@@ -85,34 +480,436 @@ Hook to capture screenshots for passed tests and add them to the report.
 - report: The test report object.
 - extras: A list containing additional information attached to the report.
 
-If the test passes:
-    - Constructs the expected screenshot path based on test ID and sanitized name.
-    - Checks if the screenshot exists.
-    - If the screenshot exists, adds it as an image attachment to the report.
-    - Optionally, adds a success message to the report.
+With --trace-failures, links the test's kept traces to the report.
+With --timings, adds the test's action timing table to the report.
+With --memory-watchdog, adds the browser memory sampled after the test to the report.
+With --nav-metrics, adds the test's navigations to the report and fails a passed test
+whose navigations exceed the nav_budgets.
+Every phase's duration and final outcome is recorded in the durations history.
+With --matrix, the outcome is kept for the user x engine grid.
+With --stream-results, the test is written to the results log once its teardown is reported.
+
+After the test's call phase:
+    - With --shot-policy failure-only, takes the deferred screenshots if the test failed.
+    - Adds the test's stored screenshots as image attachments, linking the stored files.
+    - With --visual, fails a passed test whose screenshots differ from their baselines
+      and attaches the diff images.
+    - If the test passed, adds a success message to the report.
     - Updates the report's extras with the new information.
 """
+    import pytest_html
+
     outcome = yield
     report = outcome.get_result()
     extras = getattr(report, "extras", [])
 
-    if report.when == "call" and report.passed:
-        # Construct the expected screenshot path
-        screenshot_dir = screenshot_dir_path
-        sanitized_nodeid = item.nodeid.replace("::", "_").replace("/", "_")
-        screenshot_path = os.path.join(screenshot_dir, f"{sanitized_nodeid}.png")
-        if os.path.exists(screenshot_path):
-            extras.append(pytest_html.extras.image(screenshot_path))
-        # Add a success message (optional)
-        extras.append(pytest_html.extras.html("<div>Log of Passed Tests</div>"))
+    if report.failed:
+        item.stash[test_failed_key] = True
+    if report.when == "teardown":
+        # Link the traces kept by --trace-failures
+        for trace_path in item.stash.get(trace_paths_key, []):
+            extras.append(pytest_html.extras.url(trace_path.as_uri(), name=f"Trace {trace_path.name}"))
+        memory_sample = item.stash.get(memory_sample_key, None)
+        if memory_sample is not None:
+            extras.append(pytest_html.extras.html(MemoryWatchdog.html_sample(memory_sample)))
         report.extras = extras
 
+    timings = item.config.stash.get(timings_key, None)
+    if timings is not None and report.when == "call" and item.nodeid in timings.per_test:
+        # Per-test action timings when --timings is on
+        extras.append(pytest_html.extras.html(Timings.html_table(timings.per_test[item.nodeid], "Action timings")))
+        report.extras = extras
+
+    nav_metrics = item.config.stash.get(nav_metrics_key, None)
+    if nav_metrics is not None and report.when == "call":
+        # Pages are still open: collect late LCP updates before judging the test
+        nav_metrics.flush()
+        records = nav_metrics.for_test(item.nodeid)
+        if records:
+            extras.append(pytest_html.extras.html(
+                NavigationMetrics.html_table([(record["url"], record) for record in records], "Navigations")
+            ))
+        violations = nav_metrics.violations(records)
+        if violations and report.passed:
+            report.outcome = "failed"
+            report.longrepr = "Navigation budget exceeded:\n" + "\n".join(violations)
+        report.extras = extras
+
+    if report.when == "call":
+        service = item.config.stash[screenshot_service_key]
+        if report.failed:
+            service.capture_failure(item.nodeid)
+        # Link the content-addressed files the service stored for this test
+        for screenshot_path in service.paths(item.nodeid):
+            extras.append(pytest_html.extras.image(str(screenshot_path)))
+        screenshot_errors = service.html_errors(item.nodeid)
+        if screenshot_errors:
+            # A failed write or comparison leaves the test's outcome alone, it is only noted
+            extras.append(pytest_html.extras.html(screenshot_errors))
+        mismatches = [result for result in service.visual_results(item.nodeid) if not result.passed]
+        for result in mismatches:
+            if result.diff_path is not None:
+                extras.append(pytest_html.extras.image(str(result.diff_path), name=f"Visual diff {result.name}"))
+        if mismatches and report.passed:
+            report.outcome = "failed"
+            report.longrepr = "Visual regression:\n" + "\n".join(f"{result.name}: {result.message}" for result in mismatches)
+        if report.passed:
+            # Add a success message (optional)
+            extras.append(pytest_html.extras.html("<div>Log of Passed Tests</div>"))
+        report.extras = extras
+
+    item.config.stash[durations_key].record(item.nodeid, report.duration, report.failed)
+    matrix_outcomes = item.config.stash.get(matrix_outcomes_key, None)
+    if matrix_outcomes is not None and (report.when == "call" or report.failed):
+        if matrix_outcomes.get(item.nodeid) not in ("failed", "error"):
+            matrix_outcomes[item.nodeid] = report.outcome if report.when == "call" else "error"
+    results_log = item.config.stash.get(results_log_key, None)
+    if results_log is not None:
+        results_log.add_phase(item.nodeid, report)
+
 
 @pytest.hookimpl(tryfirst=True)
 def pytest_configure(config):
-    """Configure unique report name for each test session."""
+    """
+Configure unique report name for each test session.
+
+- With `--local-site` the stand-in site is started on an ephemeral port and
+  URL / PLAYWRIGHT_URL are pointed at it before the test modules read them.
+- A `--workers` process keeps the report path handed down by the controller;
+  a collection-only run writes no report (and creates no report directory).
+- With `--workers N` the controller writes no report of its own; it merges
+  the worker reports into the unique report file once they finish.
+- The durations history is loaded for `--schedule` and the shard balancing.
+- With `--matrix` the cells are built and, without `--workers`, one worker per cell is used;
+  the merged report's user x engine grid is recomputed from all workers' results.
+"""
+    if config.getoption("--local-site"):
+        site = LocalSite().start()
+        config.stash[local_site_key] = site
+        # Loading .env (utils.settings) does not override these
+        os.environ["URL"] = site.url
+        os.environ["PLAYWRIGHT_URL"] = site.playwright_url
+    if config.getoption("--memory-watchdog"):
+        config.stash[memory_watchdog_key] = MemoryWatchdog(
+            max_rss_mb=config.getoption("--max-browser-rss"), max_heap_mb=config.getoption("--max-js-heap")
+        )
+    if config.getoption("--nav-metrics"):
+        config.stash[nav_metrics_key] = NavigationMetrics(parse_budgets(config.getini("nav_budgets")))
+    if config.getoption("--trace-failures"):
+        config.stash[trace_recorder_key] = TraceRecorder(filepath.trace_dir_path(), keep=config.getoption("--trace-keep"))
+    visual = None
+    if config.getoption("--visual") or config.getoption("--update-baselines"):
+        from utils.visual import VisualComparator
+
+        visual = VisualComparator(
+            filepath.baseline_dir_path(),
+            filepath.visual_diff_dir_path(),
+            threshold=config.getoption("--visual-threshold"),
+            tolerance=config.getoption("--visual-tolerance"),
+            update=config.getoption("--update-baselines"),
+        )
+    config.stash[screenshot_service_key] = ScreenshotService(
+        # Not created here: the service creates its directories when it first writes
+        filepath.base_dir / "screenshots",
+        policy=config.getoption("--shot-policy"),
+        image_format=config.getoption("--shot-format"),
+        quality=config.getoption("--shot-quality"),
+        visual=visual,
+    )
+    config.stash[durations_key] = DurationsDB(filepath.base_dir / "history" / "durations.json")
+    config.addinivalue_line("markers", "user_type(name): default user type (<name>_USER in .env) of a module's matrix_cell")
+    if config.getoption("--matrix"):
+        try:
+            config.stash[matrix_cells_key] = build_cells(
+                parse_list(config.getoption("--matrix-users"), USER_TYPES + ("LOCKED",)),
+                parse_list(config.getoption("--matrix-engines"), ENGINES),
+            )
+        except ValueError as error:
+            raise pytest.UsageError(str(error))
+        config.stash[matrix_outcomes_key] = {}
+    config.stash[startup_key] = _startup
+    if config.getoption("--worker-id") is not None or config.option.collectonly:
+        # Collection-only runs write no report
+        return
     test_files = config.args
     test_name = os.path.splitext(os.path.basename(test_files[0]))[0]
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_file = os.path.join(report_dir, f"{test_name}_{timestamp}.html")
-    config.option.htmlpath = report_file
\ No newline at end of file
+    report_file = os.path.join(filepath.report_dir_path(), f"{test_name}_{timestamp}.html")
+    workers = config.getoption("--workers")
+    cells = config.stash.get(matrix_cells_key, None)
+    if cells and workers == 1:
+        # Every cell is its own chain: run them all at the same time
+        workers = len(cells)
+    if workers > 1:
+        # Chains are balanced over the workers by their recorded durations
+        config.stash[shard_runner_key] = ShardRunner(
+            config, workers, report_file, weight=config.stash[durations_key].weight,
+            postprocess=(lambda merged_html, outcomes: _merge_matrix_grids(merged_html, cells, outcomes)) if cells else None,
+        )
+        config.option.htmlpath = None
+        return
+    config.option.htmlpath = report_file
+
+
+def _merge_matrix_grids(merged_html, cells, outcomes):
+    """Replace the first worker's matrix grid with the grid of all workers' outcomes and drop the other workers' grids."""
+    grids = iter([grid_html(cells, outcomes)])
+    return _MATRIX_GRID.sub(lambda _: next(grids, ""), merged_html)
+
+
+def _startup_phases(startup):
+    """Milliseconds of each startup phase that has been reached, and their total."""
+    marks = [("conftest imports", "imports"), ("configure and session start", "configured"), ("collection", "collected")]
+    phases, previous = [], startup["conftest"]
+    for name, mark in marks:
+        if mark in startup:
+            phases.append((name, (startup[mark] - previous) * 1000))
+            previous = startup[mark]
+    phases.append(("total", (previous - startup["conftest"]) * 1000))
+    return phases
+
+
+def _startup_over_budget(config):
+    """The startup total in ms when it exceeds the startup_budget_ms ini, otherwise None."""
+    budget = float(config.getini("startup_budget_ms"))
+    total = _startup_phases(config.stash[startup_key])[-1][1]
+    return total if budget and total > budget else None
+
+
+def pytest_collection_finish(session):
+    """Mark the end of collection for the startup-time report."""
+    session.config.stash[startup_key]["collected"] = time.perf_counter()
+
+
+def pytest_collection_modifyitems(session, config, items):
+    """Reorder the module chains by --schedule; tests inside a module keep their order."""
+    schedule = config.getoption("--schedule")
+    if schedule != "none":
+        items[:] = config.stash[durations_key].order(items, schedule)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionstart(session):
+    """
+Install the timing and adaptive timeout instrumentation when --timings / --adaptive-timeouts are given; nothing is patched otherwise.
+
+With --stream-results, opens the results log and the incremental HTML page next to the report
+(each worker of a parallel run writes its own; the controller merges them).
+"""
+    config = session.config
+    config.stash[startup_key]["configured"] = time.perf_counter()
+    if config.option.collectonly or config.stash.get(shard_runner_key, None) is not None:
+        return
+    if config.getoption("--stream-results") and config.option.htmlpath:
+        stem = os.path.splitext(config.option.htmlpath)[0]
+        config.stash[results_log_key] = ResultsLog(
+            f"{stem}.results.jsonl", f"{stem}.stream.html",
+            worker=config.getoption("--worker-id"), title=os.path.basename(stem),
+        )
+    if config.getoption("--timings"):
+        timings = Timings()
+        timings.install()
+        config.stash[timings_key] = timings
+    if config.getoption("--adaptive-timeouts"):
+        # Installed after the timings: the wrappers are removed in the reverse order
+        adaptive = AdaptiveTimeouts(
+            filepath.history_dir_path() / "timeouts.json",
+            percentile=float(config.getini("adaptive_timeout_percentile")),
+            margin_ms=float(config.getini("adaptive_timeout_margin_ms")),
+            floor_ms=float(config.getini("adaptive_timeout_floor_ms")),
+            ceiling_ms=float(config.getini("adaptive_timeout_ceiling_ms")),
+            min_samples=int(config.getini("adaptive_timeout_min_samples")),
+            overrides=parse_overrides(config.getini("timeout_overrides")),
+        )
+        adaptive.install()
+        config.stash[adaptive_timeouts_key] = adaptive
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_protocol(item, nextitem):
+    """Attribute the following action timings, step latencies, screenshots and navigations (fixture setup included) to the test that is starting."""
+    timings = item.config.stash.get(timings_key, None)
+    if timings is not None:
+        timings.current_test = item.nodeid
+    adaptive = item.config.stash.get(adaptive_timeouts_key, None)
+    if adaptive is not None:
+        adaptive.current_test = item.nodeid
+    nav_metrics = item.config.stash.get(nav_metrics_key, None)
+    if nav_metrics is not None:
+        nav_metrics.current_test = item.nodeid
+    item.config.stash[screenshot_service_key].start_test(item.nodeid)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """Start the test's trace chunk on the contexts that are already open (--trace-failures)."""
+    recorder = item.config.stash.get(trace_recorder_key, None)
+    if recorder is not None:
+        recorder.start_test(item.nodeid)
+
+
+def _matrix_cell_of(item):
+    """The --matrix cell a test item is parametrized with, None outside the matrix (or without a next item)."""
+    return getattr(getattr(item, "callspec", None), "params", {}).get("matrix_cell")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item, nextitem):
+    """
+Stop the test's trace chunks before its fixtures (and contexts) are torn down.
+
+- The chunk is written only if the test failed or is a rerun, otherwise discarded.
+- Drops the screenshots the test deferred (failure-only) and did not need.
+- With --memory-watchdog, samples browser memory once the fixtures are torn down; after
+  the last test of a module or of a --matrix cell (its pages closed) a browser past the limits is recycled.
+"""
+    recorder = item.config.stash.get(trace_recorder_key, None)
+    if recorder is not None:
+        keep = item.stash.get(test_failed_key, False) or getattr(item, "execution_count", 1) > 1
+        item.stash[trace_paths_key] = recorder.stop_test(item.nodeid, keep)
+    item.config.stash[screenshot_service_key].stop_test(item.nodeid)
+    yield
+    watchdog = item.config.stash.get(memory_watchdog_key, None)
+    if watchdog is not None:
+        # Module-scoped fixtures are torn down at the end of a module, and of each of its --matrix cells
+        module_done = (
+            getattr(nextitem, "module", None) is not getattr(item, "module", None)
+            or _matrix_cell_of(nextitem) != _matrix_cell_of(item)
+        )
+        item.stash[memory_sample_key] = watchdog.sample(item.nodeid, module_done)
+
+
+def _summary_sections(session):
+    """HTML sections of the run's total action timings, browser memory timeline, matrix grid and per-URL navigation metrics."""
+    sections = []
+    timings = session.config.stash.get(timings_key, None)
+    if timings is not None:
+        sections.append(Timings.html_table(timings.totals(), "Action timings (all tests)"))
+    watchdog = session.config.stash.get(memory_watchdog_key, None)
+    if watchdog is not None:
+        sections.append(watchdog.html_timeline())
+    cells = session.config.stash.get(matrix_cells_key, None)
+    if cells:
+        sections.append(grid_html(cells, session.config.stash[matrix_outcomes_key]))
+    nav_metrics = session.config.stash.get(nav_metrics_key, None)
+    if nav_metrics is not None:
+        sections.append(NavigationMetrics.html_table(nav_metrics.per_url().items(), "Navigation metrics per URL (p50)"))
+    return sections
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(prefix, summary, postfix, session):
+    """Add the run's total action timings, browser memory timeline, matrix grid and per-URL navigation metrics as extra sections of the pytest-html report."""
+    postfix.extend(_summary_sections(session))
+
+
+def _check_startup_budget(session):
+    """With --startup-budget-strict, fail the run (not a worker's) when startup exceeded startup_budget_ms, even if every test passed."""
+    config = session.config
+    if (
+        config.getoption("--startup-budget-strict") and _startup_over_budget(config) is not None
+        and config.getoption("--worker-id") is None
+    ):
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def _save_histories(session):
+    """Finish the screenshot writes and the results log, and save the durations and the navigation metrics time series."""
+    config = session.config
+    config.stash[screenshot_service_key].close()
+    results_log = config.stash.get(results_log_key, None)
+    if results_log is not None:
+        results_log.finish(_summary_sections(session))
+    if not config.option.collectonly:
+        config.stash[durations_key].save()
+    nav_metrics = config.stash.get(nav_metrics_key, None)
+    if nav_metrics is not None:
+        nav_metrics.append_series(config.getoption("--nav-metrics-log") or os.path.join(filepath.report_dir_path(), "nav_metrics.jsonl"))
+
+
+def _write_report_files(config):
+    """Remove the instrumentation, save the step latencies and write the memory timeline (JSON) and action timings (JSON and CSV) next to the HTML report."""
+    report_file = config.option.htmlpath
+    stem = os.path.splitext(report_file)[0] if report_file else None
+    watchdog = config.stash.get(memory_watchdog_key, None)
+    if watchdog is not None and stem and watchdog.timeline:
+        watchdog.write_json(f"{stem}.memory.json")
+    adaptive = config.stash.get(adaptive_timeouts_key, None)
+    if adaptive is not None:
+        adaptive.uninstall()
+        adaptive.save()
+    timings = config.stash.get(timings_key, None)
+    if timings is None:
+        return
+    timings.uninstall()
+    if stem:
+        timings.write_json(f"{stem}.timings.json")
+        timings.write_csv(f"{stem}.timings.csv")
+
+
+def pytest_sessionfinish(session):
+    """
+    Finish the run:
+
+    - Fail it when startup exceeded a strict budget.
+    - Save the screenshots, results log and histories.
+    - Write the report's side files.
+    """
+    _check_startup_budget(session)
+    _save_histories(session)
+    _write_report_files(session.config)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtestloop(session):
+    """
+Run the collected tests on `--workers` processes instead of in this process.
+
+- Module chains are kept together and in order on one worker.
+- With --stream-results, the workers' results logs are merged into one log and one HTML page.
+- Returning True tells pytest the test loop has been handled.
+"""
+    runner = session.config.stash.get(shard_runner_key, None)
+    if runner is None or not session.items:
+        return None
+    terminal = session.config.pluginmanager.get_plugin("terminalreporter")
+    session.testsfailed = runner.run(session.items, terminal)
+    if session.config.getoption("--stream-results"):
+        logs = [f"{os.path.splitext(report)[0]}.results.jsonl" for report in runner.worker_reports]
+        logs = [log for log in logs if os.path.exists(log)]
+        if logs:
+            stem = os.path.splitext(runner.report_file)[0]
+            merge(logs, f"{stem}.results.jsonl")
+            render([f"{stem}.results.jsonl"], f"{stem}.stream.html", title=os.path.basename(stem))
+    return True
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Report what the asset cache, request blocking, screenshot deduplication, context pool and adaptive timeouts saved in this run, and the startup time."""
+    asset_summary = config.stash.get(asset_summary_key, None)
+    if asset_summary:
+        terminalreporter.write_sep("-", asset_summary)
+    context_pool_summary = config.stash.get(context_pool_summary_key, None)
+    if context_pool_summary:
+        terminalreporter.write_sep("-", context_pool_summary)
+    service = config.stash[screenshot_service_key]
+    if service.stats["captured"]:
+        terminalreporter.write_sep("-", service.summary())
+    adaptive = config.stash.get(adaptive_timeouts_key, None)
+    if adaptive is not None:
+        terminalreporter.write_sep("-", adaptive.summary())
+    over_budget = _startup_over_budget(config)
+    if config.getoption("--startup-report") or over_budget is not None:
+        phases = _startup_phases(config.stash[startup_key])
+        terminalreporter.write_sep("-", "startup " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in phases))
+        if over_budget is not None:
+            terminalreporter.write_line(
+                f"startup took {over_budget:.0f} ms, over the startup_budget_ms of {config.getini('startup_budget_ms')} ms", red=True
+            )
+
+
+def pytest_unconfigure(config):
+    """Stop the local stand-in site, if one was started."""
+    site = config.stash.get(local_site_key, None)
+    if site is not None:
+        site.stop()
\ No newline at end of file
@@ -1 +1,3 @@
-CART_ITEM_NAMES="//div[@class='inventory_item_name']"
\ No newline at end of file
+CART_ITEM_NAMES="//div[@class='inventory_item_name']"
+CART_ITEMS="//div[@class='cart_item']"
+CHECKOUT_BUTTON="//button[@id='checkout']"
@@ -0,0 +1,6 @@
+FIRST_NAME="//input[@id='first-name']"
+LAST_NAME="//input[@id='last-name']"
+POSTAL_CODE="//input[@id='postal-code']"
+CONTINUE_BUTTON="//input[@id='continue']"
+FINISH_BUTTON="//button[@id='finish']"
+COMPLETE_HEADER="//h2[@class='complete-header']"
@@ -2,3 +2,8 @@ PRODUCTS="//div[@class='inventory_item_name ']"
 ADD_BUTTONS="//div//button[contains(text(), 'Add to cart')]"
 REMOVE_BUTTONS="//div//button[contains(text(), 'Remove')]"
 SHOPPING_CART_LOGO="//div/a[@class='shopping_cart_link']"
+INVENTORY_ITEMS="//div[@class='inventory_item']"
+# CSS selectors relative to one INVENTORY_ITEMS card, used by the batched PageActions methods
+ITEM_NAME=".inventory_item_name"
+ITEM_PRICE=".inventory_item_price"
+ITEM_BUTTON="button"
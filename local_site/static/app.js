@@ -0,0 +1,206 @@
+/*
+ * Minimal stand-in for https://www.saucedemo.com/ used by `pytest --local-site`.
+ * Only the markup the suites and elements/* selectors rely on is reproduced.
+ */
+var SwagLabs = (function () {
+  var PASSWORD = "secret_sauce";
+  var USERS = ["standard_user", "problem_user", "performance_glitch_user", "error_user", "visual_user"];
+  var LOCKED_USERS = ["locked_out_user"];
+  var PRODUCTS = [
+    {id: 4, name: "Sauce Labs Backpack", price: "29.99"},
+    {id: 0, name: "Sauce Labs Bike Light", price: "9.99"},
+    {id: 1, name: "Sauce Labs Bolt T-Shirt", price: "15.99"},
+    {id: 5, name: "Sauce Labs Fleece Jacket", price: "49.99"},
+    {id: 2, name: "Sauce Labs Onesie", price: "7.99"},
+    {id: 3, name: "Test.allTheThings() T-Shirt (Red)", price: "15.99"}
+  ];
+
+  function slug(name) {
+    return name.toLowerCase().replace(/[^a-z0-9]+/g, "-").replace(/-+$/, "");
+  }
+
+  function currentUser() {
+    var match = document.cookie.match(/(?:^|; )session-username=([^;]*)/);
+    return match ? decodeURIComponent(match[1]) : null;
+  }
+
+  function requireLogin(page) {
+    if (!currentUser()) {
+      sessionStorage.setItem("login-error", "Epic sadface: You can only access '/" + page + "' when you are logged in.");
+      location.replace("./");
+      return false;
+    }
+    return true;
+  }
+
+  function cart() {
+    return JSON.parse(localStorage.getItem("cart-contents") || "[]");
+  }
+
+  function saveCart(ids) {
+    localStorage.setItem("cart-contents", JSON.stringify(ids));
+    var badge = document.querySelector(".shopping_cart_badge");
+    badge.textContent = ids.length ? String(ids.length) : "";
+    badge.style.display = ids.length ? "" : "none";
+  }
+
+  function showError(message) {
+    var container = document.querySelector(".error-message-container");
+    container.innerHTML = '<h3 data-test="error">' + message + '</h3>';
+  }
+
+  function initLogin() {
+    var pending = sessionStorage.getItem("login-error");
+    if (pending) {
+      sessionStorage.removeItem("login-error");
+      showError(pending);
+    }
+    document.getElementById("login_form").addEventListener("submit", function (event) {
+      event.preventDefault();
+      var user = document.getElementById("user-name").value;
+      var passwd = document.getElementById("password").value;
+      if (!user) return showError("Epic sadface: Username is required");
+      if (!passwd) return showError("Epic sadface: Password is required");
+      if (passwd === PASSWORD && LOCKED_USERS.indexOf(user) >= 0) {
+        return showError("Epic sadface: Sorry, this user has been locked out.");
+      }
+      if (passwd !== PASSWORD || USERS.indexOf(user) < 0) {
+        return showError("Epic sadface: Username and password do not match any user in this service");
+      }
+      document.cookie = "session-username=" + encodeURIComponent(user) + "; path=/; max-age=600";
+      location.href = "inventory.html";
+    });
+  }
+
+  function initHeader() {
+    saveCart(cart());
+    document.getElementById("react-burger-menu-btn").addEventListener("click", function () {
+      document.querySelector(".bm-menu-wrap").style.display = "block";
+    });
+    document.getElementById("logout_sidebar_link").addEventListener("click", function (event) {
+      event.preventDefault();
+      document.cookie = "session-username=; path=/; max-age=0";
+      localStorage.removeItem("cart-contents");
+      location.href = "./";
+    });
+  }
+
+  function cartButton(product, inCart) {
+    var action = inCart ? "remove" : "add-to-cart";
+    var css = inCart ? "btn_secondary" : "btn_primary";
+    return '<button class="btn ' + css + ' btn_small btn_inventory" data-id="' + product.id + '" id="' +
+      action + '-' + slug(product.name) + '">' + (inCart ? "Remove" : "Add to cart") + '</button>';
+  }
+
+  function renderInventory() {
+    var ids = cart();
+    document.querySelector(".inventory_list").innerHTML = PRODUCTS.map(function (product) {
+      return '<div class="inventory_item">' +
+        '<div class="inventory_item_img"><img alt="' + product.name + '" class="inventory_item_img" src="static/img/item_' + product.id + '.svg"></div>' +
+        '<div class="inventory_item_description">' +
+        '<div class="inventory_item_label"><a href="#" id="item_' + product.id + '_title_link">' +
+        '<div class="inventory_item_name ">' + product.name + '</div></a></div>' +
+        '<div class="pricebar"><div class="inventory_item_price">$' + product.price + '</div>' +
+        cartButton(product, ids.indexOf(product.id) >= 0) + '</div></div></div>';
+    }).join("");
+  }
+
+  function initInventory() {
+    if (!requireLogin("inventory.html")) return;
+    initHeader();
+    renderInventory();
+    document.querySelector(".inventory_list").addEventListener("click", function (event) {
+      var button = event.target.closest("button[data-id]");
+      if (!button) return;
+      var id = Number(button.getAttribute("data-id"));
+      var ids = cart();
+      var index = ids.indexOf(id);
+      if (index >= 0) ids.splice(index, 1); else ids.push(id);
+      saveCart(ids);
+      // Update the button in place, like React reconciliation does on the real site
+      var product = PRODUCTS.filter(function (p) { return p.id === id; })[0];
+      button.outerHTML = cartButton(product, index < 0);
+    });
+  }
+
+  function renderCart() {
+    var ids = cart();
+    document.querySelector(".cart_list").innerHTML = PRODUCTS.filter(function (product) {
+      return ids.indexOf(product.id) >= 0;
+    }).map(function (product) {
+      return '<div class="cart_item"><div class="cart_quantity">1</div><div class="cart_item_label">' +
+        '<a href="#" id="item_' + product.id + '_title_link"><div class="inventory_item_name">' + product.name + '</div></a>' +
+        '<div class="item_pricebar"><div class="inventory_item_price">$' + product.price + '</div>' +
+        '<button class="btn btn_secondary btn_small cart_button" data-id="' + product.id + '" id="remove-' +
+        slug(product.name) + '">Remove</button></div></div></div>';
+    }).join("");
+  }
+
+  function initCart() {
+    if (!requireLogin("cart.html")) return;
+    initHeader();
+    renderCart();
+    document.querySelector(".cart_list").addEventListener("click", function (event) {
+      var button = event.target.closest("button[data-id]");
+      if (!button) return;
+      var ids = cart();
+      ids.splice(ids.indexOf(Number(button.getAttribute("data-id"))), 1);
+      saveCart(ids);
+      renderCart();
+    });
+  }
+
+  function initCheckoutInfo() {
+    if (!requireLogin("checkout-step-one.html")) return;
+    initHeader();
+    document.getElementById("checkout_info_form").addEventListener("submit", function (event) {
+      event.preventDefault();
+      var fields = [["first-name", "First Name"], ["last-name", "Last Name"], ["postal-code", "Postal Code"]];
+      for (var i = 0; i < fields.length; i++) {
+        if (!document.getElementById(fields[i][0]).value) {
+          return showError("Error: " + fields[i][1] + " is required");
+        }
+      }
+      location.href = "checkout-step-two.html";
+    });
+  }
+
+  function initCheckoutOverview() {
+    if (!requireLogin("checkout-step-two.html")) return;
+    initHeader();
+    var ids = cart();
+    var total = 0;
+    document.querySelector(".cart_list").innerHTML = PRODUCTS.filter(function (product) {
+      return ids.indexOf(product.id) >= 0;
+    }).map(function (product) {
+      total += Number(product.price);
+      return '<div class="cart_item"><div class="cart_quantity">1</div><div class="cart_item_label">' +
+        '<div class="inventory_item_name">' + product.name + '</div>' +
+        '<div class="inventory_item_price">$' + product.price + '</div></div></div>';
+    }).join("");
+    document.querySelector(".summary_subtotal_label").textContent = "Item total: $" + total.toFixed(2);
+    document.getElementById("finish").addEventListener("click", function () {
+      localStorage.removeItem("cart-contents");
+      location.href = "checkout-complete.html";
+    });
+  }
+
+  function initCheckoutComplete() {
+    if (!requireLogin("checkout-complete.html")) return;
+    initHeader();
+  }
+
+  return {
+    products: PRODUCTS,
+    cart: cart,
+    saveCart: saveCart,
+    requireLogin: requireLogin,
+    initHeader: initHeader,
+    initLogin: initLogin,
+    initInventory: initInventory,
+    initCart: initCart,
+    initCheckoutInfo: initCheckoutInfo,
+    initCheckoutOverview: initCheckoutOverview,
+    initCheckoutComplete: initCheckoutComplete
+  };
+})();
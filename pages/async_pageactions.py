@@ -0,0 +1,110 @@
+import elements.product_elements as productpage
+import elements.cartpage_elements as cartpage
+import elements.checkout_elements as checkoutpage
+from pages.pageactions import IN_CART_JS, READ_CARDS_JS, ProductCard, ensure_products_listed
+
+
+class AsyncPageActions:
+    """
+    asyncio counterpart of PageActions for https://www.saucedemo.com/, built on `playwright.async_api`.
+
+    Lets one Python process drive many pages concurrently, e.g. the virtual
+    users of `utils.loadrunner`.
+
+    Attributes:
+        page (playwright.async_api.Page): The Playwright browser page instance.
+    """
+
+    def __init__(self, page):
+        """
+        Initializes the AsyncPageActions instance with an async Playwright browser page.
+
+        Args:
+            page (playwright.async_api.Page): The Playwright browser page instance.
+        """
+        self.page = page
+
+    async def login(self, user_name: str, passwd: str):
+        """
+        Logs in to a web page using the provided username and password.
+
+        Args:
+            user_name (str): The username to use for login.
+            passwd (str): The password to use for login.
+        """
+        await self.page.get_by_placeholder("Username").click()
+        await self.page.get_by_placeholder("Username").fill(user_name)
+        await self.page.get_by_placeholder("Password").click()
+        await self.page.get_by_placeholder("Password").fill(passwd)
+        await self.page.get_by_role("button", name="Login").click()
+
+    async def logout(self):
+        """
+        Logs out of the currently accessed web page.
+        """
+        await self.page.get_by_role("button", name='Open Menu').click()
+        await self.page.locator("//a[@id='logout_sidebar_link']").click()
+
+    async def read_products(self):
+        """
+        Reads all product cards of the inventory page in a single round-trip.
+
+        Returns:
+            list[ProductCard]: One record per card, in page order.
+        """
+        cards = await self.page.locator(productpage.INVENTORY_ITEMS).evaluate_all(
+            READ_CARDS_JS, [productpage.ITEM_NAME, productpage.ITEM_PRICE, productpage.ITEM_BUTTON]
+        )
+        return [ProductCard(**card) for card in cards]
+
+    async def add_products(self, names):
+        """
+        Adds the named products to the cart: Playwright clicks on the wanted buttons,
+        then one wait until they all show "Remove" (see PageActions.add_products).
+
+        Args:
+            names (list[str]): Names of the products to add.
+
+        Raises:
+            ValueError: A name matches no product card.
+
+        Returns:
+            list[ProductCard]: The records of the named products after adding them.
+        """
+        names = list(names)
+        cards = await self.read_products()
+        ensure_products_listed(cards, names)
+        items = self.page.locator(productpage.INVENTORY_ITEMS)
+        for card in cards:
+            if card.name in names and not card.in_cart:
+                await items.nth(card.index).locator(productpage.ITEM_BUTTON).click()
+        await self.page.wait_for_function(
+            IN_CART_JS, arg=[productpage.INVENTORY_ITEMS, productpage.ITEM_NAME, productpage.ITEM_BUTTON, names]
+        )
+        return [card for card in await self.read_products() if card.name in names]
+
+    async def open_cart(self):
+        """
+        Opens the "Your Cart" page through the shopping cart link.
+        """
+        await self.page.locator(productpage.SHOPPING_CART_LOGO).click()
+
+    async def checkout(self, first_name: str, last_name: str, postal_code: str):
+        """
+        Checks out the current cart, starting from the "Your Cart" page.
+
+        Args:
+            first_name (str): First name for the checkout form.
+            last_name (str): Last name for the checkout form.
+            postal_code (str): Zip/postal code for the checkout form.
+
+        Returns:
+            str: The confirmation header, e.g. "Thank you for your order!".
+        """
+        await self.page.locator(cartpage.CHECKOUT_BUTTON).click()
+        await self.page.locator(checkoutpage.FIRST_NAME).fill(first_name)
+        await self.page.locator(checkoutpage.LAST_NAME).fill(last_name)
+        await self.page.locator(checkoutpage.POSTAL_CODE).fill(postal_code)
+        await self.page.locator(checkoutpage.CONTINUE_BUTTON).click()
+        await self.page.locator(checkoutpage.FINISH_BUTTON).click()
+        return await self.page.locator(checkoutpage.COMPLETE_HEADER).text_content()
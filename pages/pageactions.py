@@ -1,3 +1,66 @@
+from dataclasses import dataclass
+
+import elements.product_elements as productpage
+import elements.cartpage_elements as cartpage
+import elements.checkout_elements as checkoutpage
+
+
+# Reads every product card in one evaluation: name, price and cart button text
+READ_CARDS_JS = """
+(items, [nameSelector, priceSelector, buttonSelector]) => items.map((item, index) => ({
+    index: index,
+    name: item.querySelector(nameSelector).textContent,
+    price: item.querySelector(priceSelector).textContent,
+    button: item.querySelector(buttonSelector).textContent,
+}))
+"""
+
+# True once every wanted card (cards found by XPath) shows "Remove"; polled by wait_for_function
+IN_CART_JS = """
+([itemsXPath, nameSelector, buttonSelector, names]) => {
+    const found = document.evaluate(itemsXPath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const items = Array.from({length: found.snapshotLength}, (_, index) => found.snapshotItem(index));
+    return names.every(name => items.some(item =>
+        item.querySelector(nameSelector).textContent === name && item.querySelector(buttonSelector).textContent === "Remove"
+    ));
+}
+"""
+
+
+def ensure_products_listed(cards, names):
+    """
+    Check that every requested product has a card.
+
+    Raises:
+        ValueError: Some names match no card of the page.
+    """
+    missing = sorted(set(names) - {card.name for card in cards})
+    if missing:
+        raise ValueError(f"no product card named {missing}; the page has {[card.name for card in cards]}")
+
+
+@dataclass
+class ProductCard:
+    """
+    One product card of the inventory page, linked to its cart button.
+
+    Attributes:
+        index (int): Position of the card on the page.
+        name (str): Product name.
+        price (str): Displayed price, e.g. "$29.99".
+        button (str): Text of the card's cart button, "Add to cart" or "Remove".
+    """
+    index: int
+    name: str
+    price: str
+    button: str
+
+    @property
+    def in_cart(self):
+        """Whether the product is in the cart (its button offers Remove)."""
+        return self.button == "Remove"
+
+
 class PageActions:
     """
     This class provides methods for interacting with a web page, https://www.saucedemo.com/, using Playwright.
@@ -6,16 +69,19 @@ class PageActions:
 
     Attributes:
         page (playwright.page): The Playwright browser page instance.
+        screenshot (ScreenshotService): Optional screenshot service used by `take_screenshot`.
     """
 
-    def __init__(self, page):
+    def __init__(self, page, screenshot=None):
         """
         Initializes the PageActions instance with a Playwright browser page.
 
         Args:
             page (playwright.page): The Playwright browser page instance.
+            screenshot (ScreenshotService): Optional screenshot service, e.g. the `screenshot` fixture.
         """
         self.page = page
+        self.screenshot = screenshot
 
     def login(self, user_name: str, passwd: str):
         """
@@ -36,4 +102,84 @@ class PageActions:
         Logs out of the currently accessed web page.
         """
         self.page.get_by_role("button", name='Open Menu').click()
-        self.page.locator("//a[@id='logout_sidebar_link']").click()
\ No newline at end of file
+        self.page.locator("//a[@id='logout_sidebar_link']").click()
+
+    def take_screenshot(self, full_page: bool = False, element=None):
+        """
+        Captures the page through the screenshot service; does nothing without one.
+
+        Args:
+            full_page (bool): Capture the whole scrollable page instead of the viewport.
+            element (str): Selector of the only element to capture.
+        """
+        if self.screenshot is not None:
+            locator = self.page.locator(element) if element else None
+            self.screenshot(self.page, full_page=full_page, element=locator)
+
+    def read_products(self):
+        """
+        Reads all product cards of the inventory page in a single round-trip.
+
+        Returns:
+            list[ProductCard]: One record per card, in page order.
+        """
+        cards = self.page.locator(productpage.INVENTORY_ITEMS).evaluate_all(
+            READ_CARDS_JS, [productpage.ITEM_NAME, productpage.ITEM_PRICE, productpage.ITEM_BUTTON]
+        )
+        return [ProductCard(**card) for card in cards]
+
+    def add_products(self, names):
+        """
+        Adds the named products to the cart.
+
+        The cards are read in one round-trip; each wanted button is clicked through
+        Playwright (actionability checks included), then a single wait_for_function
+        waits until every wanted button shows "Remove". Products already in the cart
+        are left as they are.
+
+        Args:
+            names (list[str]): Names of the products to add.
+
+        Raises:
+            ValueError: A name matches no product card.
+
+        Returns:
+            list[ProductCard]: The records of the named products after adding them.
+        """
+        names = list(names)
+        cards = self.read_products()
+        ensure_products_listed(cards, names)
+        items = self.page.locator(productpage.INVENTORY_ITEMS)
+        for card in cards:
+            if card.name in names and not card.in_cart:
+                items.nth(card.index).locator(productpage.ITEM_BUTTON).click()
+        self.page.wait_for_function(
+            IN_CART_JS, arg=[productpage.INVENTORY_ITEMS, productpage.ITEM_NAME, productpage.ITEM_BUTTON, names]
+        )
+        return [card for card in self.read_products() if card.name in names]
+
+    def open_cart(self):
+        """
+        Opens the "Your Cart" page through the shopping cart link.
+        """
+        self.page.locator(productpage.SHOPPING_CART_LOGO).click()
+
+    def checkout(self, first_name: str, last_name: str, postal_code: str):
+        """
+        Checks out the current cart, starting from the "Your Cart" page.
+
+        Args:
+            first_name (str): First name for the checkout form.
+            last_name (str): Last name for the checkout form.
+            postal_code (str): Zip/postal code for the checkout form.
+
+        Returns:
+            str: The confirmation header, e.g. "Thank you for your order!".
+        """
+        self.page.locator(cartpage.CHECKOUT_BUTTON).click()
+        self.page.locator(checkoutpage.FIRST_NAME).fill(first_name)
+        self.page.locator(checkoutpage.LAST_NAME).fill(last_name)
+        self.page.locator(checkoutpage.POSTAL_CODE).fill(postal_code)
+        self.page.locator(checkoutpage.CONTINUE_BUTTON).click()
+        self.page.locator(checkoutpage.FINISH_BUTTON).click()
+        return self.page.locator(checkoutpage.COMPLETE_HEADER).text_content()
@@ -1,35 +1,29 @@
-import os
 import pytest
-import dotenv
 import logging
-from utils.filepath import FilePath
 from pages.pageactions import PageActions
-from playwright.sync_api import  expect
+from utils.expect import expect
+from utils.settings import settings
 
 
-dotenv.load_dotenv()
-
-URL = os.getenv('URL')
-INVALID_USER = os.getenv('INVALID_USER')
-LOCKED_USER = os.getenv("LOCKED_USER")
-INVALID_PASSWD = os.getenv('INVALID_PASSWD')
-VALID_PASSWD = os.getenv("PASSWD")
-
-file_path = FilePath()
+URL = settings.url
+INVALID_USER = settings.user('INVALID')
+LOCKED_USER = settings.user('LOCKED')
+INVALID_PASSWD = settings.get('INVALID_PASSWD')
+VALID_PASSWD = settings.passwd
 
 @pytest.fixture(scope="module")
-def browser_context(browser):
+def browser_context(pages):
     """
     Fixture to set up a browser page and login session for each test module.
 
-    - Creates a new Playwright browser page.
+    - Creates a new Playwright browser page in its own context.
     - Initializes a PageActions instance with the page as input.
 
     Yields a dictionary containing the web_page and login_session objects.
 
     - Closes the browser page after each test.
     """
-    web_page = browser.new_page()
+    web_page = pages.open()
     login_session = PageActions(web_page)
 
     yield {
@@ -37,7 +31,7 @@ def browser_context(browser):
         'login_session': login_session
     }
 
-    web_page.close()
+    pages.close(web_page)
 
 
 def test_land_in_home_page(browser_context):
@@ -53,7 +47,7 @@ def test_land_in_home_page(browser_context):
     logging.info("Landed in Homepage")
 
 
-def test_failed_login(browser_context, request):
+def test_failed_login(browser_context, screenshot):
     """
     Test to verify failed login with invalid credentials.
 
@@ -61,7 +55,7 @@ def test_failed_login(browser_context, request):
     - Attempts login using `login_session.login(INVALID_USER, INVALID_PASSWD)`.
     - Uses `expect` to verify the presence of an error message indicating invalid credentials.
     - Logs an informational message for capturing a screenshot of the failed login attempt.
-    - Takes a screenshot of the web page using `web_page.screenshot` and saves it with a unique name.
+    - Takes a screenshot of the web page through the `screenshot` service.
     """
     web_page = browser_context["web_page"]
     login_session = browser_context["login_session"]
@@ -70,12 +64,10 @@ def test_failed_login(browser_context, request):
     expect(web_page.get_by_role('button', name='Epic sadface: Username and password do not match any user in this service'))
 
     logging.info('Failed Login Captured')
-    nodeid = request.node.nodeid.replace("::", "_").replace("/", "_")
-    file_name = file_path.screenshot_path(f'{nodeid}.png')
-    web_page.screenshot(path=file_name)
+    screenshot(web_page)
 
 
-def test_locked_user(browser_context, request):
+def test_locked_user(browser_context, screenshot):
     """
     Test to verify behavior for a locked user attempting login.
 
@@ -83,7 +75,7 @@ def test_locked_user(browser_context, request):
     - Attempts login using `login_session.login(LOCKED_USER, VALID_PASSWD)`.
     - Uses `expect` to verify the presence of an error message indicating a locked user.
     - Logs an informational message for capturing a screenshot of the locked user message.
-    - Takes a screenshot of the web page using `web_page.screenshot` and saves it with a unique name.
+    - Takes a screenshot of the web page through the `screenshot` service.
     """
     web_page = browser_context["web_page"]
     login_session = browser_context["login_session"]
@@ -92,6 +84,4 @@ def test_locked_user(browser_context, request):
     expect(web_page.get_by_role('button', name='Epic sadface: Sorry, this user has been locked out.'))
 
     logging.info('Locked User Detected')
-    nodeid = request.node.nodeid.replace("::", "_").replace("/", "_")
-    file_name = file_path.screenshot_path(f'{nodeid}.png')
-    web_page.screenshot(path=file_name)
\ No newline at end of file
+    screenshot(web_page)
\ No newline at end of file
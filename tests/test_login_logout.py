@@ -1,33 +1,28 @@
-import os
 import pytest
-import dotenv
 import logging
-from utils.filepath import FilePath
 from pages.pageactions import PageActions
-from playwright.sync_api import expect
+from utils.expect import expect
+from utils.settings import settings
 
-dotenv.load_dotenv()
+URL = settings.url
 
-URL = os.getenv('URL')
-VISUAL_USER = os.getenv('VISUAL_USER')
-PASSWD = os.getenv('PASSWD')
-
-file_path = FilePath()
+# Default user of the module's matrix_cell; --matrix runs it for every user type and engine
+pytestmark = pytest.mark.user_type("VISUAL")
 
 
 @pytest.fixture(scope="module")
-def browser_context(browser):
+def browser_context(pages, matrix_cell):
     """
 Fixture to set up a browser page and login session for each test module.
 
-- Creates a new Playwright browser page.
+- Creates a new Playwright browser page in its own context, on the engine of the matrix cell.
 - Initializes a PageActions instance with the page as input.
 
 Yields a dictionary containing the web_page and login_session objects.
 
 - Closes the browser page after each test.
 """
-    web_page = browser.new_page()
+    web_page = pages.open(engine=matrix_cell.engine)
     login_session = PageActions(web_page) # pass the page context as input
 
     yield {
@@ -35,9 +30,9 @@ Yields a dictionary containing the web_page and login_session objects.
         'login_session': login_session
     }
     # Close the browser entity after each test
-    web_page.close()
+    pages.close(web_page)
 
-def test_home_page(browser_context, request):
+def test_home_page(browser_context, screenshot):
     """
 Test to verify the presence of the "Swag Labs" header on the home page.
 
@@ -45,37 +40,33 @@ Test to verify the presence of the "Swag Labs" header on the home page.
 - Navigates to the application URL using `web_page.goto(URL)`.
 - Uses `expect` to verify the visibility of the "Swag Labs" header element.
 - Logs an informational message for capturing a screenshot of the home page.
-- Takes a screenshot of the web page using `web_page.screenshot` and saves it with a unique name.
+- Takes a screenshot of the web page through the `screenshot` service.
 """
     web_page = browser_context["web_page"]
     web_page.goto(URL)
     expect(web_page.get_by_text('Swag Labs')).to_be_visible()
     logging.info('Swag Labs Header Found')
-    nodeid = request.node.nodeid.replace("::", "_").replace("/", "_")
-    file_name = file_path.screenshot_path(f'{nodeid}.png')
-    web_page.screenshot(path=file_name)
+    screenshot(web_page)
 
 
-def test_login(browser_context, request):
+def test_login(browser_context, matrix_cell, screenshot):
     """
 Test to verify successful login and presence of the "Products" title after login.
 
 - Accesses the web page and login session from the browser context.
-- Performs login using `login_session.login(VISUAL_USER, PASSWD)`.
+- Performs login as the user of the matrix cell using `login_session.login`.
 - Uses `expect` to verify the visibility of the "Products" title element after login.
 - Logs an informational message for capturing a screenshot of the product page.
-- Takes a screenshot of the web page using `web_page.screenshot` and saves it with a unique name.
+- Takes a screenshot of the web page through the `screenshot` service.
 """
     web_page = browser_context["web_page"]
     login_session = browser_context["login_session"]
-    login_session.login(VISUAL_USER, PASSWD)
+    login_session.login(matrix_cell.user, matrix_cell.passwd)
     expect(web_page.locator("//span[@class='title' and contains(text(), 'Products')]")).to_be_visible()
     logging.info('Products Title Found')
-    nodeid = request.node.nodeid.replace("::", "_").replace("/", "_")
-    file_name = file_path.screenshot_path(f'{nodeid}.png')
-    web_page.screenshot(path=file_name)
+    screenshot(web_page)
 
-def test_logout(browser_context, request):
+def test_logout(browser_context, screenshot):
     """
 Test to verify the presence of the login button after a successful logout.
 
@@ -83,13 +74,11 @@ Test to verify the presence of the login button after a successful logout.
 - Performs logout using `login_session.logout()`.
 - Uses `expect` to verify the visibility of the login button element.
 - Logs an informational message for capturing a screenshot of the login page.
-- Takes a screenshot of the web page using `web_page.screenshot` and saves it with a unique name.
+- Takes a screenshot of the web page through the `screenshot` service.
 """
     web_page = browser_context["web_page"]
     login_session = browser_context["login_session"]
     login_session.logout()
     expect(web_page.get_by_role('button')).to_be_visible()
     logging.info('Login button found')
-    nodeid = request.node.nodeid.replace("::", "_").replace("/", "_")
-    file_name = file_path.screenshot_path(f'{nodeid}.png')
-    web_page.screenshot(path=file_name)
\ No newline at end of file
+    screenshot(web_page)
\ No newline at end of file
@@ -1,36 +1,34 @@
-import os
 import pytest
-import dotenv
 import logging
-from utils.filepath import FilePath
-from playwright.sync_api import expect
+from utils.expect import expect
+from utils.settings import settings
 from pages.pageactions import PageActions
 import elements.product_elements as productpage
 import elements.cartpage_elements as cartpage
 
 
-dotenv.load_dotenv()
+URL = settings.url
 
-URL = os.getenv('URL')
-VISUAL_USER = os.getenv('STANDARD_USER')
-PASSWD = os.getenv('PASSWD')
-
-file_path = FilePath()
+# Default user of the module's matrix_cell; --matrix runs it for every user type and engine
+pytestmark = pytest.mark.user_type("STANDARD")
 
 
 @pytest.fixture(scope="module")
-def browser_context(browser):
+def browser_context(pages, session_cache, matrix_cell):
     """
 Fixture to set up a browser page and login session for each test module.
 
-- Creates a new Playwright browser page.
+- Creates a new Playwright browser page in its own context, already authenticated
+  from the cached storage state of the matrix cell's user (only the first run logs in through the UI),
+  on the engine of the matrix cell.
 - Initializes a PageActions instance with the page as input.
 
 Yields a dictionary containing the web_page and login_session objects.
 
 - Closes the browser page after each test.
 """
-    web_page = browser.new_page()
+    storage_state = session_cache.storage_state(pages, URL, matrix_cell.user, matrix_cell.passwd)
+    web_page = pages.open(engine=matrix_cell.engine, storage_state=storage_state)
     login_session = PageActions(web_page) # pass the page context as input
     selected_items = []
 
@@ -40,9 +38,9 @@ Yields a dictionary containing the web_page and login_session objects.
         'selected_items': selected_items
     }
     # Close the browser entity after each test
-    web_page.close()
+    pages.close(web_page)
 
-def test_home_page(browser_context, request):
+def test_home_page(browser_context, screenshot):
     """
 Test to verify the presence of the "Swag Labs" header on the home page.
 
@@ -50,67 +48,59 @@ Test to verify the presence of the "Swag Labs" header on the home page.
 - Navigates to the application URL using `web_page.goto(URL)`.
 - Uses `expect` to verify the visibility of the "Swag Labs" header element.
 - Logs an informational message for capturing a screenshot of the home page.
-- Takes a screenshot of the web page using `web_page.screenshot` and saves it with a unique name.
+- Takes a screenshot of the web page through the `screenshot` service.
 """
     web_page = browser_context["web_page"]
     web_page.goto(URL)
     expect(web_page.get_by_text('Swag Labs')).to_be_visible()
     logging.info('Swag Labs Header Found')
-    nodeid = request.node.nodeid.replace("::", "_").replace("/", "_")
-    file_name = file_path.screenshot_path(f'{nodeid}.png')
-    web_page.screenshot(path=file_name)
+    screenshot(web_page)
 
 
-def test_login(browser_context, request):
+def test_restore_login_session(browser_context, session_cache, matrix_cell, screenshot):
     """
-Test to verify successful login and presence of the "Products" title after login.
+Test to verify the cached login session and presence of the "Products" title.
 
-- Accesses the web page and login session from the browser context.
-- Performs login using `login_session.login(VISUAL_USER, PASSWD)`.
-- Uses `expect` to verify the visibility of the "Products" title element after login.
+- Accesses the web page from the browser context.
+- Opens the inventory with the cached session using `session_cache.open_authenticated`,
+  which logs in through the form only if the site redirects back to it.
+- Uses `expect` to verify the visibility of the "Products" title element.
 - Logs an informational message for capturing a screenshot of the product page.
-- Takes a screenshot of the web page using `web_page.screenshot` and saves it with a unique name.
+- Takes a screenshot of the web page through the `screenshot` service.
 """
     web_page = browser_context["web_page"]
-    login_session = browser_context["login_session"]
-    login_session.login(VISUAL_USER, PASSWD)
+    session_cache.open_authenticated(web_page, URL, matrix_cell.user, matrix_cell.passwd)
     expect(web_page.locator("//span[@class='title' and contains(text(), 'Products')]")).to_be_visible()
     logging.info('Products Title Found')
-    nodeid = request.node.nodeid.replace("::", "_").replace("/", "_")
-    file_name = file_path.screenshot_path(f'{nodeid}.png')
-    web_page.screenshot(path=file_name)
+    screenshot(web_page)
 
 
-def test_add_products_to_cart(browser_context, request):
+def test_add_products_to_cart(browser_context, screenshot):
     """
 Test to add specific products to the shopping cart and verify selection.
 
-- Accesses the web page and selected items list from the browser context.
-- Simulates adding three products to the cart using hardcoded locators for demonstration purposes.
-- Appends the product names to the selected_items list.
+- Accesses the web page, login session and selected items list from the browser context.
+- Reads all product cards (name, price, button state) in one call using `login_session.read_products()`.
+- Adds the 1st, 3rd and 5th product by name in one call using `login_session.add_products(...)`.
+- Asserts every added product's button switched to "Remove" and appends its name to the selected_items list.
 - Logs the list of selected items for informational purposes.
 - Takes a full-page screenshot of the product page after adding items.
 """
     web_page = browser_context["web_page"]
+    login_session = browser_context["login_session"]
     selected_items = browser_context["selected_items"]
-    # Hard coded ...I'm yet to relate product and add to cart button ¯\_(ツ)_/¯
-    web_page.locator(productpage.ADD_BUTTONS).nth(0).click()
-    selected_items.append(web_page.locator(productpage.PRODUCTS).nth(0).text_content())
-
-    web_page.locator(productpage.ADD_BUTTONS).nth(1).click()
-    selected_items.append(web_page.locator(productpage.PRODUCTS).nth(2).text_content())
-
-    web_page.locator(productpage.ADD_BUTTONS).nth(2).click()
-    selected_items.append(web_page.locator(productpage.PRODUCTS).nth(4).text_content())
+    products = login_session.read_products()
+    added = login_session.add_products([products[index].name for index in (0, 2, 4)])
+    for product in added:
+        assert product.in_cart
+        selected_items.append(product.name)
 
     logging.info(selected_items)
 
-    nodeid = request.node.nodeid.replace("::", "_").replace("/", "_")
-    file_name = file_path.screenshot_path(f'{nodeid}.png')
-    web_page.screenshot(path=file_name, full_page=True)
+    screenshot(web_page, full_page=True)
 
 
-def test_go_to_your_cart_page(browser_context, request):
+def test_go_to_your_cart_page(browser_context, screenshot):
     """
 Test to navigate to the "Your Cart" page and verify successful landing.
 
@@ -118,7 +108,7 @@ Test to navigate to the "Your Cart" page and verify successful landing.
 - Clicks the "Shopping Cart" logo element using the locator from productpage.
 - Uses `expect` to verify the visibility of the "Your Cart" title text.
 - Logs an informational message for capturing a full-page screenshot of the cart page.
-- Takes a full-page screenshot of the web page and saves it with a unique name.
+- Takes a full-page screenshot of the web page through the `screenshot` service.
 """
     web_page = browser_context["web_page"]
 
@@ -127,12 +117,10 @@ Test to navigate to the "Your Cart" page and verify successful landing.
 
     logging.info('Landed in Your Cart Page')
 
-    nodeid = request.node.nodeid.replace("::", "_").replace("/", "_")
-    file_name = file_path.screenshot_path(f'{nodeid}.png')
-    web_page.screenshot(path=file_name, full_page=True)
+    screenshot(web_page, full_page=True)
 
 
-def test_added_products_ok(browser_context, request):
+def test_added_products_ok(browser_context, screenshot):
     """
 Test to verify that the products added to the cart match the selected items.
 
@@ -140,7 +128,7 @@ Test to verify that the products added to the cart match the selected items.
 - Retrieves all product names from the cart using the locator from cartpage.
 - Iterates through each cart item name and asserts its presence in the selected_items list.
 - Logs an informational message indicating successful verification.
-- Takes a full-page screenshot of the cart page and saves it with a unique name.
+- Takes a full-page screenshot of the cart page through the `screenshot` service.
 """
     web_page = browser_context["web_page"]
     selected_items = browser_context["selected_items"]
@@ -150,6 +138,4 @@ Test to verify that the products added to the cart match the selected items.
 
     logging.info('Added Items Matched')
 
-    nodeid = request.node.nodeid.replace("::", "_").replace("/", "_")
-    file_name = file_path.screenshot_path(f'{nodeid}.png')
-    web_page.screenshot(path=file_name, full_page=True)
\ No newline at end of file
+    screenshot(web_page, full_page=True)
\ No newline at end of file
@@ -1,33 +1,36 @@
-import os
 import pytest
-import dotenv
+from utils.settings import settings
 
-dotenv.load_dotenv()
-
-URL = os.getenv("PLAYWRIGHT_URL")
+URL = settings.playwright_url
 
 
 @pytest.fixture(scope="module")
-def browser_context(browser):
+def browser_context(pages, pytestconfig):
     """
     Note: Docstring is generating using LLM Assistant::Gemini
 
     Fixture to provide a Playwright browser context with tracing enabled.
 
+    With `--trace-failures` the framework already traces the context per test,
+    so the whole-module trace is skipped.
+
     Yields:
         dict: A dictionary containing a single key 'web_page' with an instance of the WebPage class.
     """
 
-    context = browser.new_context()
-    context.tracing.start(screenshots=True, snapshots=True, sources=True)
-    web_page = browser.new_page()
+    module_trace = not pytestconfig.getoption("--trace-failures")
+    context = pages.new_context()
+    if module_trace:
+        context.tracing.start(screenshots=True, snapshots=True, sources=True)
+    web_page = context.new_page()
 
     yield {
         'web_page': web_page,
     }
 
-    context.tracing.stop(path='pl_trace.zip')
-    web_page.close()
+    if module_trace:
+        context.tracing.stop(path='pl_trace.zip')
+    pages.release(context)
 
 def test_go_to_page(browser_context):
     """
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from utils.asset_cache import AssetCache
+
+
+def response():
+    return SimpleNamespace(status=200, headers={"content-type": "image/png", "content-length": "4"})
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    """Over the size bound, the least recently used assets are evicted and their files removed."""
+    cache = AssetCache(tmp_path, max_bytes=10)
+    cache.store("http://site/a.png", response(), b"aaaa", 5.0)
+    cache.store("http://site/b.png", response(), b"bbbb", 5.0)
+    # A hit moves an asset to the most recently used end
+    cache.entries.move_to_end("http://site/a.png")
+    cache.store("http://site/c.png", response(), b"cccc", 5.0)
+
+    assert list(cache.entries) == ["http://site/a.png", "http://site/c.png"]
+    assert cache.size == 8
+    assert cache.stats["evictions"] == 1
+    assert not cache.asset_path("http://site/b.png").exists()
+    assert "content-length" not in cache.entries["http://site/a.png"]["headers"]
+
+
+def test_size_follows_replaced_entries_and_saved_index(tmp_path):
+    """Storing a URL again replaces its size, and a reloaded cache starts from the saved index."""
+    cache = AssetCache(tmp_path, max_bytes=100)
+    cache.store("http://site/a.js", response(), b"a" * 10, 1.0)
+    cache.store("http://site/a.js", response(), b"a" * 4, 1.0)
+    assert cache.size == 4
+    cache.save()
+
+    assert AssetCache(tmp_path).size == 4
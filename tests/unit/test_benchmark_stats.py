@@ -0,0 +1,22 @@
+from benchmarks.stats import bootstrap_ci, is_regression, median, summarize
+
+
+def test_bootstrap_ci_brackets_the_median_and_is_reproducible():
+    """The interval contains the median, lies within the samples and is the same on every call."""
+    samples = [100, 102, 98, 101, 99, 103, 97, 100, 150, 100]
+    low, high = bootstrap_ci(samples)
+    assert min(samples) <= low <= median(samples) <= high <= max(samples)
+    assert bootstrap_ci(samples) == (low, high)
+
+
+def test_bootstrap_ci_of_constant_or_single_samples():
+    """Identical samples, or a single one, give a zero-width interval."""
+    assert bootstrap_ci([5.0] * 8) == (5.0, 5.0)
+    assert bootstrap_ci([7.0]) == (7.0, 7.0)
+
+
+def test_is_regression_needs_the_whole_interval_above_the_limit():
+    """Only a lower bound above baseline x threshold is a regression."""
+    baseline = {"median_ms": 100.0}
+    assert is_regression(summarize([120.0] * 10), baseline, 1.10)
+    assert not is_regression(summarize([100.0, 130.0] * 5), baseline, 1.10)
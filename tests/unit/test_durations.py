@@ -0,0 +1,42 @@
+import json
+from types import SimpleNamespace
+
+from utils.durations import DurationsDB
+
+
+def items(*nodeids):
+    return [SimpleNamespace(nodeid=nodeid) for nodeid in nodeids]
+
+
+def history(tmp_path, tests):
+    path = tmp_path / "durations.json"
+    path.write_text(json.dumps({"tests": tests, "modules": {}}), encoding="utf-8")
+    return DurationsDB(path)
+
+
+def test_order_longest_first_keeps_chains_intact(tmp_path):
+    """The longest module chain runs first; the tests inside a chain keep their order."""
+    db = history(tmp_path, {
+        "a.py::t1": {"ewma": 1.0}, "a.py::t2": {"ewma": 1.0},
+        "b.py::t1": {"ewma": 5.0}, "b.py::t2": {"ewma": 0.5},
+    })
+    ordered = db.order(items("a.py::t1", "a.py::t2", "b.py::t1", "b.py::t2"), "longest-first")
+    assert [item.nodeid for item in ordered] == ["b.py::t1", "b.py::t2", "a.py::t1", "a.py::t2"]
+
+
+def test_order_failed_first(tmp_path):
+    """Chains with a test that failed last time go first, then longest-first."""
+    db = history(tmp_path, {
+        "a.py::t1": {"ewma": 1.0, "last_outcome": "failed"},
+        "b.py::t1": {"ewma": 5.0, "last_outcome": "passed"},
+        "c.py::t1": {"ewma": 9.0, "last_outcome": "passed"},
+    })
+    ordered = db.order(items("a.py::t1", "b.py::t1", "c.py::t1"), "failed-first")
+    assert [item.nodeid for item in ordered] == ["a.py::t1", "c.py::t1", "b.py::t1"]
+
+
+def test_order_none_and_unknown_tests(tmp_path):
+    """Without a schedule the order is unchanged; unknown tests count as the median known test."""
+    db = history(tmp_path, {"a.py::t1": {"ewma": 2.0}})
+    assert [item.nodeid for item in db.order(items("b.py::t1", "a.py::t1"), "none")] == ["b.py::t1", "a.py::t1"]
+    assert db.estimate(["new.py::t1", "a.py::t1"]) == 4.0
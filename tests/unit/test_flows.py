@@ -0,0 +1,47 @@
+import pytest
+
+from elements.cartpage_elements import CHECKOUT_BUTTON
+from utils.flows import LOGGED_IN_PATH, compile_flow
+
+
+def test_parameters_expand_into_one_job_per_combination():
+    """Every combination of the parameters is a job, with ${name} substituted in the name and steps."""
+    flow = {
+        "name": "checkout ${product} [${user}]",
+        "login_as": "${user}",
+        "parameters": {"user": ["STANDARD", "PROBLEM"], "product": ["Backpack", "Bike Light"]},
+        "steps": [{"add_products": ["${product}"]}, "open_cart", {"click": "cartpage_elements.CHECKOUT_BUTTON"}],
+    }
+    jobs = compile_flow(flow, "cart.yaml")
+
+    assert [job.name for job in jobs] == [
+        "checkout Backpack [STANDARD]", "checkout Bike Light [STANDARD]",
+        "checkout Backpack [PROBLEM]", "checkout Bike Light [PROBLEM]",
+    ]
+    assert jobs[1].login_as == "STANDARD"
+    assert jobs[1].start == LOGGED_IN_PATH
+    assert jobs[1].steps == [("add_products", ["Bike Light"]), ("open_cart", None), ("click", CHECKOUT_BUTTON)]
+
+
+def test_unnamed_combinations_get_a_suffix():
+    """A name without parameters is made unique by the combination's values."""
+    flow = {"name": "login", "parameters": {"user": ["STANDARD", "VISUAL"]}, "steps": [{"login": "${user}"}]}
+    assert [job.name for job in compile_flow(flow)] == ["login [STANDARD]", "login [VISUAL]"]
+
+
+def test_without_parameters_one_job():
+    """A flow without parameters compiles to a single job."""
+    jobs = compile_flow({"name": "land", "site": "PLAYWRIGHT_URL", "start": "docs", "steps": ["open_cart"]})
+    assert len(jobs) == 1
+    assert (jobs[0].site, jobs[0].start, jobs[0].login_as) == ("PLAYWRIGHT_URL", "docs", None)
+
+
+@pytest.mark.parametrize("steps, message", [
+    ([{"login": "${nobody}"}], "unknown parameter"),
+    (["fly"], "unknown step"),
+    ([{"click": "cartpage_elements.NO_SUCH_BUTTON"}], "unknown element"),
+])
+def test_invalid_flows(steps, message):
+    """Unknown parameters, steps and element references are rejected."""
+    with pytest.raises(ValueError, match=message):
+        compile_flow({"name": "bad", "steps": steps})
@@ -0,0 +1,54 @@
+import html
+import json
+from types import SimpleNamespace
+
+from utils.parallel import build_chains, merge_html_reports, plan_shards, report_outcomes
+
+
+def item(nodeid):
+    return SimpleNamespace(nodeid=nodeid)
+
+
+def report(tests, postfix=""):
+    """A minimal pytest-html 4 report with the given test data and extra summary sections."""
+    blob = html.escape(json.dumps({"tests": tests}), quote=True)
+    return (
+        '<p class="run-count">0 tests ran</p><span class="passed">0 </span><span class="failed">0 </span>'
+        f'<div class="additional-summary postfix">{postfix}</div>\n    </div>\n    <table id="results-table"></table>'
+        f'<div id="data-container" data-jsonblob="{blob}"></div>'
+    )
+
+
+def test_build_chains_keeps_modules_together_and_in_order():
+    """Tests of one module form one chain, in collection order."""
+    chains = build_chains([item("a.py::t1"), item("b.py::t1"), item("a.py::t2")])
+    assert chains == {"a.py": ["a.py::t1", "a.py::t2"], "b.py": ["b.py::t1"]}
+
+
+def test_plan_shards_puts_heaviest_chain_on_lightest_shard():
+    """Chains are never split and the shards end up balanced; empty shards are dropped."""
+    chains = {"a.py": ["a1", "a2", "a3"], "b.py": ["b1", "b2"], "c.py": ["c1"]}
+    assert plan_shards(chains, 2) == [["a1", "a2", "a3"], ["b1", "b2", "c1"]]
+    assert plan_shards({"a.py": ["a1"]}, 4) == [["a1"]]
+
+
+def test_plan_shards_uses_weight():
+    """A custom weight overrides the test count."""
+    chains = {"slow.py": ["s1"], "fast.py": ["f1", "f2", "f3"]}
+    weight = lambda key, nodeids: 100 if key == "slow.py" else len(nodeids)
+    assert plan_shards(chains, 2, weight) == [["s1"], ["f1", "f2", "f3"]]
+
+
+def test_merge_html_reports_combines_tests_counts_and_summaries(tmp_path):
+    """The merged report holds every worker's tests, recomputed counters and every worker's summary sections."""
+    first, second, target = tmp_path / "w0.html", tmp_path / "w1.html", tmp_path / "merged.html"
+    first.write_text(report({"a.py::t1": [{"result": "Passed"}]}, "<div>worker 0</div>"), encoding="utf-8")
+    second.write_text(report({"b.py::t1": [{"result": "Passed"}, {"result": "Failed"}]}, "<div>worker 1</div>"), encoding="utf-8")
+
+    merge_html_reports([first, second], target)
+
+    merged = target.read_text(encoding="utf-8")
+    assert report_outcomes(merged) == {"a.py::t1": "passed", "b.py::t1": "failed"}
+    assert '<span class="failed">1 </span>' in merged
+    assert "3 tests ran on 2 workers." in merged
+    assert "<div>worker 0</div>" in merged and "<div>worker 1</div>" in merged
@@ -0,0 +1,41 @@
+import pytest
+
+from utils.percentiles import nearest_rank, percentile, rank
+from utils.timing import BUCKET_GROWTH, Histogram
+
+
+def test_nearest_rank():
+    """The nearest rank is the smallest sample with at least `fraction` of the samples at or below it."""
+    values = [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+    assert rank(10, 0.95) == 10
+    assert nearest_rank(values, 0.50) == 50
+    assert nearest_rank(values, 0.95) == 100
+    assert nearest_rank(values, 0.0) == 10
+    assert nearest_rank([], 0.5) == 0.0
+    assert percentile([3, 1, 2], 0.5) == 2
+
+
+def test_histogram_buckets_and_percentiles():
+    """Samples land in logarithmic buckets; percentiles are the upper bucket bound, capped at the max."""
+    histogram = Histogram()
+    for ms in [10.0] * 90 + [100.0] * 10:
+        histogram.add(ms)
+
+    assert histogram.count == 100
+    assert len(histogram.buckets) == 2
+    assert histogram.percentile(0.50) == pytest.approx(10.0, rel=BUCKET_GROWTH - 1)
+    assert histogram.percentile(0.50) >= 10.0
+    assert histogram.percentile(0.99) == 100.0
+    assert histogram.to_dict()["mean_ms"] == pytest.approx(19.0)
+
+
+def test_histogram_merge():
+    """Merging adds the other histogram's buckets and statistics."""
+    first, second = Histogram(), Histogram()
+    first.add(5.0)
+    second.add(500.0)
+    first.merge(second)
+
+    assert first.count == 2
+    assert (first.min, first.max) == (5.0, 500.0)
+    assert first.percentile(1.0) == 500.0
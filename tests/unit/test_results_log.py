@@ -0,0 +1,53 @@
+import json
+
+from utils.results_log import merge, outcome_of, read_records, render
+
+
+def write_log(path, *records):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+    return path
+
+
+def record(nodeid, outcome, image=None):
+    extras = [{"name": "shot", "format_type": "image", "content": image}] if image else []
+    return {"type": "test", "nodeid": nodeid, "worker": 0, "outcome": outcome, "duration": 1.5, "extras": extras}
+
+
+def test_outcome_of():
+    """A failed setup or teardown is an error, otherwise the call's outcome counts."""
+    assert outcome_of({"setup": {"outcome": "passed"}, "call": {"outcome": "failed"}}) == "failed"
+    assert outcome_of({"setup": {"outcome": "passed"}, "call": {"outcome": "passed"}, "teardown": {"outcome": "failed"}}) == "error"
+    assert outcome_of({"setup": {"outcome": "skipped"}}) == "skipped"
+
+
+def test_merge_rewrites_image_paths_and_skips_cut_lines(tmp_path):
+    """Merged logs keep every record, with image paths relative to the merged log; a cut-off line is skipped."""
+    first = write_log(tmp_path / "shard1" / "a.results.jsonl", record("a.py::t1", "passed", "shots/a.png"))
+    second = tmp_path / "shard2" / "b.results.jsonl"
+    write_log(second, record("b.py::t1", "failed"))
+    with open(second, "a", encoding="utf-8") as log:
+        log.write('{"type": "test", "nodeid": ')
+
+    merged = merge([first, second], tmp_path / "all.results.jsonl")
+
+    records = list(read_records(merged))
+    assert [record["nodeid"] for record in records] == ["a.py::t1", "b.py::t1"]
+    assert records[0]["extras"][0]["content"] == "shard1/shots/a.png"
+
+
+def test_render_counts_outcomes_and_adds_sections(tmp_path):
+    """The rendered page has a row per test, the outcome counts and the summary sections."""
+    log = write_log(
+        tmp_path / "run.results.jsonl",
+        record("a.py::t1", "passed"),
+        record("a.py::t2", "failed"),
+        {"type": "summary", "worker": 0, "sections": ["<div>timings</div>"]},
+    )
+
+    counts = render([log], tmp_path / "run.html", title="run")
+
+    assert counts == {"passed": 1, "failed": 1}
+    page = (tmp_path / "run.html").read_text(encoding="utf-8")
+    assert "a.py::t2" in page and "<div>timings</div>" in page
+    assert "2 tests in 3.0 s" in page
@@ -0,0 +1,65 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from utils.visual import MAX_YIQ_DELTA, VisualComparator, tile_hashes, tile_view, yiq_delta
+
+
+def png(pixels):
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_tile_view_pads_to_whole_tiles():
+    """An image is viewed as rows x cols tiles, zero-padded at the right and bottom."""
+    pixels = np.ones((10, 20, 3), dtype=np.uint8)
+    tiles = tile_view(pixels, 8)
+    assert tiles.shape == (2, 3, 8, 8, 3)
+    assert tiles[1, 2].sum() == 2 * 4 * 3
+
+
+def test_tile_hashes_change_only_for_changed_tiles():
+    """Changing one pixel changes the hash of its tile only."""
+    pixels = np.zeros((16, 16, 3), dtype=np.uint8)
+    changed = pixels.copy()
+    changed[12, 3] = (255, 255, 255)
+    assert (tile_hashes(pixels, 8) != tile_hashes(changed, 8)).tolist() == [[False, False], [True, False]]
+
+
+def test_yiq_delta():
+    """Identical colours differ by 0; black and white differ by nearly the maximum delta, in either order."""
+    black, white = np.zeros((1, 3), dtype=np.float32), np.full((1, 3), 255.0, dtype=np.float32)
+    assert yiq_delta(black, black)[0] == 0
+    assert 0.9 * MAX_YIQ_DELTA < yiq_delta(white, black)[0] <= MAX_YIQ_DELTA
+    assert yiq_delta(white, black)[0] == yiq_delta(black, white)[0]
+
+
+def test_check_new_match_and_mismatch(tmp_path):
+    """A missing baseline is created; an identical image matches; a changed block is a mismatch with a diff image."""
+    comparator = VisualComparator(tmp_path / "baselines", tmp_path / "diffs", threshold=0.1, tile=8)
+    pixels = np.full((16, 16, 3), 200, dtype=np.uint8)
+
+    assert comparator.check("page", png(pixels)).status == "new"
+    assert comparator.check("page", png(pixels)).status == "match"
+
+    changed = pixels.copy()
+    changed[0:4, 0:4] = 0
+    result = comparator.check("page", png(changed))
+    assert result.status == "mismatch"
+    assert (result.diff_pixels, result.changed_tiles) == (16, 1)
+    assert result.diff_path.exists()
+
+
+def test_check_ignores_regions_and_tolerates_small_diffs(tmp_path):
+    """Differences inside ignore regions, or below the tolerance, still match."""
+    comparator = VisualComparator(tmp_path / "baselines", tmp_path / "diffs", tile=8)
+    pixels = np.full((16, 16, 3), 200, dtype=np.uint8)
+    comparator.check("page", png(pixels))
+    changed = pixels.copy()
+    changed[0:4, 0:4] = 0
+
+    assert comparator.check("page", png(changed), ignore=[(0, 0, 4, 4)]).status == "match"
+    comparator.tolerance = 16 / 256
+    assert comparator.check("page", png(changed)).status == "match"
@@ -0,0 +1,276 @@
+"""
+Adaptive per-step timeouts learned from the latency of previous runs.
+
+Every locator action (click, fill, wait_for, ...) and `expect` assertion is a step,
+keyed by test and selector, e.g. `click internal:role=button[name="Login"i]`. The
+latencies of its successful calls are kept in a history file; once a step has enough
+samples, calls made without an explicit `timeout` get
+
+    timeout = clamp(percentile(samples) + margin, floor, ceiling)
+
+so a broken page fails in about the time the step normally takes, instead of
+Playwright's fixed default, while a step that is slow but healthy keeps the time it needs.
+Overrides (ini `timeout_overrides`) win over the learned values.
+
+Inspect the learned timeouts with
+
+    $ python -m utils.adaptive_timeouts [--test "tests/test_login_logout.py::*"] [--json]
+"""
+
+import argparse
+import configparser
+import fnmatch
+import functools
+import inspect
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from utils.filelock import file_lock
+from utils.percentiles import percentile
+
+
+# Successful call latencies kept per step; older samples age out so the timeouts follow drift
+WINDOW = 50
+
+# Playwright's own defaults, used to estimate the time saved by failing fast
+DEFAULT_TIMEOUTS_MS = {"action": 30000, "expect": 5000}
+
+
+def parse_overrides(lines):
+    """
+    Parse `timeout_overrides` ini lines into [(test_pattern, step_pattern, ms)].
+
+    Each line is a test node ID pattern, a step pattern (both fnmatch) and a timeout in ms,
+    e.g. `tests/test_selected_items.py::* click *checkout* 15000`.
+    """
+    overrides = []
+    for line in lines:
+        head, _, ms = line.rpartition(" ")
+        test_pattern, _, step_pattern = head.strip().partition(" ")
+        if not step_pattern:
+            raise ValueError(f"timeout override {line!r} must be '<test pattern> <step pattern> <ms>'")
+        overrides.append((test_pattern, step_pattern.strip(), float(ms)))
+    return overrides
+
+
+class AdaptiveTimeouts:
+    """
+    Learns each step's latency and sets its timeout from it.
+
+    `install()` wraps the Locator methods and expect assertions that take a `timeout`,
+    at class level and only when enabled; `uninstall()` restores them.
+
+    Attributes:
+        path (Path): The JSON history file.
+        percentile (float): Percentile of the samples the timeout starts from, e.g. 99.
+        margin_ms (float): Added to the percentile.
+        floor_ms (float): Smallest timeout set.
+        ceiling_ms (float): Largest timeout set.
+        min_samples (int): Samples a step needs before its timeout is learned.
+        overrides (list): [(test_pattern, step_pattern, ms)], see `parse_overrides`.
+        history (dict): Node ID -> {step: [latency ms, ...]} of previous runs.
+        current (dict): Node ID -> {step: [latency ms, ...]} of this run.
+        current_test (str): Node ID new samples are attributed to.
+        stats (dict): Calls run on a learned or overridden timeout, those that failed on it
+            and the estimated ms saved against Playwright's defaults.
+    """
+
+    def __init__(self, path, percentile: float = 99, margin_ms: float = 1000, floor_ms: float = 1000,
+                 ceiling_ms: float = 30000, min_samples: int = 3, overrides=()):
+        """
+        Loads the history, if any.
+
+        Args:
+            path (str | Path): The JSON history file.
+            percentile (float): Percentile of the samples the timeout starts from.
+            margin_ms (float): Added to the percentile.
+            floor_ms (float): Smallest timeout set.
+            ceiling_ms (float): Largest timeout set.
+            min_samples (int): Samples a step needs before its timeout is learned.
+            overrides (list): [(test_pattern, step_pattern, ms)], see `parse_overrides`.
+        """
+        self.path = Path(path)
+        self.percentile = percentile
+        self.margin_ms = margin_ms
+        self.floor_ms = floor_ms
+        self.ceiling_ms = ceiling_ms
+        self.min_samples = min_samples
+        self.overrides = list(overrides)
+        self.history = self._read()
+        self.current = {}
+        self.current_test = "<session>"
+        self.stats = {"applied": 0, "failed_fast": 0, "saved_ms": 0.0}
+        self._originals = []
+
+    def _read(self):
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8")).get("tests", {})
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def learned(self, samples):
+        """Timeout in ms learned from a step's samples, or None while there are too few."""
+        if len(samples) < self.min_samples:
+            return None
+        timeout = percentile(samples, self.percentile / 100) + self.margin_ms
+        return min(max(timeout, self.floor_ms), self.ceiling_ms)
+
+    def timeout_for(self, nodeid: str, step: str):
+        """Return (timeout ms, "override" | "learned") for a step of a test, or (None, None) to keep the default."""
+        for test_pattern, step_pattern, ms in self.overrides:
+            if fnmatch.fnmatchcase(nodeid, test_pattern) and fnmatch.fnmatchcase(step, step_pattern):
+                return ms, "override"
+        timeout = self.learned(self.history.get(nodeid, {}).get(step, []))
+        return (timeout, "learned") if timeout is not None else (None, None)
+
+    def record(self, step: str, ms: float):
+        """Add the latency of one successful call of a step for the current test."""
+        self.current.setdefault(self.current_test, {}).setdefault(step, []).append(round(ms, 1))
+
+    def _wrap(self, owner, attribute: str, kind: str, selector_of):
+        original = owner.__dict__[attribute]
+        perf_counter = time.perf_counter
+        default_ms = DEFAULT_TIMEOUTS_MS[kind]
+
+        @functools.wraps(original)
+        def adaptive(target, *args, **kwargs):
+            step = f"{attribute} {selector_of(target)}"
+            source = None
+            if kwargs.get("timeout") is None:
+                timeout, source = self.timeout_for(self.current_test, step)
+                if timeout is not None:
+                    kwargs["timeout"] = timeout
+                    self.stats["applied"] += 1
+            started = perf_counter()
+            try:
+                result = original(target, *args, **kwargs)
+            except Exception:
+                if source is not None:
+                    self.stats["failed_fast"] += 1
+                    self.stats["saved_ms"] += max(default_ms - kwargs["timeout"], 0)
+                raise
+            self.record(step, (perf_counter() - started) * 1000)
+            return result
+
+        setattr(owner, attribute, adaptive)
+        self._originals.append((owner, attribute, original))
+
+    def install(self):
+        """Wrap every Locator method and expect assertion that accepts a `timeout`."""
+        from playwright.sync_api import Locator, LocatorAssertions, PageAssertions
+
+        targets = (
+            (Locator, "action", lambda locator: locator._impl_obj._selector),
+            (LocatorAssertions, "expect", lambda assertions: assertions._impl_obj._actual_locator._selector),
+            (PageAssertions, "expect", lambda assertions: "page"),
+        )
+        for owner, kind, selector_of in targets:
+            for attribute, value in list(vars(owner).items()):
+                if attribute.startswith("_") or not inspect.isfunction(value):
+                    continue
+                if "timeout" in inspect.signature(value).parameters:
+                    self._wrap(owner, attribute, kind, selector_of)
+
+    def uninstall(self):
+        """Restore every wrapped method."""
+        for owner, attribute, original in reversed(self._originals):
+            setattr(owner, attribute, original)
+        self._originals.clear()
+
+    def save(self):
+        """Merge this run's samples into the history file, keeping the last WINDOW samples per step."""
+        if not self.current:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.path.with_suffix(".lock")):
+            # Re-read under the lock: other workers may have saved since we loaded
+            tests = self._read()
+            for nodeid, steps in self.current.items():
+                stored = tests.setdefault(nodeid, {})
+                for step, samples in steps.items():
+                    stored[step] = (stored.get(step, []) + samples)[-WINDOW:]
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps({"tests": tests}, indent=1, sort_keys=True), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        self.history = tests
+        self.current = {}
+
+    def rows(self, test_pattern: str = "*"):
+        """Yield the learned state of every step of the matching tests."""
+        for nodeid, steps in sorted(self.history.items()):
+            if not fnmatch.fnmatchcase(nodeid, test_pattern):
+                continue
+            for step, samples in sorted(steps.items()):
+                timeout, source = self.timeout_for(nodeid, step)
+                yield {
+                    "test": nodeid,
+                    "step": step,
+                    "samples": len(samples),
+                    "p50_ms": percentile(samples, 0.5),
+                    "pct_ms": percentile(samples, self.percentile / 100),
+                    "timeout_ms": timeout,
+                    "source": source or "default",
+                }
+
+    def summary(self):
+        """One line on the calls that ran on adapted timeouts."""
+        return (
+            f"adaptive timeouts: {self.stats['applied']} calls on learned / overridden timeouts, "
+            f"{self.stats['failed_fast']} failed fast (~{self.stats['saved_ms'] / 1000:.0f} s saved)"
+        )
+
+
+def from_ini(path, inifile: str = "pytest.ini"):
+    """Build an AdaptiveTimeouts with the `adaptive_timeout_*` and `timeout_overrides` settings of an ini file."""
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read(inifile, encoding="utf-8")
+    section = parser["pytest"] if parser.has_section("pytest") else {}
+    lines = [line.strip() for line in section.get("timeout_overrides", "").splitlines() if line.strip()]
+    return AdaptiveTimeouts(
+        path,
+        percentile=float(section.get("adaptive_timeout_percentile", 99)),
+        margin_ms=float(section.get("adaptive_timeout_margin_ms", 1000)),
+        floor_ms=float(section.get("adaptive_timeout_floor_ms", 1000)),
+        ceiling_ms=float(section.get("adaptive_timeout_ceiling_ms", 30000)),
+        min_samples=int(section.get("adaptive_timeout_min_samples", 3)),
+        overrides=parse_overrides(lines),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the learned per-step timeouts and the overrides in effect.")
+    parser.add_argument("--history", default=None, help="History file (default: history/timeouts.json of the project)")
+    parser.add_argument("--ini", default="pytest.ini", help="ini file with the adaptive timeout settings")
+    parser.add_argument("--test", default="*", help="Only tests matching this node ID pattern")
+    parser.add_argument("--json", action="store_true", help="Print the rows as JSON")
+    args = parser.parse_args(argv)
+
+    if args.history is None:
+        from utils.filepath import FilePath
+        args.history = FilePath().history_dir_path() / "timeouts.json"
+    rows = list(from_ini(args.history, args.ini).rows(args.test))
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+        return 0
+    if not rows:
+        print(f"No learned steps in {args.history}")
+        return 0
+    current = None
+    for row in rows:
+        if row["test"] != current:
+            current = row["test"]
+            print(current)
+        timeout = f"{row['timeout_ms']:.0f}" if row["timeout_ms"] is not None else "-"
+        print(
+            f"  {row['step'][:70]:<70} n={row['samples']:<3} p50={row['p50_ms']:>8.1f} "
+            f"high={row['pct_ms']:>8.1f} timeout={timeout:>6} ({row['source']})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
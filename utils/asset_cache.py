@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from fnmatch import fnmatch
+from pathlib import Path
+
+from utils.filelock import file_lock
+
+
+# Resource types served from the shared asset cache
+STATIC_RESOURCE_TYPES = {"image", "font", "script", "stylesheet"}
+
+# Third-party trackers and ads blocked by --block-trackers
+TRACKER_PATTERNS = [
+    "*google-analytics.com/*",
+    "*googletagmanager.com/*",
+    "*doubleclick.net/*",
+    "*googlesyndication.com/*",
+    "*connect.facebook.net/*",
+    "*hotjar.com/*",
+    "*segment.io/*",
+    "*backtrace.io/*",
+]
+
+
+class AssetCache:
+    """
+    Route layer installed on every new context: blocks unwanted requests and
+    serves static assets from a shared, size-bounded on-disk LRU cache.
+
+    - Requests matching a block pattern (and images, if asked) are aborted.
+    - GET requests for images, fonts, scripts and stylesheets are answered from
+      the cache; misses are fetched once and stored for the next context.
+    - Anything else falls through to the next route handler (or the network).
+
+    Attributes:
+        root (Path): Cache directory.
+        max_bytes (int): Upper bound of the cached bytes; least recently used assets are evicted.
+        block_patterns (list): fnmatch patterns of URLs to abort.
+        block_images (bool): Whether to abort all image requests.
+        cache_assets (bool): Whether to serve static assets from the cache at all.
+        stats (dict): hits, misses, evictions, blocked, bytes_saved and ms_saved counters.
+    """
+
+    def __init__(self, root, max_bytes: int = 200 * 1024 * 1024, block_patterns=(),
+                 block_images: bool = False, cache_assets: bool = True):
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self.max_bytes = max_bytes
+        self.block_patterns = list(block_patterns)
+        self.block_images = block_images
+        self.cache_assets = cache_assets
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "blocked": 0, "bytes_saved": 0, "ms_saved": 0.0}
+        self.entries = OrderedDict(self._read_index())
+        # Running total of the entries' sizes, kept up to date by store, evict and save
+        self._bytes = sum(entry["size"] for entry in self.entries.values())
+
+    @property
+    def enabled(self):
+        """Whether the route layer has anything to do."""
+        return self.cache_assets or self.block_images or bool(self.block_patterns)
+
+    @property
+    def size(self):
+        """Total size of the cached assets in bytes."""
+        return self._bytes
+
+    def _read_index(self):
+        try:
+            return json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def asset_path(self, url: str):
+        """Return the file an asset URL is cached in."""
+        return self.root / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def is_blocked(self, request):
+        """Check whether a request matches the block list."""
+        if self.block_images and request.resource_type == "image":
+            return True
+        return any(fnmatch(request.url, pattern) for pattern in self.block_patterns)
+
+    def install(self, context):
+        """Install the route layer on a context."""
+        if self.enabled:
+            context.route("**/*", self.handle)
+
+    def handle(self, route):
+        """Route handler: block, serve from cache, or fetch and store."""
+        request = route.request
+        if self.is_blocked(request):
+            self.stats["blocked"] += 1
+            route.abort("blockedbyclient")
+            return
+        if not self.cache_assets or request.method != "GET" or request.resource_type not in STATIC_RESOURCE_TYPES:
+            route.fallback()
+            return
+
+        entry = self.entries.get(request.url)
+        path = self.asset_path(request.url)
+        if entry is not None and path.exists():
+            self.entries.move_to_end(request.url)
+            self.stats["hits"] += 1
+            self.stats["bytes_saved"] += entry["size"]
+            self.stats["ms_saved"] += entry["fetch_ms"]
+            route.fulfill(status=entry["status"], headers=entry["headers"], path=path)
+            return
+
+        self.stats["misses"] += 1
+        started = time.perf_counter()
+        response = route.fetch()
+        body = response.body()
+        fetch_ms = (time.perf_counter() - started) * 1000
+        if response.ok:
+            self.store(request.url, response, body, fetch_ms)
+        route.fulfill(response=response, body=body)
+
+    def store(self, url: str, response, body: bytes, fetch_ms: float):
+        """Write an asset to the cache and evict the least recently used ones over the size bound."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.asset_path(url)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(body)
+        os.replace(tmp_path, path)
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        }
+        previous = self.entries.get(url)
+        if previous is not None:
+            self._bytes -= previous["size"]
+        self._bytes += len(body)
+        self.entries[url] = {"status": response.status, "headers": headers, "size": len(body), "fetch_ms": fetch_ms}
+        self.entries.move_to_end(url)
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used assets until the cache fits `max_bytes`."""
+        while self.entries and self._bytes > self.max_bytes:
+            url, entry = self.entries.popitem(last=False)
+            self._bytes -= entry["size"]
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self.asset_path(url))
+            except FileNotFoundError:
+                pass
+
+    def save(self):
+        """Merge this process' LRU order into the on-disk index (other workers may have written too)."""
+        if not self.entries:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.root / "index.lock"):
+            merged = OrderedDict(
+                (url, entry) for url, entry in self._read_index().items() if url not in self.entries
+            )
+            merged.update(self.entries)
+            self.entries = merged
+            self._bytes = sum(entry["size"] for entry in self.entries.values())
+            self.evict()
+            tmp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(self.entries), encoding="utf-8")
+            os.replace(tmp_path, self.index_path)
+
+    def summary(self):
+        """Return a one-line summary of the run's hits, misses, blocked requests and savings."""
+        stats = self.stats
+        return (
+            f"asset cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions, "
+            f"{stats['blocked']} blocked; saved {stats['bytes_saved'] / 1024:.1f} KiB "
+            f"and {stats['ms_saved']:.0f} ms ({self.size / 1024 / 1024:.1f} MiB cached)"
+        )
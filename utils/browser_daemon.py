@@ -0,0 +1,293 @@
+"""
+Persistent browser daemon that keeps warm Chromium instances between pytest runs.
+
+Each slot (headless/headed, slow-mo) is one Chromium started with a remote
+debugging port. Its websocket endpoint is written to a state file that
+conftest (`pytest --daemon`) connects to over CDP instead of launching a
+browser. A slot shuts itself down after `--idle-timeout` seconds without clients; a
+connected run keeps refreshing the slot's heartbeat for as long as it holds the browser.
+
+    $ python -m utils.browser_daemon start [--headed] [--slow-mo 1200] [--idle-timeout 900]
+    $ python -m utils.browser_daemon status
+    $ python -m utils.browser_daemon stop [--all]
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+from utils.filepath import FilePath
+
+
+DEVTOOLS_LINE = re.compile(r"DevTools listening on (ws://\S+)")
+
+
+def slot_name(headless: bool = True, slow_mo: int = 0):
+    """Return the name of the daemon slot serving a launch configuration."""
+    return f"chromium-{'headless' if headless else 'headed'}-slowmo{slow_mo}"
+
+
+class BrowserDaemon:
+    """
+    Client side of the browser daemon: finds, health-checks and starts slots.
+
+    Attributes:
+        state_dir (Path): Directory holding one `<slot>.json` state and `<slot>.heartbeat` file per slot.
+    """
+
+    def __init__(self, state_dir=None):
+        self.state_dir = Path(state_dir) if state_dir else FilePath().daemon_dir_path()
+
+    def state_path(self, slot: str):
+        return self.state_dir / f"{slot}.json"
+
+    def heartbeat_path(self, slot: str):
+        return self.state_dir / f"{slot}.heartbeat"
+
+    def read_state(self, slot: str):
+        """Return the state of a slot, or None if it is not running."""
+        try:
+            return json.loads(self.state_path(slot).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def is_healthy(self, state, timeout: float = 0.5):
+        """Check that the slot's browser answers on its DevTools HTTP endpoint."""
+        try:
+            with urllib.request.urlopen(f"{state['http_endpoint']}/json/version", timeout=timeout) as response:
+                return response.status == 200
+        except (OSError, ValueError):
+            return False
+
+    def touch(self, slot: str):
+        """Mark a slot as used now, postponing its idle shutdown."""
+        self.heartbeat_path(slot).touch()
+
+    def keep_alive(self, headless: bool = True, slow_mo: int = 0):
+        """
+        Keep refreshing a slot's heartbeat from a background thread while a client holds its browser.
+
+        A run connected for longer than the idle timeout would otherwise have its browser
+        shut down under it. Returns the threading.Event that stops the heartbeat.
+
+        Args:
+            headless (bool): Whether the held browser runs headless.
+            slow_mo (int): slow_mo of the held slot, in milliseconds.
+        """
+        slot = slot_name(headless, slow_mo)
+        state = self.read_state(slot) or {}
+        interval = min(30.0, state.get("idle_timeout", 900) / 3)
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(interval):
+                # Not after the slot stopped: that would leave a stray heartbeat file
+                if self.state_path(slot).exists():
+                    self.touch(slot)
+
+        threading.Thread(target=beat, name=f"heartbeat-{slot}", daemon=True).start()
+        return stop
+
+    def endpoint(self, headless: bool = True, slow_mo: int = 0):
+        """
+        Return the websocket endpoint of a healthy slot, or None.
+
+        Args:
+            headless (bool): Whether the wanted browser runs headless.
+            slow_mo (int): slow_mo of the wanted slot, in milliseconds.
+        """
+        slot = slot_name(headless, slow_mo)
+        state = self.read_state(slot)
+        if state is None or not self.is_healthy(state):
+            return None
+        self.touch(slot)
+        return state["ws_endpoint"]
+
+    def start(self, headless: bool = True, slow_mo: int = 0, idle_timeout: float = 900, wait: bool = True):
+        """
+        Start a slot in a detached background process.
+
+        Args:
+            headless (bool): Whether the browser runs headless.
+            slow_mo (int): slow_mo of the slot, in milliseconds.
+            idle_timeout (float): Seconds without clients after which the slot shuts down.
+            wait (bool): Wait until the slot is healthy before returning.
+
+        Returns the slot's websocket endpoint when `wait` is set, otherwise None.
+        """
+        endpoint = self.endpoint(headless, slow_mo)
+        if endpoint:
+            return endpoint
+        starting = self.state_dir / f"{slot_name(headless, slow_mo)}.starting"
+        try:
+            # Another process (e.g. a parallel worker) is already starting this slot
+            spawn = time.time() - starting.stat().st_mtime > 30
+        except FileNotFoundError:
+            spawn = True
+        if spawn:
+            starting.touch()
+            self._spawn(headless, slow_mo, idle_timeout)
+        if not wait:
+            return None
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            endpoint = self.endpoint(headless, slow_mo)
+            if endpoint:
+                return endpoint
+            time.sleep(0.1)
+        raise TimeoutError(f"browser daemon slot {slot_name(headless, slow_mo)} did not become healthy")
+
+    def _spawn(self, headless: bool, slow_mo: int, idle_timeout: float):
+        """Start `serve` for a slot in a detached process."""
+        cmd = [
+            sys.executable, "-m", "utils.browser_daemon", "serve",
+            "--slow-mo", str(slow_mo), "--idle-timeout", str(idle_timeout), "--state-dir", str(self.state_dir),
+        ]
+        if not headless:
+            cmd.append("--headed")
+        subprocess.Popen(
+            cmd, cwd=str(Path(__file__).resolve().parent.parent), start_new_session=True,
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    def stop(self, slot: str):
+        """
+        Stop a slot and remove its state and heartbeat files.
+
+        Returns True if a running daemon was signalled, False if the slot was missing or already dead.
+        """
+        state = self.read_state(slot)
+        stopped = False
+        if state is not None:
+            try:
+                os.kill(state["daemon_pid"], signal.SIGTERM)
+                stopped = True
+            except ProcessLookupError:
+                pass
+        # The daemon removes them itself on SIGTERM; a dead or unreadable slot leaves them behind
+        self.state_path(slot).unlink(missing_ok=True)
+        self.heartbeat_path(slot).unlink(missing_ok=True)
+        return stopped
+
+    def slots(self):
+        """Return the names of all slots with a state file."""
+        return sorted(path.stem for path in self.state_dir.glob("*.json"))
+
+
+def chromium_executable():
+    """Return the path of Playwright's Chromium build."""
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as playwright_instance:
+        return playwright_instance.chromium.executable_path
+
+
+def serve(headless: bool, slow_mo: int, idle_timeout: float, state_dir):
+    """
+    Run one slot in the foreground until it is idle for `idle_timeout` seconds.
+
+    - Starts Chromium with a remote debugging port on a throwaway profile.
+    - Publishes the endpoints in the slot's state file.
+    - Exits when idle, when the browser dies or on SIGTERM, removing the state file.
+    """
+    daemon = BrowserDaemon(state_dir)
+    daemon.state_dir.mkdir(parents=True, exist_ok=True)
+    slot = slot_name(headless, slow_mo)
+    profile_dir = tempfile.mkdtemp(prefix=f"{slot}-")
+    args = [
+        chromium_executable(), "--remote-debugging-port=0", f"--user-data-dir={profile_dir}",
+        "--no-first-run", "--no-default-browser-check", "about:blank",
+    ]
+    if headless:
+        args.insert(1, "--headless=new")
+    browser = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+    ws_endpoint = None
+    for line in browser.stderr:
+        match = DEVTOOLS_LINE.search(line)
+        if match:
+            ws_endpoint = match.group(1)
+            break
+    if ws_endpoint is None:
+        browser.kill()
+        raise RuntimeError("Chromium did not report a DevTools endpoint")
+    # Keep draining stderr so the browser never blocks on a full pipe
+    threading.Thread(target=lambda: [None for _ in browser.stderr], daemon=True).start()
+
+    def shutdown(*_):
+        browser.terminate()
+        try:
+            browser.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            browser.kill()
+        daemon.state_path(slot).unlink(missing_ok=True)
+        daemon.heartbeat_path(slot).unlink(missing_ok=True)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    port = ws_endpoint.split(":")[2].split("/")[0]
+    state = {
+        "slot": slot,
+        "daemon_pid": os.getpid(),
+        "browser_pid": browser.pid,
+        "ws_endpoint": ws_endpoint,
+        "http_endpoint": f"http://127.0.0.1:{port}",
+        "started": time.time(),
+        "idle_timeout": idle_timeout,
+    }
+    tmp_path = daemon.state_path(slot).with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp_path, daemon.state_path(slot))
+    daemon.touch(slot)
+    (daemon.state_dir / f"{slot}.starting").unlink(missing_ok=True)
+
+    while True:
+        time.sleep(min(5.0, idle_timeout))
+        try:
+            idle = time.time() - daemon.heartbeat_path(slot).stat().st_mtime
+        except FileNotFoundError:
+            idle = idle_timeout
+        if browser.poll() is not None or idle >= idle_timeout:
+            shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep warm Chromium instances for pytest --daemon.")
+    parser.add_argument("command", choices=("start", "stop", "status", "serve"))
+    parser.add_argument("--headed", action="store_true", help="Slot with a headed browser")
+    parser.add_argument("--slow-mo", type=int, default=0, help="Slot for this slow_mo value (ms)")
+    parser.add_argument("--idle-timeout", type=float, default=900, help="Seconds without clients before shutdown")
+    parser.add_argument("--state-dir", default=None, help="Directory of the slot state files")
+    parser.add_argument("--all", action="store_true", help="With stop: stop every slot")
+    args = parser.parse_args(argv)
+
+    daemon = BrowserDaemon(args.state_dir)
+    slot = slot_name(not args.headed, args.slow_mo)
+    if args.command == "serve":
+        serve(not args.headed, args.slow_mo, args.idle_timeout, daemon.state_dir)
+    elif args.command == "start":
+        print(daemon.start(not args.headed, args.slow_mo, args.idle_timeout))
+    elif args.command == "stop":
+        for name in (daemon.slots() if args.all else [slot]):
+            print(f"{name}: {'stopped' if daemon.stop(name) else 'not running'}")
+    else:
+        for name in daemon.slots():
+            state = daemon.read_state(name)
+            health = "healthy" if state and daemon.is_healthy(state) else "unhealthy"
+            print(f"{name}: {health} {state['ws_endpoint'] if state else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+class BrowserPool:
+    """
+    Keeps the browsers launched by one pytest process, one per launch configuration.
+
+    Every pytest process (the plain serial run or each `--workers` shard) owns
+    exactly one pool, so parallel workers never share a browser.
+
+    With a BrowserDaemon, Chromium is taken from the daemon's warm slot over CDP
+    when one is healthy; otherwise it is launched as usual and a slot is started
+    in the background for the next run.
+
+    Attributes:
+        playwright (playwright.sync_api.Playwright): The running Playwright instance.
+        browsers (dict): Launched browsers keyed by (engine, headless, slow_mo).
+        daemon (BrowserDaemon): Optional daemon to connect to instead of launching.
+        heartbeats (dict): Stop events of the daemon heartbeats of the connected slots, keyed like `browsers`.
+    """
+
+    def __init__(self, playwright_instance, daemon=None):
+        """
+        Initializes an empty pool on top of a started Playwright instance.
+
+        Args:
+            playwright_instance (playwright.sync_api.Playwright): The running Playwright instance.
+            daemon (BrowserDaemon): Optional daemon to connect to instead of launching.
+        """
+        self.playwright = playwright_instance
+        self.browsers = {}
+        self.daemon = daemon
+        self.heartbeats = {}
+
+    def acquire(self, engine: str = "chromium", headless: bool = True, slow_mo: int = 0):
+        """
+        Returns the browser for the given configuration, launching it on first use.
+
+        Args:
+            engine (str): Browser engine name, one of chromium, firefox or webkit.
+            headless (bool): Whether the browser runs headless.
+            slow_mo (int): Delay between browser actions in milliseconds.
+        """
+        key = (engine, headless, slow_mo)
+        browser = self.browsers.get(key)
+        if browser is None or not browser.is_connected():
+            browser_type = getattr(self.playwright, engine)
+            browser = None
+            if self.daemon is not None and engine == "chromium":
+                browser = self._connect_daemon(headless, slow_mo)
+            if browser is None:
+                browser = browser_type.launch(headless=headless, slow_mo=slow_mo)
+            self.browsers[key] = browser
+        return browser
+
+    def _connect_daemon(self, headless: bool, slow_mo: int):
+        """Connect to the daemon's warm slot, or start one for next time and return None."""
+        endpoint = self.daemon.endpoint(headless, slow_mo)
+        if endpoint is None:
+            self.daemon.start(headless, slow_mo, wait=False)
+            return None
+        try:
+            browser = self.playwright.chromium.connect_over_cdp(endpoint, slow_mo=slow_mo)
+        except Exception:
+            return None
+        # The slot must not go idle while this run holds its browser
+        previous = self.heartbeats.pop(("chromium", headless, slow_mo), None)
+        if previous is not None:
+            previous.set()
+        self.heartbeats[("chromium", headless, slow_mo)] = self.daemon.keep_alive(headless, slow_mo)
+        return browser
+
+    def recycle(self):
+        """
+        Closes every browser so the next `acquire` starts a fresh one.
+
+        Daemon slots are stopped too, since closing a connected browser only disconnects from it.
+        """
+        if self.daemon is not None:
+            from utils.browser_daemon import slot_name
+
+            for engine, headless, slow_mo in self.browsers:
+                if engine == "chromium":
+                    self.daemon.stop(slot_name(headless, slow_mo))
+        self.close_all()
+
+    def close_all(self):
+        """
+        Closes every browser launched by the pool and stops the daemon heartbeats.
+        """
+        for heartbeat in self.heartbeats.values():
+            heartbeat.set()
+        self.heartbeats.clear()
+        for browser in self.browsers.values():
+            if browser.is_connected():
+                browser.close()
+        self.browsers.clear()
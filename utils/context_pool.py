@@ -0,0 +1,237 @@
+import json
+import time
+from urllib.parse import urlsplit
+
+
+# Path the reset navigates to on every origin with state; it is fulfilled locally, never sent
+RESET_PATH = "/__context_pool_reset__"
+
+# Engine of a context created without one (PageFactory's default browser)
+DEFAULT_ENGINE = "chromium"
+
+# Empties the storage of the current origin: localStorage, IndexedDB, Cache Storage and service workers
+CLEAR_ORIGIN_JS = """async () => {
+    localStorage.clear();
+    if (self.caches) {
+        await Promise.all((await caches.keys()).map(name => caches.delete(name)));
+    }
+    if (indexedDB.databases) {
+        await Promise.all((await indexedDB.databases()).map(db => new Promise(resolve => {
+            const request = indexedDB.deleteDatabase(db.name);
+            request.onsuccess = request.onerror = request.onblocked = resolve;
+        })));
+    }
+    if (navigator.serviceWorker) {
+        await Promise.all((await navigator.serviceWorker.getRegistrations()).map(registration => registration.unregister()));
+    }
+}"""
+
+
+def _origin(url: str):
+    """The origin of an http(s) URL, None for about:blank, data: and the like."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}" if parts.scheme in ("http", "https") else None
+
+
+class ContextResetError(Exception):
+    """A released context still had state after its reset."""
+
+
+class ContextPool:
+    """
+    Reuses browser contexts across test modules instead of creating one per module.
+
+    - Contexts are pooled per set of `new_context` options (storage_state excepted,
+      it is applied to a reused context as cookies and localStorage); no engine and
+      the default engine share a key.
+    - On release a context is reset: its pages are closed, cookies, permissions and
+      routes cleared, geolocation and extra HTTP headers set back to the context's
+      options, and localStorage, IndexedDB, Cache Storage and service workers removed on every origin
+      its pages visited or that holds storage (each origin is visited on a locally
+      fulfilled blank URL). sessionStorage dies with the pages.
+    - The reset is verified (no cookies, localStorage or IndexedDB left); a context that fails
+      verification or reached `max_uses` is closed and replaced by a new one.
+    - Not reset: OPFS, and state set through CDP sessions or `add_init_script`;
+      contexts using them must not be pooled.
+    - The factory's reset hooks (route layers) are re-installed after the reset; its pool
+      hooks run as a context goes idle (prewarmed or released) and as it is handed out again.
+
+    Attributes:
+        factory (PageFactory): Creates the contexts on a miss.
+        size (int): Contexts kept idle per option set.
+        max_uses (int): Uses after which a context is closed instead of reused.
+        idle (dict): Option key -> idle contexts.
+        stats (dict): created, hits, recycled, reset_failures, create_ms and reset_ms.
+    """
+
+    def __init__(self, factory, size: int = 2, max_uses: int = 20):
+        """
+        Initializes the pool.
+
+        Args:
+            factory (PageFactory): Creates the contexts on a miss.
+            size (int): Contexts kept idle per option set.
+            max_uses (int): Uses after which a context is closed instead of reused.
+        """
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.idle = {}
+        self.stats = {"created": 0, "hits": 0, "recycled": 0, "reset_failures": 0, "create_ms": 0.0, "reset_ms": 0.0}
+        self._keys = {}
+        self._options = {}
+        self._uses = {}
+
+    @staticmethod
+    def key(options):
+        """Return the pool key of a set of `new_context` options, the default engine counting as none."""
+        options = {name: value for name, value in options.items() if name != "storage_state"}
+        if options.get("engine") in (None, DEFAULT_ENGINE):
+            options.pop("engine", None)
+        return json.dumps(options, sort_keys=True, default=str)
+
+    def prewarm(self, count: int = None, **options):
+        """Create `count` (default: `size`) idle contexts with the given options ahead of use."""
+        key = self.key(options)
+        idle = self.idle.setdefault(key, [])
+        while len(idle) < (self.size if count is None else count):
+            context = self._create(key, options)
+            for hook in self.factory.release_hooks:
+                hook(context)
+            idle.append(context)
+
+    def _create(self, key, options):
+        started = time.perf_counter()
+        context = self.factory.create_context(**options)
+        self.stats["create_ms"] += (time.perf_counter() - started) * 1000
+        self.stats["created"] += 1
+        self._keys[context] = key
+        self._options[context] = options
+        self._uses[context] = 0
+        return context
+
+    def acquire(self, **options):
+        """
+        Return a clean context for the options, reusing an idle one when possible.
+
+        Args:
+            **options: `new_context` options, e.g. storage_state.
+        """
+        key = self.key(options)
+        idle = self.idle.get(key)
+        if idle:
+            context = idle.pop()
+            self.stats["hits"] += 1
+            if options.get("storage_state"):
+                self._apply_storage_state(context, options["storage_state"])
+            for hook in self.factory.acquire_hooks:
+                hook(context)
+        else:
+            context = self._create(key, options)
+        self._uses[context] += 1
+        return context
+
+    def release(self, context):
+        """
+        Reset a context and keep it idle, or close it when it is worn out, surplus or fails the reset.
+
+        Raises:
+            ValueError: The context was not created by this pool.
+        """
+        key = self._keys.get(context)
+        if key is None:
+            raise ValueError("context was not handed out by this pool")
+        for hook in self.factory.release_hooks:
+            hook(context)
+        idle = self.idle.setdefault(key, [])
+        if self._uses[context] >= self.max_uses or len(idle) >= self.size:
+            self._discard(context)
+            return
+        started = time.perf_counter()
+        try:
+            self.reset(context)
+        except Exception:
+            self.stats["reset_failures"] += 1
+            self._discard(context)
+            return
+        finally:
+            self.stats["reset_ms"] += (time.perf_counter() - started) * 1000
+        idle.append(context)
+
+    def _discard(self, context):
+        self._keys.pop(context, None)
+        self._options.pop(context, None)
+        if self._uses.pop(context, 0) >= self.max_uses:
+            self.stats["recycled"] += 1
+        context.close()
+
+    def reset(self, context):
+        """Clear the context's pages, cookies, permissions, routes, headers and storage, then verify it is clean."""
+        options = self._options.get(context, {})
+        # Service workers and IndexedDB need not show in the storage state: visit the pages' origins too
+        origins = {_origin(page.url) for page in context.pages} - {None}
+        for page in context.pages:
+            page.close()
+        context.clear_cookies()
+        context.clear_permissions()
+        context.set_geolocation(options.get("geolocation"))
+        context.set_extra_http_headers(options.get("extra_http_headers") or {})
+        context.unroute_all(behavior="ignoreErrors")
+        origins |= {origin["origin"] for origin in context.storage_state(indexed_db=True)["origins"]}
+        if origins:
+            self._on_each_origin(context, sorted(origins), CLEAR_ORIGIN_JS)
+        context.unroute_all(behavior="ignoreErrors")
+
+        state = context.storage_state(indexed_db=True)
+        if state["cookies"] or state["origins"] or context.pages:
+            raise ContextResetError(f"context not clean after reset: {len(state['cookies'])} cookies, {len(state['origins'])} origins")
+        for hook in self.factory.reset_hooks:
+            hook(context)
+
+    def _on_each_origin(self, context, origins, script, arg=None):
+        """Run a script on a locally fulfilled blank page of every origin."""
+        context.route(f"**{RESET_PATH}", lambda route: route.fulfill(content_type="text/html", body="<html></html>"))
+        page = context.new_page()
+        try:
+            for origin in origins:
+                page.goto(f"{origin}{RESET_PATH}")
+                page.evaluate(script, arg)
+        finally:
+            page.close()
+            context.unroute(f"**{RESET_PATH}")
+
+    def _apply_storage_state(self, context, storage_state):
+        """Give a reused context the cookies and localStorage of a storage state (path or dict)."""
+        if not isinstance(storage_state, dict):
+            with open(storage_state, encoding="utf-8") as state_file:
+                storage_state = json.load(state_file)
+        if storage_state.get("cookies"):
+            context.add_cookies(storage_state["cookies"])
+        for origin in storage_state.get("origins", []):
+            items = {item["name"]: item["value"] for item in origin.get("localStorage", [])}
+            self._on_each_origin(
+                context, [origin["origin"]],
+                "items => { for (const [name, value] of Object.entries(items)) localStorage.setItem(name, value); }",
+                items,
+            )
+
+    def close(self):
+        """Close every idle context."""
+        for idle in self.idle.values():
+            for context in idle:
+                context.close()
+                self._keys.pop(context, None)
+                self._options.pop(context, None)
+        self.idle.clear()
+
+    def summary(self):
+        """One line of this run's pool size, hit rate and time saved."""
+        acquired = self.stats["hits"] + self.stats["created"]
+        hit_rate = self.stats["hits"] / acquired if acquired else 0.0
+        mean_create_ms = self.stats["create_ms"] / self.stats["created"] if self.stats["created"] else 0.0
+        saved_ms = self.stats["hits"] * mean_create_ms - self.stats["reset_ms"]
+        return (
+            f"context pool: size {self.size}, {self.stats['created']} created, {self.stats['hits']} reused "
+            f"({hit_rate:.0%} hit rate), {self.stats['recycled']} recycled, {self.stats['reset_failures']} failed resets, "
+            f"~{saved_ms / 1000:.2f}s saved"
+        )
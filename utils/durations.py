@@ -0,0 +1,131 @@
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+from utils.filelock import file_lock
+from utils.parallel import chain_key
+
+
+SCHEDULES = ("none", "longest-first", "failed-first")
+
+# Weight of the newest run in the moving average of a duration
+EWMA_ALPHA = 0.3
+
+
+def module_of(nodeid: str):
+    """Return the module (file) part of a node ID."""
+    return nodeid.split("::")[0]
+
+
+class DurationsDB:
+    """
+    Per-test and per-module durations and outcomes across runs, in one JSON file.
+
+    - `record` collects this run's setup + call + teardown time and outcome per test.
+    - `save` merges them into the file under a lock (parallel workers save concurrently),
+      keeping an exponentially weighted moving average per test and per module.
+    - `estimate` / `order` / `weight` turn the history into a schedule: module chains are
+      never split or reordered inside, only the chains are reordered.
+
+    Attributes:
+        path (Path): The JSON file.
+        tests (dict): Node ID -> {"ewma", "last", "runs", "last_outcome", "last_failed"}.
+        modules (dict): Module -> {"ewma", "last", "runs"}.
+        current (dict): This run's node ID -> {"duration", "outcome"}.
+    """
+
+    def __init__(self, path):
+        """
+        Loads the history, if any.
+
+        Args:
+            path (str | Path): The JSON file.
+        """
+        self.path = Path(path)
+        self.tests, self.modules = self._read()
+        self.current = {}
+
+    def _read(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}, {}
+        return data.get("tests", {}), data.get("modules", {})
+
+    def record(self, nodeid: str, duration: float, failed: bool):
+        """Add one phase (setup, call or teardown) of a test of this run."""
+        entry = self.current.setdefault(nodeid, {"duration": 0.0, "outcome": "passed"})
+        entry["duration"] += duration
+        if failed:
+            entry["outcome"] = "failed"
+
+    @staticmethod
+    def _update(entry, duration: float):
+        entry["ewma"] = duration if "ewma" not in entry else EWMA_ALPHA * duration + (1 - EWMA_ALPHA) * entry["ewma"]
+        entry["last"] = duration
+        entry["runs"] = entry.get("runs", 0) + 1
+
+    def save(self):
+        """Merge this run into the file."""
+        if not self.current:
+            return
+        module_totals = {}
+        for nodeid, entry in self.current.items():
+            module = module_of(nodeid)
+            module_totals[module] = module_totals.get(module, 0.0) + entry["duration"]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.path.with_suffix(".lock")):
+            # Re-read under the lock: other workers may have saved since we loaded
+            tests, modules = self._read()
+            now = time.time()
+            for nodeid, entry in self.current.items():
+                test = tests.setdefault(nodeid, {})
+                self._update(test, entry["duration"])
+                test["last_outcome"] = entry["outcome"]
+                if entry["outcome"] == "failed":
+                    test["last_failed"] = now
+            for module, total in module_totals.items():
+                self._update(modules.setdefault(module, {}), total)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps({"tests": tests, "modules": modules}, indent=1, sort_keys=True), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        self.tests, self.modules = tests, modules
+        self.current = {}
+
+    def estimate(self, nodeids):
+        """Estimated seconds of a chain of tests; unknown tests count as the median known test."""
+        known = [entry["ewma"] for entry in self.tests.values() if "ewma" in entry]
+        default = statistics.median(known) if known else 1.0
+        return sum(self.tests.get(nodeid, {}).get("ewma", default) for nodeid in nodeids)
+
+    def weight(self, key, nodeids):
+        """Chain cost for `plan_shards`: the estimated duration."""
+        return self.estimate(nodeids)
+
+    def failed_last(self, nodeids):
+        """Whether any of the tests failed in its last run."""
+        return any(self.tests.get(nodeid, {}).get("last_outcome") == "failed" for nodeid in nodeids)
+
+    def order(self, items, schedule: str):
+        """
+        Return the items reordered by module chain, each chain kept intact and in order.
+
+        Args:
+            items (list): Collected pytest items.
+            schedule (str): longest-first, failed-first (then longest-first) or none.
+        """
+        if schedule == "none":
+            return list(items)
+        chains = {}
+        for item in items:
+            chains.setdefault(chain_key(item), []).append(item)
+
+        def priority(chain):
+            nodeids = [item.nodeid for item in chain]
+            failed_first = schedule == "failed-first" and self.failed_last(nodeids)
+            return (not failed_first, -self.estimate(nodeids))
+
+        # sorted() is stable: chains with equal priority keep their collection order
+        return [item for chain in sorted(chains.values(), key=priority) for item in chain]
@@ -0,0 +1,10 @@
+def expect(actual, message: str = None):
+    """
+    `playwright.sync_api.expect`, with Playwright imported on the first assertion.
+
+    Test modules import this one so that collecting them (`--co`, `-k` deselection)
+    does not load Playwright.
+    """
+    from playwright.sync_api import expect as playwright_expect
+
+    return playwright_expect(actual, message)
@@ -0,0 +1,41 @@
+import os
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(lock_path, timeout: float = 60.0, poll: float = 0.05):
+    """
+    Hold an exclusive lock file while the block runs, across processes.
+
+    Parallel workers use this to make sure only one of them does a piece of
+    shared work (e.g. a UI login) while the others wait and reuse the result.
+    A lock older than `timeout` seconds is treated as stale and broken.
+
+    Args:
+        lock_path (str | Path): Path of the lock file.
+        timeout (float): Seconds after which an existing lock is considered stale.
+        poll (float): Seconds to sleep between attempts.
+    """
+    lock_path = str(lock_path)
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > timeout:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(poll)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        yield
+    finally:
+        os.close(fd)
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
@@ -1,26 +1,79 @@
+from functools import lru_cache
 from pathlib import Path
 
+from utils.settings import ROOT_DIR
+
+
+@lru_cache(maxsize=None)
+def _ensure_dir(path: Path):
+    """Create a directory on its first request in this process; later requests cost nothing."""
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
 class FilePath:
+    """
+    Output directories of the suite (reports/, screenshots/, ...), directly under the project root.
+
+    Paths are anchored to the project root (the pytest rootdir), not the working directory,
+    and each directory is created the first time it is asked for, once per process.
+
+    Attributes:
+        base_dir (Path): The project root the output directories are created in.
+    """
+
+    def __init__(self, root_dir=ROOT_DIR):
+        """
+        Initializes the paths; no directory is created yet.
+
+        Args:
+            root_dir (str | Path): The project root.
+        """
+        self.base_dir = Path(root_dir).resolve()
+
+    def _dir(self, name: str):
+        return _ensure_dir(self.base_dir / name)
 
     def screenshot_path(self, file_name: str):
         """Get the full path for a screenshot file, cross-platform."""
-        current_dir = Path.cwd()
-        parent_dir = current_dir.parent
-        file_path = parent_dir / 'test_playwright' / 'screenshots' / file_name
-        return file_path
+        return self.base_dir / 'screenshots' / file_name
 
     def screenshot_dir_path(self):
         """Get the directory path for screenshots and create it if it doesn't exist."""
-        current_dir = Path.cwd()
-        parent_dir = current_dir.parent
-        screenshots_dir = parent_dir / 'test_playwright' / 'screenshots'
-        screenshots_dir.mkdir(parents=True, exist_ok=True)  # Create directory if it doesn't exist
-        return screenshots_dir
+        return self._dir('screenshots')
 
     def report_dir_path(self):
         """Get the directory path for reports and create it if it doesn't exist."""
-        current_dir = Path.cwd()
-        parent_dir = current_dir.parent
-        report_dir = parent_dir / 'test_playwright' / 'reports'
-        report_dir.mkdir(parents=True, exist_ok=True)  # Create directory if it doesn't exist
-        return report_dir
\ No newline at end of file
+        return self._dir('reports')
+
+    def session_dir_path(self):
+        """Get the directory path for cached login sessions and create it if it doesn't exist."""
+        return self._dir('sessions')
+
+    def network_dir_path(self):
+        """Get the directory path for recorded network responses and create it if it doesn't exist."""
+        return self._dir('network')
+
+    def asset_cache_dir_path(self):
+        """Get the directory path for cached static assets and create it if it doesn't exist."""
+        return self._dir('asset_cache')
+
+    def daemon_dir_path(self):
+        """Get the directory path for browser daemon state files and create it if it doesn't exist."""
+        return self._dir('daemon')
+
+    def trace_dir_path(self):
+        """Get the directory path for kept Playwright traces and create it if it doesn't exist."""
+        return self._dir('traces')
+
+    def baseline_dir_path(self):
+        """Get the directory path for visual regression baselines and create it if it doesn't exist."""
+        return self._dir('baselines')
+
+    def visual_diff_dir_path(self):
+        """Get the directory path for visual regression diff images and create it if it doesn't exist."""
+        return self._dir('visual_diffs')
+
+    def history_dir_path(self):
+        """Get the directory path for the test durations history and create it if it doesn't exist."""
+        return self._dir('history')
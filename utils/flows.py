@@ -0,0 +1,481 @@
+"""
+Declarative user journeys: flow files compiled into independent jobs run on a worker pool.
+
+A flow (YAML or JSON, under `flows/`) is a list of steps built on PageActions and the
+`elements/*` selectors; `parameters` expand it into one job per combination:
+
+    name: checkout ${product}
+    login_as: ${user}              # shared prefix: land + login, served from the SessionCache
+    parameters:
+      user: [STANDARD, PROBLEM]
+      product: [Sauce Labs Backpack, Sauce Labs Onesie]
+    steps:
+      - add_products: ["${product}"]
+      - open_cart
+      - expect_cart: ["${product}"]
+      - click: cartpage_elements.CHECKOUT_BUTTON
+
+Every job runs in its own browser context. With `login_as`, the "land + login as X" prefix
+is a context created from the user's cached storage state, logged in once for all workers;
+a flow that checks the login itself leaves `login_as` out and writes `goto` + `login` steps,
+which submit the form. Jobs are spread longest-first (by their durations in earlier runs)
+over worker processes with a browser each, so many variants take about as long as the longest:
+
+    $ python -m utils.flows list [flows/]
+    $ python -m utils.flows run [flows/] [--workers 8] [--local-site] [--filter "*checkout*"] [--json flows.json]
+"""
+
+import argparse
+import atexit
+import fnmatch
+import importlib
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urljoin
+
+from utils.settings import ROOT_DIR, settings
+
+
+FLOW_DIR = ROOT_DIR / "flows"
+FLOW_SUFFIXES = (".yaml", ".yml", ".json")
+
+# `product_elements.SHOPPING_CART_LOGO` refers to a selector of elements/product_elements.py
+_ELEMENT = re.compile(r"^(\w+_elements)\.([A-Z][A-Z0-9_]*)$")
+_PARAMETER = re.compile(r"\$\{(\w+)\}")
+
+# Page the login prefix lands on
+LOGGED_IN_PATH = "inventory.html"
+
+
+@dataclass
+class Job:
+    """
+    One compiled journey.
+
+    Attributes:
+        name (str): Unique job name, e.g. "checkout Sauce Labs Backpack [PROBLEM]".
+        site (str): Settings variable of the site's base URL, e.g. URL or PLAYWRIGHT_URL.
+        login_as (str): User type of the shared login prefix, None to start logged out.
+        start (str): Path opened after the login prefix, relative to the site.
+        steps (list): [(action, argument)] run in order.
+        source (str): The flow file.
+    """
+    name: str
+    site: str
+    login_as: str
+    start: str
+    steps: list = field(default_factory=list)
+    source: str = ""
+
+
+def _substitute(value, parameters, source: str):
+    """Replace ${name} in every string of a step argument."""
+    if isinstance(value, str):
+        def parameter(match):
+            if match.group(1) not in parameters:
+                raise ValueError(f"{source}: unknown parameter ${{{match.group(1)}}}, expected one of {sorted(parameters)}")
+            return str(parameters[match.group(1)])
+
+        return _PARAMETER.sub(parameter, value)
+    if isinstance(value, list):
+        return [_substitute(item, parameters, source) for item in value]
+    if isinstance(value, dict):
+        return {key: _substitute(item, parameters, source) for key, item in value.items()}
+    return value
+
+
+def _resolve_elements(value):
+    """Replace `<module>_elements.NAME` references with the selectors of elements/<module>.py."""
+    if isinstance(value, str):
+        match = _ELEMENT.match(value)
+        if match is None:
+            return value
+        module = importlib.import_module(f"elements.{match.group(1)}")
+        try:
+            return getattr(module, match.group(2))
+        except AttributeError:
+            raise ValueError(f"unknown element {value}") from None
+    if isinstance(value, list):
+        return [_resolve_elements(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _resolve_elements(item) for key, item in value.items()}
+    return value
+
+
+def _normalize(step, source: str):
+    """Return (action, argument) of a step written as `action` or `{action: argument}`."""
+    if isinstance(step, str):
+        action, argument = step, None
+    elif isinstance(step, dict) and len(step) == 1:
+        (action, argument), = step.items()
+    else:
+        raise ValueError(f"{source}: a step is an action name or a single-key mapping, got {step!r}")
+    if action not in STEPS:
+        raise ValueError(f"{source}: unknown step {action!r}, expected one of {sorted(STEPS)}")
+    return action, argument
+
+
+def compile_flow(flow, source: str = "<flow>"):
+    """Compile one flow into its jobs, one per combination of its parameters."""
+    names = list(flow.get("parameters", {}))
+    combinations = list(itertools.product(*(flow["parameters"][name] for name in names))) or [()]
+    jobs = []
+    for values in combinations:
+        parameters = dict(zip(names, values))
+        steps = [_normalize(step, source) for step in _substitute(flow["steps"], parameters, source)]
+        login_as = _substitute(flow.get("login_as"), parameters, source)
+        start = _substitute(flow.get("start", LOGGED_IN_PATH), parameters, source)
+        name = _substitute(flow["name"], parameters, source)
+        if len(combinations) > 1 and name == flow["name"]:
+            name = f"{name} [{'-'.join(str(value) for value in values)}]"
+        jobs.append(Job(
+            name=name,
+            site=flow.get("site", "URL"),
+            login_as=login_as,
+            start=start,
+            steps=[(action, _resolve_elements(argument)) for action, argument in steps],
+            source=source,
+        ))
+    return jobs
+
+
+def load_flows(path):
+    """Read a flow file: one flow or a list of flows, in JSON or (with PyYAML) YAML."""
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".json":
+        data = json.loads(text)
+    else:
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError(f"{path}: YAML flows need PyYAML (pip install PyYAML), or write the flow as JSON") from None
+        data = yaml.safe_load(text)
+    return data if isinstance(data, list) else [data]
+
+
+def expand_paths(paths):
+    """Flow files of the given files and directories (all flow files of a directory, sorted)."""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(child for child in path.rglob("*") if child.suffix in FLOW_SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+def compile_paths(paths, pattern: str = "*"):
+    """Compile every flow of the given files and directories; keep the jobs whose name matches `pattern`."""
+    jobs = []
+    for path in expand_paths(paths):
+        for flow in load_flows(path):
+            jobs.extend(compile_flow(flow, str(path)))
+    duplicates = {job.name for job in jobs if sum(other.name == job.name for other in jobs) > 1}
+    if duplicates:
+        raise ValueError(f"duplicate job names {sorted(duplicates)}")
+    return [job for job in jobs if fnmatch.fnmatchcase(job.name, pattern)]
+
+
+class _JobRun:
+    """State of one job while its steps run: the page, its PageActions and the site URL."""
+
+    def __init__(self, page, url: str, job: Job):
+        from pages.pageactions import PageActions
+
+        self.page = page
+        self.actions = PageActions(page)
+        self.url = url
+        self.job = job
+        self.screenshots = []
+
+    def locator(self, target):
+        """A locator from a selector string or a {role, name} / {text} / {placeholder} mapping."""
+        if isinstance(target, str):
+            return self.page.locator(target)
+        if "role" in target:
+            return self.page.get_by_role(target["role"], name=target.get("name"))
+        if "text" in target:
+            return self.page.get_by_text(target["text"])
+        if "placeholder" in target:
+            return self.page.get_by_placeholder(target["placeholder"])
+        raise ValueError(f"cannot locate {target!r}")
+
+
+def _expect(actual):
+    from playwright.sync_api import expect
+
+    return expect(actual)
+
+
+def _goto(run, path):
+    run.page.goto(urljoin(run.url, path or ""))
+
+
+def _login(run, user):
+    if isinstance(user, dict):
+        run.actions.login(user["user"], user["passwd"])
+    else:
+        run.actions.login(settings.user(user), settings.passwd)
+
+
+def _add_products(run, products):
+    if isinstance(products, dict):
+        cards = run.actions.read_products()
+        products = [cards[index].name for index in products["indexes"]]
+    for product in run.actions.add_products(products):
+        assert product.in_cart, f"{product.name} not added to the cart"
+
+
+def _checkout(run, form):
+    header = run.actions.checkout(form["first_name"], form["last_name"], form["postal_code"])
+    if "expect" in form:
+        assert header == form["expect"], f"checkout ended with {header!r}"
+
+
+def _expect_cart(run, products):
+    import elements.cartpage_elements as cartpage
+
+    in_cart = run.page.locator(cartpage.CART_ITEM_NAMES).all_text_contents()
+    assert sorted(in_cart) == sorted(products), f"cart holds {in_cart}, expected {products}"
+
+
+def _screenshot(run, options):
+    from utils.filepath import FilePath
+
+    slug = re.sub(r"[^\w.-]+", "_", run.job.name)
+    path = FilePath().screenshot_dir_path() / "flows" / f"{slug}-{len(run.screenshots) + 1}.png"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    run.page.screenshot(path=path, full_page=bool((options or {}).get("full_page")))
+    run.screenshots.append(str(path))
+
+
+# Step name -> function(run, argument)
+STEPS = {
+    "goto": _goto,
+    "login": _login,
+    "logout": lambda run, _: run.actions.logout(),
+    "add_products": _add_products,
+    "open_cart": lambda run, _: run.actions.open_cart(),
+    "checkout": _checkout,
+    "click": lambda run, target: run.locator(target).click(),
+    "fill": lambda run, arg: run.locator(arg["target"]).fill(arg["value"]),
+    "type": lambda run, arg: run.locator(arg["target"]).press_sequentially(arg["text"], delay=arg.get("delay", 0)),
+    "press": lambda run, arg: run.locator(arg["target"]).press(arg["key"]),
+    "wait_for_url": lambda run, pattern: run.page.wait_for_url(pattern),
+    "expect_visible": lambda run, target: _expect(run.locator(target)).to_be_visible(),
+    "expect_text": lambda run, arg: _expect(run.locator(arg["target"])).to_have_text(arg["text"]),
+    "expect_cart": _expect_cart,
+    "screenshot": _screenshot,
+}
+
+
+# This worker process' browser, page factory and storage state cache
+_worker = {}
+
+
+def _init_worker(engine: str, headless: bool):
+    """Start Playwright and one browser in a pool process."""
+    from playwright.sync_api import sync_playwright
+    from utils.filepath import FilePath
+    from utils.page_factory import PageFactory
+    from utils.session_cache import SessionCache
+
+    playwright = sync_playwright().start()
+    browser = getattr(playwright, engine).launch(headless=headless)
+    atexit.register(_stop_worker)
+    _worker.update(
+        playwright=playwright,
+        browser=browser,
+        pages=PageFactory(lambda engine=None: browser),
+        session_cache=SessionCache(FilePath().session_dir_path()),
+    )
+
+
+def _stop_worker():
+    """Close the pool process' browser and stop its Playwright when the process exits."""
+    browser, playwright = _worker.pop("browser", None), _worker.pop("playwright", None)
+    try:
+        if browser is not None:
+            browser.close()
+    finally:
+        if playwright is not None:
+            playwright.stop()
+
+
+def job_key(job: Job):
+    """Key of a job in the durations history: `<flow file>::<job name>`, the file relative to the project."""
+    source = Path(job.source).resolve()
+    try:
+        source = source.relative_to(ROOT_DIR)
+    except ValueError:
+        pass
+    return f"{source.as_posix()}::{job.name}"
+
+
+def longest_first(jobs, durations=None):
+    """
+    Order jobs by their expected duration, longest first.
+
+    A job with a history in `durations` (a DurationsDB) is expected to take its moving average;
+    one without is estimated from its step count, at the mean seconds per step of the known jobs.
+    """
+    known = {}
+    if durations is not None:
+        for job in jobs:
+            entry = durations.tests.get(job_key(job), {})
+            if "ewma" in entry:
+                known[job.name] = entry["ewma"]
+    known_steps = sum(len(job.steps) for job in jobs if job.name in known)
+    per_step = sum(known.values()) / known_steps if known_steps else 1.0
+    return sorted(jobs, key=lambda job: known.get(job.name, len(job.steps) * per_step), reverse=True)
+
+
+def run_job(job: Job, urls: dict):
+    """
+    Run one job in a new context of the worker's browser.
+
+    Returns a result dict: name, passed, duration_s, failed_step, error, screenshots.
+    """
+    started = time.perf_counter()
+    pages, session_cache = _worker["pages"], _worker["session_cache"]
+    url = urls[job.site]
+    result = {"name": job.name, "source": job.source, "passed": False, "failed_step": None, "error": None, "screenshots": []}
+    context = None
+    action = "login prefix" if job.login_as else "setup"
+    try:
+        options = {}
+        if job.login_as:
+            # Logged in once per user for all workers, under the cache's lock
+            options["storage_state"] = session_cache.storage_state(pages, url, settings.user(job.login_as), settings.passwd)
+        context = pages.new_context(**options)
+        run = _JobRun(context.new_page(), url, job)
+        if job.login_as:
+            session_cache.open_authenticated(run.page, url, settings.user(job.login_as), settings.passwd, job.start)
+        for index, (name, argument) in enumerate(job.steps, start=1):
+            action = f"{index}: {name}"
+            STEPS[name](run, argument)
+        result["passed"] = True
+        result["screenshots"] = run.screenshots
+    except Exception as error:
+        result["failed_step"] = action
+        result["error"] = f"{type(error).__name__}: {error}".strip()[:2000]
+    finally:
+        if context is not None:
+            pages.release(context)
+    result["duration_s"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_jobs(jobs, urls: dict, workers: int, engine: str = "chromium", headless: bool = True, progress=None,
+             durations=None):
+    """
+    Run jobs on `workers` processes with a browser each, longest first.
+
+    Args:
+        jobs (list): Compiled jobs.
+        urls (dict): Settings variable -> base URL of every site the jobs use.
+        workers (int): Number of pool processes.
+        engine (str): chromium, firefox or webkit.
+        headless (bool): Whether the browsers run headless.
+        progress (callable): Optional function called with every result as it arrives.
+        durations (DurationsDB): History the jobs are ordered by; this run's durations are saved to it.
+
+    Returns the results in job order.
+    """
+    order = {job.name: index for index, job in enumerate(jobs)}
+    results = []
+    # Spawned, not forked: the pool processes each start their own Playwright
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(workers, len(jobs))), mp_context=context, initializer=_init_worker, initargs=(engine, headless)
+    ) as pool:
+        futures = {pool.submit(run_job, job, urls): job for job in longest_first(jobs, durations)}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if durations is not None:
+                durations.record(job_key(futures[future]), result["duration_s"], not result["passed"])
+            if progress is not None:
+                progress(result)
+    if durations is not None:
+        durations.save()
+    return sorted(results, key=lambda result: order[result["name"]])
+
+
+def _print_result(result):
+    status = "PASSED" if result["passed"] else f"FAILED at {result['failed_step']}"
+    print(f"{result['duration_s']:>7.2f} s  {status:<24} {result['name']}")
+    if result["error"]:
+        print(f"           {result['error'].splitlines()[0]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile declarative flows into jobs and run them on a worker pool.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in (("list", "Print the compiled jobs"), ("run", "Run the compiled jobs")):
+        command_parser = commands.add_parser(command, help=help_text)
+        command_parser.add_argument("paths", nargs="*", default=[str(FLOW_DIR)], help="Flow files or directories (default: flows/)")
+        command_parser.add_argument("--filter", default="*", help="Only jobs whose name matches this pattern")
+    run_parser = commands.choices["run"]
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Worker processes, one browser each")
+    run_parser.add_argument("--engine", default="chromium", choices=("chromium", "firefox", "webkit"))
+    run_parser.add_argument("--headed", action="store_true", help="Run the browsers headed")
+    run_parser.add_argument("--local-site", action="store_true", help="Run against the bundled local stand-in site")
+    run_parser.add_argument("--json", default=None, help="Also write the results as JSON to this file")
+    run_parser.add_argument(
+        "--history", default=None, help="Job durations history the jobs are ordered by (default: history/flows.json of the project)"
+    )
+    args = parser.parse_args(argv)
+
+    jobs = compile_paths(args.paths, args.filter)
+    if args.command == "list":
+        for job in jobs:
+            prefix = f"login as {job.login_as}, " if job.login_as else ""
+            print(f"{job.name}  ({prefix}{len(job.steps)} steps, {job.source})")
+        print(f"{len(jobs)} jobs")
+        return 0
+    if not jobs:
+        print("no jobs")
+        return 0
+
+    from utils.durations import DurationsDB
+    if args.history is None:
+        from utils.filepath import FilePath
+        args.history = FilePath().history_dir_path() / "flows.json"
+
+    site = None
+    if args.local_site:
+        from utils.local_site import LocalSite
+        site = LocalSite().start()
+        urls = {"URL": site.url, "PLAYWRIGHT_URL": site.playwright_url}
+    else:
+        urls = {job.site: settings.get(job.site) for job in jobs}
+    started = time.perf_counter()
+    try:
+        results = run_jobs(
+            jobs, urls, args.workers, args.engine, not args.headed, progress=_print_result, durations=DurationsDB(args.history)
+        )
+    finally:
+        if site is not None:
+            site.stop()
+    elapsed = time.perf_counter() - started
+    failed = [result for result in results if not result["passed"]]
+    longest = max(result["duration_s"] for result in results)
+    print(f"{len(results) - len(failed)} passed, {len(failed)} failed in {elapsed:.1f} s (longest job {longest:.1f} s)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump({"elapsed_s": elapsed, "results": results}, output, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Concurrent virtual-user load runner for the saucedemo flows.
+
+Drives N virtual users through land -> login -> add to cart -> checkout -> logout
+with AsyncPageActions, using one browser context per user spread over a small
+number of browsers, and reports throughput and p50/p95/p99 latency per action.
+
+By default it runs against the bundled local stand-in site:
+
+    $ python -m utils.loadrunner --users 50 --browsers 2 --ramp-up 10 --iterations 3
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from playwright.async_api import async_playwright
+
+from pages.async_pageactions import AsyncPageActions
+from utils.local_site import LocalSite
+from utils.percentiles import nearest_rank
+from utils.settings import settings
+
+
+ACTIONS = ("land", "login", "add_to_cart", "checkout", "logout")
+
+
+class LatencyStats:
+    """
+    Collects per-action latencies and errors of a load run.
+
+    Attributes:
+        samples (dict): Action name -> list of latencies in milliseconds.
+        errors (dict): Action name -> number of failed attempts.
+    """
+
+    def __init__(self):
+        self.samples = {action: [] for action in ACTIONS}
+        self.errors = {action: 0 for action in ACTIONS}
+        self.started = None
+        self.finished = None
+
+    async def timed(self, action: str, awaitable):
+        """Await an action and record its latency; failures are counted and re-raised."""
+        started = time.perf_counter()
+        try:
+            result = await awaitable
+        except Exception:
+            self.errors[action] += 1
+            raise
+        self.samples[action].append((time.perf_counter() - started) * 1000)
+        return result
+
+    def summary(self):
+        """Return per-action count, errors, throughput and p50/p95/p99 latency."""
+        elapsed = max((self.finished or time.perf_counter()) - self.started, 1e-9)
+        rows = {}
+        for action in ACTIONS:
+            values = sorted(self.samples[action])
+            rows[action] = {
+                "count": len(values),
+                "errors": self.errors[action],
+                "throughput_per_s": len(values) / elapsed,
+                "p50_ms": nearest_rank(values, 0.50),
+                "p95_ms": nearest_rank(values, 0.95),
+                "p99_ms": nearest_rank(values, 0.99),
+            }
+        return {"elapsed_s": elapsed, "actions": rows}
+
+
+def format_table(summary):
+    """Render a summary as a plain-text table."""
+    lines = [f"{'action':<12}{'count':>8}{'errors':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+    for action, row in summary["actions"].items():
+        lines.append(
+            f"{action:<12}{row['count']:>8}{row['errors']:>8}{row['throughput_per_s']:>10.2f}"
+            f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+        )
+    lines.append(f"elapsed: {summary['elapsed_s']:.1f} s")
+    return "\n".join(lines)
+
+
+async def virtual_user(browser, stats, args, start_delay: float):
+    """Run one virtual user's iterations in its own browser context."""
+    await asyncio.sleep(start_delay)
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
+        actions = AsyncPageActions(page)
+        for _ in range(args.iterations):
+            try:
+                await stats.timed("land", page.goto(args.url))
+                await stats.timed("login", _login(page, actions, args.user, args.password))
+                products = await actions.read_products()
+                await stats.timed("add_to_cart", actions.add_products([product.name for product in products[:args.products]]))
+                await stats.timed("checkout", _checkout(actions))
+                await stats.timed("logout", actions.logout())
+            except Exception as error:
+                print(f"virtual user iteration failed: {error}", file=sys.stderr)
+    finally:
+        await context.close()
+
+
+async def _login(page, actions, user_name, passwd):
+    await actions.login(user_name, passwd)
+    await page.wait_for_url("**/inventory.html")
+
+
+async def _checkout(actions):
+    await actions.open_cart()
+    return await actions.checkout("Load", "Runner", "12345")
+
+
+async def run(args):
+    """Launch the browsers, ramp the virtual users up and wait for all of them."""
+    stats = LatencyStats()
+    async with async_playwright() as playwright_instance:
+        browser_type = getattr(playwright_instance, args.engine)
+        browsers = [await browser_type.launch(headless=not args.headed) for _ in range(args.browsers)]
+        stats.started = time.perf_counter()
+        step = args.ramp_up / args.users if args.users else 0
+        await asyncio.gather(*(
+            virtual_user(browsers[index % len(browsers)], stats, args, index * step)
+            for index in range(args.users)
+        ))
+        stats.finished = time.perf_counter()
+        for browser in browsers:
+            await browser.close()
+    return stats.summary()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Drive N concurrent virtual users through the saucedemo flows.")
+    parser.add_argument("--users", type=int, default=10, help="Number of concurrent virtual users")
+    parser.add_argument("--browsers", type=int, default=2, help="Number of browsers the users' contexts are spread over")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which the users are started")
+    parser.add_argument("--iterations", type=int, default=1, help="Flows each virtual user runs")
+    parser.add_argument("--products", type=int, default=3, help="Products each user adds to the cart")
+    parser.add_argument("--engine", default="chromium", choices=("chromium", "firefox", "webkit"))
+    parser.add_argument("--url", default=None, help="Site under test (default: the bundled local stand-in)")
+    parser.add_argument("--user", default=settings.user("STANDARD") or "standard_user")
+    parser.add_argument("--password", default=settings.passwd or "secret_sauce")
+    parser.add_argument("--headed", action="store_true", help="Run the browsers headed")
+    parser.add_argument("--json", default=None, help="Also write the summary as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    site = None
+    if args.url is None:
+        site = LocalSite().start()
+        args.url = site.url
+    try:
+        summary = asyncio.run(run(args))
+    finally:
+        if site is not None:
+            site.stop()
+    print(format_table(summary))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(summary, output, indent=2)
+    failed = sum(row["errors"] for row in summary["actions"].values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
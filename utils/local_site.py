@@ -0,0 +1,74 @@
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+SITE_DIR = Path(__file__).resolve().parent.parent / "local_site"
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler that does not log every request to stderr."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalSite:
+    """
+    Local HTTP stand-in for https://www.saucedemo.com/ and https://playwright.dev/python/.
+
+    Serves the bundled `local_site/` pages on an ephemeral port of 127.0.0.1 so
+    suites can run without network round-trips (and on air-gapped runners).
+
+    Attributes:
+        site_dir (Path): Directory the pages are served from.
+        server (ThreadingHTTPServer): The running server, None until started.
+    """
+
+    def __init__(self, site_dir=SITE_DIR, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initializes the stand-in site.
+
+        Args:
+            site_dir (str | Path): Directory the pages are served from.
+            host (str): Interface to bind to.
+            port (int): Port to bind to, 0 picks a free one.
+        """
+        self.site_dir = Path(site_dir)
+        self.host = host
+        self.port = port
+        self.server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL of the saucedemo stand-in (replaces URL from .env)."""
+        return f"http://{self.host}:{self.server.server_address[1]}/"
+
+    @property
+    def playwright_url(self):
+        """URL of the playwright.dev/python stand-in (replaces PLAYWRIGHT_URL from .env)."""
+        return f"{self.url}python/"
+
+    def start(self):
+        """Start serving in a daemon thread and return self."""
+        handler = partial(_QuietHandler, directory=str(self.site_dir))
+        self.server = ThreadingHTTPServer((self.host, self.port), handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="local-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port."""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,99 @@
+"""
+User type x browser engine matrix for `pytest --matrix`.
+
+Test modules opt in by using the module-scoped `matrix_cell` fixture and name their
+default user type with `pytestmark = pytest.mark.user_type("STANDARD")`. With
+`--matrix` every such module runs once per cell, each cell in its own context of its
+own engine; the cells are separate chains, so `--workers` runs them at the same time.
+"""
+
+import html
+from dataclasses import dataclass
+
+from utils.settings import settings
+
+
+# User types read from .env as <TYPE>_USER; LOCKED is left out by default since it cannot log in
+USER_TYPES = ("STANDARD", "VISUAL", "PROBLEM")
+ENGINES = ("chromium", "firefox", "webkit")
+
+
+@dataclass(frozen=True)
+class MatrixCell:
+    """
+    One user type on one browser engine.
+
+    Attributes:
+        user_type (str): e.g. "VISUAL", read from the `VISUAL_USER` environment variable.
+        engine (str): chromium, firefox or webkit.
+    """
+    user_type: str
+    engine: str = "chromium"
+
+    @property
+    def id(self):
+        """Test ID suffix of the cell, e.g. "visual-firefox"."""
+        return f"{self.user_type.lower()}-{self.engine}"
+
+    @property
+    def user(self):
+        """User name of the cell's user type."""
+        return settings.user(self.user_type)
+
+    @property
+    def passwd(self):
+        """Password shared by the site's users."""
+        return settings.passwd
+
+
+def parse_list(value: str, allowed):
+    """Split a comma-separated option value and check every entry is allowed."""
+    entries = [entry.strip() for entry in value.split(",") if entry.strip()]
+    unknown = [entry for entry in entries if entry not in allowed]
+    if unknown:
+        raise ValueError(f"unknown matrix entries {unknown}, expected some of {list(allowed)}")
+    return entries
+
+
+def build_cells(user_types, engines):
+    """Return every user type x engine combination."""
+    return [MatrixCell(user_type, engine) for user_type in user_types for engine in engines]
+
+
+def cell_of(nodeid: str, cells):
+    """Return the cell a test ID was parametrized with, or None."""
+    if not nodeid.endswith("]"):
+        return None
+    params = nodeid.rsplit("[", 1)[1][:-1]
+    for cell in cells:
+        if params == cell.id or params.startswith(f"{cell.id}-") or params.endswith(f"-{cell.id}"):
+            return cell
+    return None
+
+
+def grid_html(cells, outcomes):
+    """
+    Render the user x engine grid of pass / fail counts.
+
+    Args:
+        cells (list): The matrix cells.
+        outcomes (dict): Node ID -> outcome ("passed", "failed", ...).
+    """
+    counts = {}
+    for nodeid, outcome in outcomes.items():
+        cell = cell_of(nodeid, cells)
+        if cell is not None:
+            passed, failed = counts.get(cell, (0, 0))
+            counts[cell] = (passed + (outcome == "passed"), failed + (outcome in ("failed", "error")))
+    user_types = list(dict.fromkeys(cell.user_type for cell in cells))
+    engines = list(dict.fromkeys(cell.engine for cell in cells))
+    rows = ""
+    for user_type in user_types:
+        row = ""
+        for engine in engines:
+            passed, failed = counts.get(MatrixCell(user_type, engine), (0, 0))
+            colour = "#f5c6cb" if failed else "#c3e6cb" if passed else "#eee"
+            row += f'<td style="background:{colour}">{passed} passed, {failed} failed</td>'
+        rows += f"<tr><th>{html.escape(user_type)}</th>{row}</tr>"
+    header = "".join(f"<th>{html.escape(engine)}</th>" for engine in engines)
+    return f'<div id="matrix-grid"><h3>User x engine matrix</h3><table><tr><th></th>{header}</tr>{rows}</table></div>'
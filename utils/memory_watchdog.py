@@ -0,0 +1,204 @@
+import html
+import json
+import os
+import time
+from pathlib import Path
+
+
+# Heap of every open page, in bytes; performance.memory is Chromium only
+JS_HEAP_JS = "() => performance.memory ? performance.memory.usedJSHeapSize : 0"
+
+
+def _proc_children():
+    """Return {ppid: [pid, ...]} of every process, read from /proc."""
+    children = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat", encoding="utf-8") as stat:
+                # The command name may contain spaces and parentheses; fields resume after the last ')'
+                ppid = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry.name))
+    return children
+
+
+def _proc_memory(pid: int):
+    """Proportional set size (shared pages split between processes) of a process in bytes, RSS if unavailable."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as smaps:
+            for line in smaps:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        with open(f"/proc/{pid}/statm", encoding="utf-8") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _is_driver(pid: int):
+    """Whether a process is the Playwright driver (node) rather than a browser process."""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as cmdline:
+            return b"run-driver" in cmdline.read()
+    except OSError:
+        return False
+
+
+def browser_memory(root_pid: int = None):
+    """
+    Return the memory of the browsers launched by this process in bytes, or None if it cannot be measured.
+
+    Sums every descendant process except the Playwright driver, from /proc on Linux
+    or with psutil elsewhere. Browsers of a daemon slot are not descendants and are not counted.
+    """
+    root_pid = root_pid or os.getpid()
+    if os.path.isdir("/proc/self"):
+        children = _proc_children()
+        total, stack = 0, list(children.get(root_pid, []))
+        while stack:
+            pid = stack.pop()
+            stack.extend(children.get(pid, []))
+            if not _is_driver(pid):
+                total += _proc_memory(pid)
+        return total
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return sum(
+        child.memory_info().rss for child in psutil.Process(root_pid).children(recursive=True)
+        if "run-driver" not in " ".join(child.cmdline())
+    )
+
+
+class MemoryWatchdog:
+    """
+    Samples browser memory between tests and recycles bloated browsers at module boundaries.
+
+    - After every test: the browsers' process memory (PSS of the process tree) and the
+      JS heap of every open page are sampled into a timeline.
+    - When a limit is crossed the browser is not touched mid-module; it is recycled after
+      the last test of the module, once its module fixtures have closed their pages:
+      the pooled contexts are closed, the browsers closed and relaunched on next use.
+
+    Attributes:
+        max_rss_mb (float): Browser process memory limit in MiB (0 = no limit).
+        max_heap_mb (float): Summed JS heap limit of the open pages in MiB (0 = no limit).
+        timeline (list): One sample per test: test, time, rss_mb, heap_mb, recycled.
+        recycles (int): Number of browser recycles.
+    """
+
+    def __init__(self, max_rss_mb: float = 1500, max_heap_mb: float = 500):
+        """
+        Initializes the watchdog.
+
+        Args:
+            max_rss_mb (float): Browser process memory limit in MiB (0 = no limit).
+            max_heap_mb (float): Summed JS heap limit of the open pages in MiB (0 = no limit).
+        """
+        self.max_rss_mb = max_rss_mb
+        self.max_heap_mb = max_heap_mb
+        self.timeline = []
+        self.recycles = 0
+        self.browser_pool = None
+        self.factory = None
+        self._over_limit = False
+        self._started = time.time()
+
+    def attach(self, browser_pool, factory):
+        """Watch the browsers of a BrowserPool and the contexts of a PageFactory."""
+        self.browser_pool = browser_pool
+        self.factory = factory
+
+    def js_heap(self):
+        """Summed used JS heap of every open page in bytes."""
+        total = 0
+        for browser in list(self.browser_pool.browsers.values()) if self.browser_pool else []:
+            if not browser.is_connected():
+                continue
+            for context in browser.contexts:
+                for page in context.pages:
+                    try:
+                        total += page.evaluate(JS_HEAP_JS) or 0
+                    except Exception:
+                        # Page navigating or closing: skip this sample
+                        pass
+        return total
+
+    def sample(self, nodeid: str, module_done: bool):
+        """
+        Record one sample after a test; recycle the browsers if a limit was crossed and the module is done.
+
+        Args:
+            nodeid (str): The test that just finished.
+            module_done (bool): Whether this was the last test of its module (or of its --matrix cell in it).
+
+        Returns the sample.
+        """
+        rss = browser_memory()
+        rss_mb = rss / 1048576 if rss is not None else None
+        heap_mb = self.js_heap() / 1048576
+        if (self.max_rss_mb and rss_mb is not None and rss_mb > self.max_rss_mb) or (self.max_heap_mb and heap_mb > self.max_heap_mb):
+            self._over_limit = True
+        recycled = False
+        if self._over_limit and module_done and self.browser_pool is not None:
+            self.recycle()
+            recycled = True
+        sample = {
+            "test": nodeid,
+            "time": round(time.time() - self._started, 3),
+            "rss_mb": round(rss_mb, 1) if rss_mb is not None else None,
+            "heap_mb": round(heap_mb, 1),
+            "recycled": recycled,
+        }
+        self.timeline.append(sample)
+        return sample
+
+    def recycle(self):
+        """Close the pooled contexts and the browsers; the pool relaunches them on next use."""
+        if self.factory is not None and self.factory.pool is not None:
+            self.factory.pool.close()
+        self.browser_pool.recycle()
+        self.recycles += 1
+        self._over_limit = False
+
+    def write_json(self, path):
+        """Write the memory timeline as JSON."""
+        Path(path).write_text(json.dumps({"recycles": self.recycles, "timeline": self.timeline}, indent=2), encoding="utf-8")
+
+    @staticmethod
+    def html_sample(sample):
+        """Render one test's sample for its report row."""
+        rss = f"{sample['rss_mb']:.0f} MiB" if sample["rss_mb"] is not None else "n/a"
+        recycled = ", browser recycled" if sample["recycled"] else ""
+        return f"<div>Browser memory after test: {rss}, JS heap {sample['heap_mb']:.1f} MiB{recycled}</div>"
+
+    def html_timeline(self, width: int = 800, height: int = 120):
+        """Render the timeline as an inline SVG chart (RSS blue, JS heap orange, recycles red)."""
+        if not self.timeline:
+            return ""
+        peak = max(max(sample["rss_mb"] or 0, sample["heap_mb"]) for sample in self.timeline) or 1
+        step = width / max(len(self.timeline) - 1, 1)
+
+        def points(field):
+            return " ".join(
+                f"{index * step:.1f},{height - (sample[field] or 0) / peak * height:.1f}"
+                for index, sample in enumerate(self.timeline)
+            )
+
+        recycles = "".join(
+            f'<line x1="{index * step:.1f}" y1="0" x2="{index * step:.1f}" y2="{height}" stroke="red"><title>{html.escape(sample["test"])}</title></line>'
+            for index, sample in enumerate(self.timeline) if sample["recycled"]
+        )
+        return (
+            f"<div><h3>Browser memory (peak {peak:.0f} MiB, {self.recycles} recycles)</h3>"
+            f'<svg width="{width}" height="{height}" style="border:1px solid #ccc">'
+            f'<polyline fill="none" stroke="steelblue" points="{points("rss_mb")}"/>'
+            f'<polyline fill="none" stroke="orange" points="{points("heap_mb")}"/>{recycles}</svg></div>'
+        )
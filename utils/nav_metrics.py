@@ -0,0 +1,222 @@
+import fnmatch
+import html
+import itertools
+import json
+import time
+import weakref
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, urlunsplit
+
+from utils.context_pool import RESET_PATH
+from utils.filelock import file_lock
+from utils.percentiles import nearest_rank
+
+
+METRICS = ("ttfb", "dcl", "load", "fcp", "lcp", "transfer_bytes")
+
+# Installed in every page: observes paint / LCP entries and reports the main frame's
+# navigation timing to the exposed binding after load, on LCP updates and on flush
+NAV_METRICS_JS = """
+(() => {
+    if (window.top !== window) return;
+    const state = { fcp: null, lcp: null, sent: "" };
+    function collect() {
+        const nav = performance.getEntriesByType("navigation")[0];
+        if (!nav) return null;
+        const resources = performance.getEntriesByType("resource");
+        return {
+            url: location.href,
+            timeOrigin: performance.timeOrigin,
+            ttfb: nav.responseStart,
+            dcl: nav.domContentLoadedEventEnd || null,
+            load: nav.loadEventEnd || null,
+            fcp: state.fcp,
+            lcp: state.lcp,
+            transfer_bytes: resources.reduce((total, entry) => total + (entry.transferSize || 0), nav.transferSize || 0),
+        };
+    }
+    function report() {
+        const metrics = collect();
+        if (!metrics || !window.__navMetrics) return;
+        const key = JSON.stringify(metrics);
+        if (key === state.sent) return;
+        state.sent = key;
+        window.__navMetrics(metrics).catch(() => {});
+    }
+    try {
+        new PerformanceObserver(list => {
+            for (const entry of list.getEntries()) {
+                if (entry.name === "first-contentful-paint") state.fcp = entry.startTime;
+            }
+        }).observe({ type: "paint", buffered: true });
+        new PerformanceObserver(list => {
+            const entries = list.getEntries();
+            state.lcp = entries[entries.length - 1].startTime;
+            if (document.readyState === "complete") report();
+        }).observe({ type: "largest-contentful-paint", buffered: true });
+    } catch (error) {
+        // Paint timing not supported by this engine: the other metrics are still reported
+    }
+    window.__navMetricsFlush = report;
+    addEventListener("load", () => setTimeout(report, 0));
+})();
+"""
+
+
+def normalize_url(url: str):
+    """Drop the query and fragment, so navigations are aggregated per page."""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+def parse_budgets(lines):
+    """
+    Parse `nav_budgets` ini lines into [(url_pattern, {metric: limit})].
+
+    Each line is a URL pattern (fnmatch, `*` for every page) followed by metric=limit pairs,
+    in ms (transfer_bytes in bytes), e.g. `*/inventory.html lcp=1500 ttfb=300`.
+    """
+    budgets = []
+    for line in lines:
+        pattern, *limits = line.split()
+        parsed = {}
+        for limit in limits:
+            metric, _, value = limit.partition("=")
+            if metric not in METRICS:
+                raise ValueError(f"unknown navigation metric {metric!r} in nav_budgets, expected one of {METRICS}")
+            parsed[metric] = float(value)
+        budgets.append((pattern, parsed))
+    return budgets
+
+
+class NavigationMetrics:
+    """
+    Collects Navigation Timing and paint metrics of every main-frame navigation.
+
+    - `install(context)` adds an init script and an exposed binding; the page reports
+      TTFB, DOMContentLoaded, load, FCP, LCP and transferred bytes after each load
+      (and again when LCP changes).
+    - `flush()` asks every open page for its latest metrics, so late LCP updates are
+      received before a test is judged.
+    - Navigations are attributed to the test that triggered them, aggregated per URL,
+      checked against the budgets and appended to a JSONL time series; the blank pages
+      a ContextPool reset visits are left out.
+
+    Attributes:
+        budgets (list): [(url_pattern, {metric: limit})], see `parse_budgets`.
+        current_test (str): Node ID new navigations are attributed to.
+        navigations (dict): (page number, timeOrigin) -> latest record of one navigation.
+    """
+
+    def __init__(self, budgets=()):
+        """
+        Initializes the collector.
+
+        Args:
+            budgets (list): [(url_pattern, {metric: limit})], see `parse_budgets`.
+        """
+        self.budgets = list(budgets)
+        self.current_test = "<session>"
+        self.navigations = {}
+        self.contexts = []
+        # Pages are numbered on their first report: an id() could be reused by a later page
+        self._page_numbers = weakref.WeakKeyDictionary()
+        self._next_page_number = itertools.count()
+
+    def install(self, context):
+        """Report the navigations of every page of a context."""
+        context.expose_binding("__navMetrics", self._receive)
+        context.add_init_script(NAV_METRICS_JS)
+        self.contexts.append(context)
+        context.on("close", lambda _: self.contexts.remove(context) if context in self.contexts else None)
+
+    def _receive(self, source, metrics):
+        if urlsplit(metrics["url"]).path == RESET_PATH:
+            # A pooled context being reset, not a navigation of the test
+            return
+        page = source["page"]
+        if page not in self._page_numbers:
+            self._page_numbers[page] = next(self._next_page_number)
+        key = (self._page_numbers[page], metrics.pop("timeOrigin"))
+        record = self.navigations.get(key)
+        if record is None:
+            record = self.navigations[key] = {"test": self.current_test, "time": time.time()}
+        record.update(metrics, url=normalize_url(metrics["url"]))
+
+    def flush(self):
+        """Collect the latest metrics of every open page."""
+        for context in list(self.contexts):
+            for page in context.pages:
+                try:
+                    page.evaluate("() => window.__navMetricsFlush && window.__navMetricsFlush()")
+                except Exception:
+                    # Page closing or mid-navigation: its last report stands
+                    pass
+
+    def for_test(self, nodeid: str):
+        """Return the navigation records attributed to a test."""
+        return [record for record in self.navigations.values() if record["test"] == nodeid]
+
+    def violations(self, records):
+        """Return a message per budget exceeded by the given navigation records."""
+        messages = []
+        for record in records:
+            for pattern, limits in self.budgets:
+                if not fnmatch.fnmatch(record["url"], pattern):
+                    continue
+                for metric, limit in limits.items():
+                    value = record.get(metric)
+                    if value is not None and value > limit:
+                        messages.append(f"{record['url']}: {metric} {value:.0f} > budget {limit:.0f}")
+        return messages
+
+    def per_url(self):
+        """Aggregate the run's navigations per URL: count and p50 / p95 / max per metric."""
+        grouped = {}
+        for record in self.navigations.values():
+            grouped.setdefault(record["url"], []).append(record)
+        summary = {}
+        for url, records in sorted(grouped.items()):
+            stats = {"count": len(records)}
+            for metric in METRICS:
+                values = sorted(record[metric] for record in records if record.get(metric) is not None)
+                if values:
+                    stats[metric] = {
+                        "p50": nearest_rank(values, 0.50),
+                        "p95": nearest_rank(values, 0.95),
+                        "max": values[-1],
+                    }
+            summary[url] = stats
+        return summary
+
+    def append_series(self, path, run_id: str = None):
+        """Append this run's navigations to a JSONL time series, one line per navigation."""
+        if not self.navigations:
+            return
+        run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        lines = "".join(
+            json.dumps({
+                "run": run_id,
+                "timestamp": datetime.fromtimestamp(record["time"], timezone.utc).isoformat(),
+                **record,
+            }) + "\n"
+            for record in self.navigations.values()
+        )
+        with file_lock(f"{path}.lock"):
+            with open(path, "a", encoding="utf-8") as series:
+                series.write(lines)
+
+    @staticmethod
+    def html_table(records, title: str):
+        """Render navigation records (or per-URL p50s) as an HTML table."""
+        def cell(value):
+            if isinstance(value, dict):
+                value = value["p50"]
+            return f"{value:.0f}" if isinstance(value, (int, float)) else ""
+
+        rows = "".join(
+            f"<tr><td>{html.escape(url)}</td>" + "".join(f"<td>{cell(values.get(metric))}</td>" for metric in METRICS) + "</tr>"
+            for url, values in records
+        )
+        header = "".join(f"<th>{metric}</th>" for metric in METRICS)
+        return f"<div><h3>{html.escape(title)}</h3><table><tr><th>URL</th>{header}</tr>{rows}</table></div>"
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+
+# Hop-by-hop and encoding headers that no longer describe the stored (decoded) body
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def request_key(method: str, url: str, post_data=None):
+    """Return the lookup key of a request: method, URL and a hash of its body, if any."""
+    body_hash = hashlib.sha256(post_data).hexdigest() if post_data else ""
+    return f"{method} {url} {body_hash}"
+
+
+class NetworkStore:
+    """
+    Content-addressed on-disk store of recorded responses with a HAR-style index.
+
+    - Bodies are stored once per SHA-256 under `blobs/`, so identical responses
+      recorded by many contexts or runs are deduplicated.
+    - `index.jsonl` holds one HAR-like entry (request, response, content hash) per line.
+    - `record(context)` captures every response a context receives,
+      `replay(context)` serves them back through request interception.
+
+    Attributes:
+        root (Path): Store directory.
+        inline_limit (int): Bodies up to this size are served from memory,
+            larger ones are handed to the browser as a file path.
+        missing (int): Replayed requests that were not in the store.
+        failed (int): Recorded requests whose fetch failed; they are aborted and not stored.
+    """
+
+    def __init__(self, root, inline_limit: int = 256 * 1024):
+        """
+        Initializes the store.
+
+        Args:
+            root (str | Path): Store directory; created on first write.
+            inline_limit (int): Largest body size served from memory, in bytes.
+        """
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.index_path = self.root / "index.jsonl"
+        self.inline_limit = inline_limit
+        self.missing = 0
+        self.failed = 0
+        self._entries = None
+        self._recorded = set()
+        self._lock = threading.Lock()
+        self._read_body = lru_cache(maxsize=512)(self._read_blob)
+
+    def blob_path(self, sha: str):
+        """Return the path of a stored body."""
+        return self.blob_dir / sha[:2] / sha
+
+    def put(self, body: bytes):
+        """Store a body once and return its SHA-256."""
+        sha = hashlib.sha256(body).hexdigest()
+        path = self.blob_path(sha)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{sha}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, path)
+        return sha
+
+    def add(self, request, response, body: bytes):
+        """Store a response body and append its HAR-style entry to the index."""
+        sha = self.put(body)
+        key = request_key(request.method, request.url, request.post_data_buffer)
+        with self._lock:
+            if (key, sha) in self._recorded:
+                return
+            self._recorded.add((key, sha))
+            entry = {
+                "key": key,
+                "request": {"method": request.method, "url": request.url},
+                "response": {
+                    "status": response.status,
+                    "headers": response.headers_array(),
+                    "content": {"size": len(body), "sha256": sha},
+                },
+            }
+            self.root.mkdir(parents=True, exist_ok=True)
+            # One write per line, so concurrent --workers appends do not interleave
+            with open(self.index_path, "a", encoding="utf-8") as index:
+                index.write(json.dumps(entry) + "\n")
+
+    def entries(self):
+        """Load the index once; the latest recorded entry of a request wins."""
+        if self._entries is None:
+            entries = {}
+            if self.index_path.exists():
+                with open(self.index_path, encoding="utf-8") as index:
+                    for line in index:
+                        if line.strip():
+                            entry = json.loads(line)
+                            entries[entry["key"]] = entry
+            self._entries = entries
+        return self._entries
+
+    def _read_blob(self, sha: str):
+        return self.blob_path(sha).read_bytes()
+
+    def record(self, context):
+        """Capture every response the context receives into the store; a request whose fetch fails is aborted unrecorded."""
+        from playwright.sync_api import Error as PlaywrightError
+
+        def handle(route):
+            try:
+                response = route.fetch()
+                body = response.body()
+            except PlaywrightError:
+                self.failed += 1
+                try:
+                    route.abort("failed")
+                except PlaywrightError:
+                    # The page is gone, nothing waits for this request any more
+                    pass
+                return
+            self.add(route.request, response, body)
+            route.fulfill(response=response, body=body)
+
+        context.route("**/*", handle)
+
+    def replay(self, context):
+        """Serve the context's requests from the store; unknown requests are aborted."""
+        entries = self.entries()
+
+        def handle(route):
+            request = route.request
+            entry = entries.get(request_key(request.method, request.url, request.post_data_buffer))
+            if entry is None:
+                self.missing += 1
+                route.abort("internetdisconnected")
+                return
+            response = entry["response"]
+            headers = {}
+            for header in response["headers"]:
+                name = header["name"].lower()
+                if name in DROPPED_HEADERS:
+                    continue
+                headers[name] = f"{headers[name]}\n{header['value']}" if name in headers else header["value"]
+            content = response["content"]
+            if content["size"] > self.inline_limit:
+                # The driver reads large bodies straight from the blob file
+                route.fulfill(status=response["status"], headers=headers, path=self.blob_path(content["sha256"]))
+            else:
+                route.fulfill(status=response["status"], headers=headers, body=self._read_body(content["sha256"]))
+
+        context.route("**/*", handle)
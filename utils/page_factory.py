@@ -0,0 +1,100 @@
+class PageFactory:
+    """
+    Creates the browser contexts and pages used by the test modules.
+
+    Every context is created through this factory, so conftest can register
+    setup hooks (routing, tracing, instrumentation, ...) that apply to all of
+    them in one place.
+
+    With a ContextPool, released contexts are reset and handed out again
+    instead of being closed and created anew.
+
+    Attributes:
+        get_browser (callable): Returns the browser new contexts are created in, optionally for an engine.
+        setup_hooks (list): Callables run on every new context, in registration order.
+        reset_hooks (list): Setup hooks run again on a pooled context after its reset (route layers).
+        acquire_hooks (list): Run on a pooled context each time it is handed out again.
+        release_hooks (list): Run on a pooled context when it goes back to the pool (or is prewarmed into it).
+        pool (ContextPool): Optional pool the contexts are taken from.
+    """
+
+    def __init__(self, get_browser):
+        """
+        Initializes the factory.
+
+        Args:
+            get_browser (callable): Returns the browser new contexts are created in;
+                called with an engine name when one is requested.
+        """
+        self.get_browser = get_browser
+        self.setup_hooks = []
+        self.reset_hooks = []
+        self.acquire_hooks = []
+        self.release_hooks = []
+        self.pool = None
+
+    def add_setup(self, hook, rerun_on_reset: bool = False):
+        """
+        Register a callable run with every new context.
+
+        Args:
+            hook (callable): Called with the new context.
+            rerun_on_reset (bool): Also run it after a pooled context is reset, for hooks
+                whose effect the reset removes (routes).
+        """
+        self.setup_hooks.append(hook)
+        if rerun_on_reset:
+            self.reset_hooks.append(hook)
+
+    def add_pool_hooks(self, acquire=None, release=None):
+        """
+        Register callables run when a pooled context is checked out of or back into the pool.
+
+        Args:
+            acquire (callable): Called with a reused context as it is handed out.
+            release (callable): Called with a context as it goes idle in the pool, before its reset.
+        """
+        if acquire is not None:
+            self.acquire_hooks.append(acquire)
+        if release is not None:
+            self.release_hooks.append(release)
+
+    def create_context(self, engine: str = None, **kwargs):
+        """
+        Create a new browser context and run the setup hooks on it.
+
+        Args:
+            engine (str): Browser engine, e.g. firefox; the default browser when omitted.
+            **kwargs: Passed to `browser.new_context`, e.g. storage_state.
+        """
+        browser = self.get_browser(engine) if engine else self.get_browser()
+        context = browser.new_context(**kwargs)
+        for hook in self.setup_hooks:
+            hook(context)
+        return context
+
+    def new_context(self, **kwargs):
+        """
+        Return a ready context: a reset one from the pool, or a newly created one.
+
+        Args:
+            **kwargs: `engine` and the options passed to `browser.new_context`, e.g. storage_state.
+        """
+        if self.pool is not None:
+            return self.pool.acquire(**kwargs)
+        return self.create_context(**kwargs)
+
+    def release(self, context):
+        """Give back a context created by `new_context`."""
+        if self.pool is not None:
+            self.pool.release(context)
+        else:
+            context.close()
+
+    def open(self, **kwargs):
+        """Create a page in a new context; `kwargs` are passed to `new_context`."""
+        return self.new_context(**kwargs).new_page()
+
+    def close(self, page):
+        """Close a page opened by `open` together with its context."""
+        self.release(page.context)
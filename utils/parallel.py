@@ -0,0 +1,248 @@
+"""
+Sharded parallel execution for `pytest --workers N`.
+
+The controlling pytest process collects the tests as usual, groups them into
+module chains (tests of one module share a module-scoped `browser_context`
+page, so they must stay together and in order), spreads the chains over N
+worker processes and merges the per-worker pytest-html reports into the
+single report named by `pytest_configure`.
+"""
+
+import html
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+
+# Options the controller handles itself and must not forward to the workers
+CONTROLLER_OPTIONS = ("--workers", "--worker-id", "--html")
+
+
+def chain_key(item):
+    """
+    Return the key of the ordered chain a collected test belongs to.
+
+    That is its module file, plus its `--matrix` cell: every cell has its own
+    module-scoped context, so the cells of a module are independent chains.
+    """
+    module = item.nodeid.split("::")[0]
+    callspec = getattr(item, "callspec", None)
+    if callspec is not None and "matrix_cell" in callspec.params:
+        return f"{module}[{callspec.params['matrix_cell'].id}]"
+    return module
+
+
+def build_chains(items):
+    """
+    Group collected items into ordered chains.
+
+    Returns a dict of chain key -> list of node IDs, preserving collection order
+    both between and inside the chains.
+    """
+    chains = {}
+    for item in items:
+        chains.setdefault(chain_key(item), []).append(item.nodeid)
+    return chains
+
+
+def plan_shards(chains, workers, weight=None):
+    """
+    Spread chains over `workers` shards, heaviest chain first onto the lightest shard.
+
+    Args:
+        chains (dict): Chain key -> ordered node IDs, as built by `build_chains`.
+        workers (int): Number of worker processes.
+        weight (callable): Optional function (key, nodeids) -> cost. Defaults to the test count.
+
+    Returns a list of shards, each a list of node IDs; empty shards are dropped.
+    """
+    weight = weight or (lambda key, nodeids: len(nodeids))
+    shards = [{"cost": 0, "nodeids": []} for _ in range(max(1, workers))]
+    ordered = sorted(chains.items(), key=lambda chain: weight(*chain), reverse=True)
+    for key, nodeids in ordered:
+        lightest = min(shards, key=lambda shard: shard["cost"])
+        lightest["cost"] += weight(key, nodeids)
+        lightest["nodeids"].extend(nodeids)
+    return [shard["nodeids"] for shard in shards if shard["nodeids"]]
+
+
+def forwarded_args(config):
+    """
+    Return the original command-line options to hand down to every worker.
+
+    Positional test paths and the controller-only options (with their values)
+    are dropped; the workers get explicit node IDs instead.
+    """
+    args = list(config.invocation_params.args)
+    positional = {str(arg) for arg in config.args}
+    forwarded = []
+    skip_value = False
+    for arg in args:
+        if skip_value:
+            skip_value = False
+            continue
+        name = arg.split("=", 1)[0]
+        if name in CONTROLLER_OPTIONS:
+            skip_value = "=" not in arg
+            continue
+        if arg in positional:
+            continue
+        forwarded.append(arg)
+    return forwarded
+
+
+class ShardRunner:
+    """
+    Runs collected tests in N pytest worker processes and merges their reports.
+
+    Attributes:
+        config (pytest.Config): The controller's pytest config.
+        workers (int): Number of worker processes to start.
+        report_file (str): Path of the merged pytest-html report.
+        weight (callable): Optional chain cost function used by `plan_shards`.
+        postprocess (callable): Optional report rewrite passed to `merge_html_reports`.
+        worker_reports (list): Per-worker report paths of the last run.
+    """
+
+    def __init__(self, config, workers: int, report_file: str, weight=None, postprocess=None):
+        self.config = config
+        self.workers = workers
+        self.report_file = report_file
+        self.weight = weight
+        self.postprocess = postprocess
+        self.worker_reports = []
+
+    def worker_report(self, worker_id: int):
+        """Return the per-worker pytest-html report path."""
+        stem, ext = os.path.splitext(self.report_file)
+        return f"{stem}.w{worker_id}{ext}"
+
+    def run(self, items, terminal=None):
+        """
+        Run the given items on the worker processes and wait for all of them.
+
+        - Builds module chains and spreads them over the workers.
+        - Starts one `python -m pytest` per shard with the forwarded options.
+        - Echoes each worker's output once it finishes.
+        - Merges the per-worker HTML reports into `report_file`.
+
+        Returns the number of failed tests over all workers, read from their reports;
+        a worker that failed without reporting a failed test (e.g. it crashed) counts as one.
+        """
+        shards = plan_shards(build_chains(items), self.workers, self.weight)
+        base_cmd = [sys.executable, "-m", "pytest", *forwarded_args(self.config)]
+        env = dict(os.environ, PYTEST_WORKERS=str(len(shards)))
+        running = []
+        self.worker_reports = [self.worker_report(worker_id) for worker_id in range(len(shards))]
+        for worker_id, nodeids in enumerate(shards):
+            report = self.worker_report(worker_id)
+            log_path = Path(report).with_suffix(".log")
+            cmd = [*base_cmd, "--worker-id", str(worker_id), f"--html={report}", *nodeids]
+            log_file = open(log_path, "w", encoding="utf-8")
+            process = subprocess.Popen(
+                cmd, cwd=str(self.config.rootpath), env=env, stdout=log_file, stderr=subprocess.STDOUT
+            )
+            running.append((worker_id, process, log_file, log_path, report))
+
+        failed = 0
+        reports = []
+        for worker_id, process, log_file, log_path, report in running:
+            return_code = process.wait()
+            log_file.close()
+            worker_failed = 0
+            if os.path.exists(report):
+                reports.append(report)
+                worker_failed = sum(
+                    outcome in ("failed", "error") for outcome in report_outcomes(Path(report).read_text(encoding="utf-8")).values()
+                )
+            # 0: all passed, 5: nothing selected on this shard
+            if return_code not in (0, 5):
+                worker_failed = max(worker_failed, 1)
+            failed += worker_failed
+            if terminal is not None:
+                terminal.write_sep("-", f"worker {worker_id} exited with {return_code}")
+                terminal.write(Path(log_path).read_text(encoding="utf-8"))
+
+        if reports:
+            merge_html_reports(reports, self.report_file, self.postprocess)
+        return failed
+
+
+_BLOB = re.compile(r'(<div id="data-container" data-jsonblob=")(.*?)("></div>)', re.S)
+_OUTCOME = re.compile(r'(<span class="(failed|passed|skipped|xfailed|xpassed|error|rerun|retried)">)(\d+)( )')
+_RUN_COUNT = re.compile(r'(<p class="run-count">)(.*?)(</p>)', re.S)
+_POSTFIX = re.compile(r'(<div class="additional-summary postfix">)(.*?)(</div>\s*</div>\s*<table id="results-table">)', re.S)
+
+
+def _outcomes(tests):
+    """Map node ID -> lower-case outcome of a report's test data, a failed or errored phase winning."""
+    outcomes = {}
+    for nodeid, results in tests.items():
+        phases = [result.get("result", "").lower() for result in results]
+        outcomes[nodeid] = next((phase for phase in phases if phase in ("failed", "error")), phases[-1] if phases else "")
+    return outcomes
+
+
+def report_outcomes(document):
+    """Return node ID -> lower-case outcome of a pytest-html (>= 4) report; empty for other reports."""
+    match = _BLOB.search(document)
+    if match is None:
+        return {}
+    return _outcomes(json.loads(html.unescape(match.group(2)))["tests"])
+
+
+def merge_html_reports(paths, target, postprocess=None):
+    """
+    Merge pytest-html (>= 4) reports into a single report file.
+
+    The first report is used as the template; the embedded JSON test data of
+    all reports is combined, the outcome counters are recomputed and the extra
+    summary sections of the other workers are appended to the template's.
+
+    `postprocess(merged_html, outcomes)`, with outcomes a dict of node ID -> lower-case
+    outcome, may rewrite sections computed from all workers' results (e.g. the matrix grid).
+    """
+    documents = [Path(path).read_text(encoding="utf-8") for path in paths]
+    merged_html = documents[0]
+    match = _BLOB.search(merged_html)
+    if match is None:
+        # Not a pytest-html 4 report, keep the worker reports side by side
+        Path(target).write_text(merged_html, encoding="utf-8")
+        return target
+
+    merged = json.loads(html.unescape(match.group(2)))
+    postfixes = []
+    for document in documents[1:]:
+        other = _BLOB.search(document)
+        if other is None:
+            continue
+        for nodeid, results in json.loads(html.unescape(other.group(2)))["tests"].items():
+            merged["tests"].setdefault(nodeid, []).extend(results)
+        postfix = _POSTFIX.search(document)
+        if postfix is not None and postfix.group(2).strip():
+            postfixes.append(postfix.group(2))
+
+    counts = {}
+    for results in merged["tests"].values():
+        for result in results:
+            outcome = result.get("result", "").lower()
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    blob = html.escape(json.dumps(merged), quote=True)
+    merged_html = _BLOB.sub(lambda m: m.group(1) + blob + m.group(3), merged_html, count=1)
+    merged_html = _OUTCOME.sub(
+        lambda m: f"{m.group(1)}{counts.get(m.group(2), 0)}{m.group(4)}", merged_html
+    )
+    total = sum(counts.get(outcome, 0) for outcome in ("passed", "failed", "xpassed", "xfailed"))
+    merged_html = _RUN_COUNT.sub(
+        lambda m: f"{m.group(1)}{total} tests ran on {len(paths)} workers.{m.group(3)}", merged_html, count=1
+    )
+    if postfixes:
+        merged_html = _POSTFIX.sub(lambda m: m.group(1) + m.group(2) + "".join(postfixes) + m.group(3), merged_html, count=1)
+    if postprocess is not None:
+        merged_html = postprocess(merged_html, _outcomes(merged["tests"]))
+    Path(target).write_text(merged_html, encoding="utf-8")
+    return target
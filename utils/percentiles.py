@@ -0,0 +1,23 @@
+"""
+Nearest-rank percentiles shared by the load runner, trace profiler, timing histograms,
+navigation metrics and adaptive timeouts.
+"""
+
+import math
+
+
+def rank(count: int, fraction: float):
+    """1-based nearest rank of the `fraction` percentile among `count` ordered samples."""
+    return max(1, math.ceil(fraction * count))
+
+
+def nearest_rank(sorted_values, fraction: float):
+    """Nearest-rank percentile of already sorted values; 0.0 when there are none."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[rank(len(sorted_values), fraction) - 1]
+
+
+def percentile(samples, fraction: float):
+    """Nearest-rank percentile of unsorted samples."""
+    return nearest_rank(sorted(samples), fraction)
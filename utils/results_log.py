@@ -0,0 +1,266 @@
+"""
+Streaming test results: an append-only JSONL log and an HTML report rendered from it as tests finish.
+
+One line is appended per test once its teardown is reported, so a killed run keeps every
+finished test, in the log and in the HTML page (which browsers render unclosed). Artifacts
+(screenshots, diffs, traces) are referenced by path relative to the log, never embedded.
+
+The logs of parallel workers, or of shards run on other machines and copied together,
+merge into one report in a single pass over their lines:
+
+    $ python -m utils.results_log render reports/*.results.jsonl -o report.html
+    $ python -m utils.results_log merge reports/*.results.jsonl -o merged.results.jsonl
+"""
+
+import argparse
+import html
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+OUTCOMES = ("passed", "failed", "error", "skipped")
+
+_STYLE = """
+body { font-family: sans-serif; font-size: 13px; }
+table { border-collapse: collapse; width: 100%; }
+td, th { border: 1px solid #ddd; padding: 4px 6px; text-align: left; vertical-align: top; }
+.passed { color: #2e7d32; } .failed, .error { color: #c62828; } .skipped { color: #8d6e63; }
+img { max-width: 320px; border: 1px solid #ccc; margin: 2px; }
+pre { white-space: pre-wrap; margin: 0; }
+"""
+
+
+def outcome_of(phases):
+    """Outcome of a test from its phases: error if setup or teardown failed, otherwise that of the call."""
+    for when in ("setup", "teardown"):
+        if phases.get(when, {}).get("outcome") == "failed":
+            return "error"
+    if "call" in phases:
+        return phases["call"]["outcome"]
+    return phases.get("setup", {}).get("outcome", "error")
+
+
+class HtmlStream:
+    """
+    Writes an HTML report row by row.
+
+    The page is valid to view at any point: rows are appended and flushed as they come,
+    the counts and summary sections close the page at `finish`.
+
+    Attributes:
+        path (Path): The HTML file.
+        counts (dict): Outcome -> number of tests written so far.
+    """
+
+    def __init__(self, path, title: str):
+        """
+        Starts the page.
+
+        Args:
+            path (str | Path): The HTML file, overwritten.
+            title (str): Page title.
+        """
+        self.path = Path(path)
+        self.base = self.path.parent
+        self.counts = {}
+        self.duration = 0.0
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(
+            f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+            f"<style>{_STYLE}</style></head><body><h1>{html.escape(title)}</h1>"
+            "<table><tr><th>Result</th><th>Test</th><th>Duration</th><th>Details</th></tr>\n"
+        )
+        self._file.flush()
+
+    def _extra(self, extra, log_dir: Path):
+        kind, content, name = extra.get("format_type"), extra.get("content") or "", extra.get("name") or ""
+        if kind == "image":
+            # Paths in the log are relative to the log; rewrite them relative to this page
+            src = os.path.relpath(log_dir / content, self.base) if not os.path.isabs(content) else Path(content).as_uri()
+            src = html.escape(src.replace(os.sep, "/"), quote=True)
+            return f'<a href="{src}"><img src="{src}" alt="{html.escape(name)}" loading="lazy"></a>'
+        if kind == "url":
+            return f'<a href="{html.escape(content, quote=True)}">{html.escape(name or content)}</a>'
+        if kind == "html":
+            return content
+        return f"<pre>{html.escape(content)}</pre>"
+
+    def add(self, record, log_dir=None):
+        """Append the row of one test record of a results log."""
+        outcome = record["outcome"]
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        self.duration += record["duration"]
+        log_dir = Path(log_dir) if log_dir is not None else self.base
+        details = "".join(self._extra(extra, log_dir) for extra in record.get("extras", []))
+        if record.get("longrepr"):
+            details += f"<details><summary>Traceback</summary><pre>{html.escape(record['longrepr'])}</pre></details>"
+        worker = f" <small>w{record['worker']}</small>" if record.get("worker") is not None else ""
+        self._file.write(
+            f'<tr><td class="{outcome}">{outcome}</td><td>{html.escape(record["nodeid"])}{worker}</td>'
+            f'<td>{record["duration"]:.2f} s</td><td>{details}</td></tr>\n'
+        )
+        self._file.flush()
+
+    def finish(self, sections=()):
+        """Close the table, write the counts and the summary sections and close the page."""
+        counts = ", ".join(f'<span class="{outcome}">{self.counts.get(outcome, 0)} {outcome}</span>' for outcome in OUTCOMES)
+        total = sum(self.counts.values())
+        self._file.write(f"</table><h2>Summary</h2><p>{total} tests in {self.duration:.1f} s: {counts}</p>")
+        self._file.write("".join(sections))
+        self._file.write("</body></html>\n")
+        self._file.close()
+
+
+class ResultsLog:
+    """
+    Streams the results of a run to a JSONL log and, optionally, an HTML report.
+
+    - `add_phase` collects the setup / call / teardown reports of a test and writes its
+      record (outcome, durations, traceback, extras) after the teardown.
+    - `finish` writes the summary sections and an end record, and closes the HTML page.
+
+    Attributes:
+        path (Path): The JSONL log, appended to.
+        worker (int): Worker ID written with every record, if any.
+        stream (HtmlStream): The incremental HTML report, if any.
+    """
+
+    def __init__(self, path, html_path=None, worker: int = None, title: str = "Test results"):
+        """
+        Opens the log and writes the session record.
+
+        Args:
+            path (str | Path): The JSONL log.
+            html_path (str | Path): The incremental HTML report; none when omitted.
+            worker (int): Worker ID of a parallel run.
+            title (str): HTML page title.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.worker = worker
+        self.stream = HtmlStream(html_path, title) if html_path else None
+        self._phases = {}
+        self._started = time.time()
+        # Line-buffered: every record is on disk once written
+        self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+        self._write({"type": "session", "worker": worker, "started": datetime.now(timezone.utc).isoformat()})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+
+    def _reference(self, extra):
+        """A JSON-safe copy of a pytest-html extra, with image paths made relative to the log."""
+        extra = {key: extra.get(key) for key in ("name", "format_type", "content")}
+        content = extra["content"]
+        if extra["format_type"] == "image" and content and os.path.isabs(content):
+            extra["content"] = os.path.relpath(content, self.path.parent)
+        return extra
+
+    def add_phase(self, nodeid: str, report):
+        """Collect one phase report of a test; write the test's record after its teardown."""
+        phases = self._phases.setdefault(nodeid, {})
+        phases[report.when] = {
+            "outcome": report.outcome,
+            "duration": report.duration,
+            "longrepr": str(report.longrepr) if report.failed and report.longrepr else None,
+            "extras": [self._reference(extra) for extra in getattr(report, "extras", [])],
+        }
+        if report.when != "teardown":
+            return
+        del self._phases[nodeid]
+        record = {
+            "type": "test",
+            "nodeid": nodeid,
+            "worker": self.worker,
+            "outcome": outcome_of(phases),
+            "duration": round(sum(phase["duration"] for phase in phases.values()), 3),
+            "phases": {when: round(phase["duration"], 3) for when, phase in phases.items()},
+            "longrepr": "\n".join(phase["longrepr"] for phase in phases.values() if phase["longrepr"]) or None,
+            "extras": [extra for phase in phases.values() for extra in phase["extras"]],
+            "time": datetime.now(timezone.utc).isoformat(),
+        }
+        self._write(record)
+        if self.stream is not None:
+            self.stream.add(record, self.path.parent)
+
+    def finish(self, sections=()):
+        """Write the summary sections and the end record; close the log and the HTML page."""
+        sections = list(sections)
+        self._write({"type": "summary", "worker": self.worker, "sections": sections})
+        self._write({"type": "end", "worker": self.worker, "duration": round(time.time() - self._started, 3)})
+        self._file.close()
+        if self.stream is not None:
+            self.stream.finish(sections)
+
+
+def read_records(path):
+    """Yield the records of a results log, skipping a line cut off by a killed run."""
+    with open(path, encoding="utf-8") as log:
+        for line in log:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def render(paths, target, title: str = "Test results"):
+    """
+    Render one HTML report from any number of results logs, in a single pass over their lines.
+
+    Returns the outcome counts.
+    """
+    stream = HtmlStream(target, title)
+    sections = []
+    for path in paths:
+        log_dir = Path(path).parent
+        for record in read_records(path):
+            if record["type"] == "test":
+                stream.add(record, log_dir)
+            elif record["type"] == "summary":
+                sections.extend(record["sections"])
+    stream.finish(sections)
+    return stream.counts
+
+
+def merge(paths, target):
+    """Concatenate results logs into one, rewriting image paths relative to the merged log."""
+    target = Path(target)
+    with open(target, "w", encoding="utf-8") as merged:
+        for path in paths:
+            log_dir = Path(path).parent
+            for record in read_records(path):
+                for extra in record.get("extras", []):
+                    content = extra.get("content")
+                    if extra.get("format_type") == "image" and content and not os.path.isabs(content):
+                        extra["content"] = os.path.relpath(log_dir / content, target.parent)
+                merged.write(json.dumps(record) + "\n")
+    return target
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render or merge streaming results logs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    render_parser = commands.add_parser("render", help="Render logs into one HTML report")
+    render_parser.add_argument("logs", nargs="+", help="Results logs (.results.jsonl)")
+    render_parser.add_argument("-o", "--output", required=True, help="HTML report to write")
+    render_parser.add_argument("--title", default="Test results", help="Report title")
+    merge_parser = commands.add_parser("merge", help="Merge logs into one log")
+    merge_parser.add_argument("logs", nargs="+", help="Results logs (.results.jsonl)")
+    merge_parser.add_argument("-o", "--output", required=True, help="Merged log to write")
+    args = parser.parse_args(argv)
+
+    if args.command == "render":
+        counts = render(args.logs, args.output, args.title)
+        print(f"{args.output}: " + ", ".join(f"{counts.get(outcome, 0)} {outcome}" for outcome in OUTCOMES))
+        return 1 if counts.get("failed") or counts.get("error") else 0
+    merge(args.logs, args.output)
+    print(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
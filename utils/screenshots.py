@@ -0,0 +1,244 @@
+import hashlib
+import html
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from utils.filelock import file_lock
+
+
+POLICIES = ("always", "failure-only", "element-clip")
+FORMATS = ("png", "jpeg", "webp")
+
+
+class ScreenshotService:
+    """
+    Screenshot pipeline shared by the tests and PageActions.
+
+    - The browser encodes PNG/JPEG itself; hashing, WebP re-encoding and disk
+      writes run on a background thread pool, so the test thread only waits for the capture.
+    - Images are stored content-addressed under `<store_dir>/<sha[:2]>/<sha>.<ext>`;
+      an identical screen (in this run or any earlier one) is written once.
+    - Capture policies:
+        - always: every requested screenshot is taken.
+        - failure-only: requests are remembered and only taken if the test fails; a failed
+          test also gets a capture of every open page of the tracked contexts, since its
+          assertion usually fails before it asks for a screenshot.
+        - element-clip: only the given element is captured, or the viewport when there is none.
+    - `index.json` maps every test to its stored images, merged across parallel workers.
+    - With a VisualComparator every captured image is also compared against its
+      baseline (`<test>-<n>`) on the background pool.
+
+    Attributes:
+        store_dir (Path): Root of the content-addressed store.
+        policy (str): One of POLICIES.
+        image_format (str): One of FORMATS.
+        quality (int): JPEG / WebP quality, 0-100.
+        current_test (str): Node ID new screenshots are attributed to.
+        stats (dict): captured, deduplicated and written_bytes counters.
+        visual (VisualComparator): Optional baseline comparison of every capture.
+    """
+
+    def __init__(self, store_dir, policy: str = "always", image_format: str = "png", quality: int = 80, workers: int = 2,
+                 visual=None):
+        """
+        Initializes the service.
+
+        Args:
+            store_dir (str | Path): Root of the content-addressed store.
+            policy (str): always, failure-only or element-clip.
+            image_format (str): png, jpeg or webp.
+            quality (int): JPEG / WebP quality, 0-100; ignored for PNG.
+            workers (int): Background threads hashing and writing images.
+            visual (VisualComparator): Compare every capture against its baseline.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"unknown screenshot policy {policy!r}, expected one of {POLICIES}")
+        if image_format not in FORMATS:
+            raise ValueError(f"unknown screenshot format {image_format!r}, expected one of {FORMATS}")
+        if image_format == "webp":
+            try:
+                import PIL.Image  # noqa: F401
+            except ImportError as error:
+                raise RuntimeError("WebP screenshots need Pillow: pip install Pillow") from error
+        self.store_dir = Path(store_dir)
+        self.policy = policy
+        self.image_format = image_format
+        self.quality = quality
+        self.workers = workers
+        self.visual = visual
+        self.current_test = "<session>"
+        self.stats = {"captured": 0, "deduplicated": 0, "written_bytes": 0}
+        self._executor = None
+        self._futures = {}
+        self._pending = {}
+        self._contexts = []
+        self._known = set()
+        self._visual_results = {}
+        self._lock = threading.Lock()
+
+    def start_test(self, nodeid: str):
+        """Attribute the following screenshots to a test."""
+        self.current_test = nodeid
+
+    def stop_test(self, nodeid: str):
+        """Forget the captures a finished test deferred, releasing their pages."""
+        self._pending.pop(nodeid, None)
+
+    def track(self, context):
+        """Remember a browser context, so a failed test gets its open pages captured (failure-only)."""
+        self._contexts.append(context)
+        context.on("close", lambda _: self._contexts.remove(context) if context in self._contexts else None)
+
+    def capture(self, page, full_page: bool = False, element=None, ignore=()):
+        """
+        Request a screenshot of a page for the current test, according to the policy.
+
+        Args:
+            page (playwright.sync_api.Page): Page to capture.
+            full_page (bool): Capture the whole scrollable page instead of the viewport.
+            element (playwright.sync_api.Locator): Capture only this element.
+            ignore (list): Locators or (x, y, width, height) page regions left out of the visual comparison.
+        """
+        if self.policy == "failure-only":
+            self._pending.setdefault(self.current_test, []).append((page, full_page, element, ignore))
+            return
+        self._capture(self.current_test, page, full_page, element, ignore)
+
+    __call__ = capture
+
+    def capture_failure(self, nodeid: str):
+        """
+        Take the screenshots deferred by the failure-only policy for a failed test.
+
+        Every open page of the tracked contexts that no deferred request covers is captured
+        as well, as it stood when the test failed.
+        """
+        captured = []
+        for page, full_page, element, ignore in self._pending.pop(nodeid, []):
+            if not page.is_closed():
+                self._capture(nodeid, page, full_page, element, ignore)
+                captured.append(page)
+        for context in list(self._contexts):
+            for page in context.pages:
+                if page not in captured and not page.is_closed():
+                    self._capture(nodeid, page, False, None, ())
+
+    def _capture(self, nodeid, page, full_page, element, ignore):
+        # WebP is encoded from a lossless PNG off the test thread
+        kwargs = {"type": "jpeg", "quality": self.quality} if self.image_format == "jpeg" else {"type": "png"}
+        full_page = full_page and self.policy != "element-clip"
+        regions = self._ignore_regions(page, full_page, element, ignore) if self.visual is not None else []
+        if element is not None:
+            data = element.screenshot(**kwargs)
+        else:
+            data = page.screenshot(full_page=full_page, **kwargs)
+        self.stats["captured"] += 1
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="screenshots")
+        futures = self._futures.setdefault(nodeid, [])
+        name = f"{nodeid.replace('::', '_').replace('/', '_')}-{len(futures)}"
+        futures.append(self._executor.submit(self._store, data, nodeid, name, regions))
+
+    @staticmethod
+    def _ignore_regions(page, full_page, element, ignore):
+        """Resolve ignore locators to (x, y, width, height) boxes in the captured image's pixels."""
+        origin_x = origin_y = 0
+        if element is not None:
+            box = element.bounding_box()
+            origin_x, origin_y = box["x"], box["y"]
+        elif full_page:
+            # Bounding boxes are viewport-relative, a full-page image starts at the top of the document
+            scroll_x, scroll_y = page.evaluate("[window.scrollX, window.scrollY]")
+            origin_x, origin_y = -scroll_x, -scroll_y
+        scale = page.evaluate("window.devicePixelRatio") if ignore else 1
+        regions = []
+        for region in ignore:
+            if not isinstance(region, (tuple, list)):
+                box = region.bounding_box()
+                if box is None:
+                    continue
+                region = (
+                    (box["x"] - origin_x) * scale, (box["y"] - origin_y) * scale,
+                    box["width"] * scale, box["height"] * scale,
+                )
+            regions.append(tuple(region))
+        return regions
+
+    def _store(self, data: bytes, nodeid: str, name: str, regions):
+        """Compare against the baseline, encode (WebP only) and write one image unless it is already stored; return its path."""
+        if self.visual is not None:
+            result = self.visual.check(name, data, regions)
+            with self._lock:
+                self._visual_results.setdefault(nodeid, []).append(result)
+        if self.image_format == "webp":
+            from PIL import Image
+
+            buffer = io.BytesIO()
+            Image.open(io.BytesIO(data)).save(buffer, format="WEBP", quality=self.quality)
+            data = buffer.getvalue()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.store_dir / digest[:2] / f"{digest}.{self.image_format}"
+        with self._lock:
+            duplicate = digest in self._known or path.exists()
+            self._known.add(digest)
+            if duplicate:
+                self.stats["deduplicated"] += 1
+            else:
+                self.stats["written_bytes"] += len(data)
+        if not duplicate:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        return path
+
+    def paths(self, nodeid: str):
+        """Wait for the test's screenshots to be stored and return the paths of those that were (see `errors`)."""
+        return [future.result() for future in self._futures.get(nodeid, []) if future.exception() is None]
+
+    def errors(self, nodeid: str):
+        """Wait for the test's screenshots and return the exceptions of those that could not be stored."""
+        return [future.exception() for future in self._futures.get(nodeid, []) if future.exception() is not None]
+
+    def html_errors(self, nodeid: str):
+        """HTML list of the test's screenshots that could not be stored; empty when all were."""
+        errors = self.errors(nodeid)
+        if not errors:
+            return ""
+        items = "".join(f"<li>{html.escape(f'{type(error).__name__}: {error}')}</li>" for error in errors)
+        return f"<div><p>{len(errors)} screenshot(s) not stored:</p><ul>{items}</ul></div>"
+
+    def visual_results(self, nodeid: str):
+        """Wait for the test's screenshots and return their VisualResults (empty without --visual)."""
+        self.paths(nodeid)
+        return self._visual_results.get(nodeid, [])
+
+    def close(self):
+        """Finish all pending writes and merge this run's test -> images map into index.json."""
+        if self._executor is None:
+            return
+        index = {nodeid: [str(path.relative_to(self.store_dir)) for path in self.paths(nodeid)] for nodeid in self._futures}
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        index_path = self.store_dir / "index.json"
+        with file_lock(self.store_dir / "index.lock"):
+            try:
+                merged = json.loads(index_path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, ValueError):
+                merged = {}
+            merged.update(index)
+            tmp_path = index_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(merged, indent=1, sort_keys=True), encoding="utf-8")
+            os.replace(tmp_path, index_path)
+
+    def summary(self):
+        """One line of this run's screenshot savings."""
+        return (
+            f"screenshots: {self.stats['captured']} captured, {self.stats['deduplicated']} deduplicated, "
+            f"{self.stats['written_bytes'] / 1024:.0f} KiB written"
+        )
@@ -0,0 +1,126 @@
+import os
+import re
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+from pages.pageactions import PageActions
+from utils.filelock import file_lock
+
+
+class SessionCache:
+    """
+    Disk cache of authenticated storage states (cookies and localStorage), one per user and site.
+
+    The first login of a user goes through the UI once and saves the context's
+    storage state; later contexts (also in other `--workers` processes) are
+    created from that file and start already logged in.
+
+    Attributes:
+        cache_dir (Path): Directory holding the storage state files.
+        ttl (float): Seconds after which a cached state is considered expired.
+        hits (int): States served from disk.
+        misses (int): States that needed a UI login.
+    """
+
+    def __init__(self, cache_dir, ttl: float = 600):
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir (str | Path): Directory holding the storage state files.
+            ttl (float): Seconds after which a cached state is considered expired.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def state_path(self, url: str, user_name: str):
+        """Return the storage state file of a user on the site behind `url`."""
+        site = re.sub(r"[^\w.-]", "_", urlparse(url).netloc)
+        user = re.sub(r"[^\w.-]", "_", user_name)
+        return self.cache_dir / f"{user}@{site}.json"
+
+    def is_fresh(self, path):
+        """Check whether a storage state file exists and is younger than the TTL."""
+        try:
+            return time.time() - os.path.getmtime(path) < self.ttl
+        except FileNotFoundError:
+            return False
+
+    def invalidate(self, url: str, user_name: str):
+        """Drop the cached storage state of a user."""
+        try:
+            os.remove(self.state_path(url, user_name))
+        except FileNotFoundError:
+            pass
+
+    def save(self, context, url: str, user_name: str):
+        """Write the storage state of an authenticated context to the cache."""
+        path = self.state_path(url, user_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        context.storage_state(path=tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def storage_state(self, pages, url: str, user_name: str, passwd: str):
+        """
+        Return the path of a fresh storage state for the user, logging in through the UI if needed.
+
+        - Serves the cached file while it is younger than the TTL.
+        - Otherwise takes a cross-process lock, so parallel workers log in only once,
+          logs in within a throwaway context and saves its storage state.
+
+        Args:
+            pages (PageFactory): Factory of the context used for the one-off UI login.
+            url (str): Login page URL of the site.
+            user_name (str): The username to log in with.
+            passwd (str): The password to log in with.
+        """
+        path = self.state_path(url, user_name)
+        if self.is_fresh(path):
+            self.hits += 1
+            return str(path)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(path.with_suffix(".lock")):
+            # Another worker may have logged in while we were waiting
+            if self.is_fresh(path):
+                self.hits += 1
+                return str(path)
+            self.misses += 1
+            context = pages.new_context()
+            try:
+                page = context.new_page()
+                page.goto(url)
+                PageActions(page).login(user_name, passwd)
+                page.wait_for_url("**/inventory.html")
+                self.save(context, url, user_name)
+            finally:
+                pages.release(context)
+        return str(path)
+
+    def open_authenticated(self, page, url: str, user_name: str, passwd: str, path: str = "inventory.html"):
+        """
+        Navigate an already authenticated page to a logged-in view.
+
+        If the site redirects back to the login form, the cached state is stale:
+        it is invalidated, the user logs in through the form and the new state is cached.
+
+        Args:
+            page (playwright.page): A page created from a cached storage state.
+            url (str): Login page URL of the site.
+            user_name (str): The username of the cached session.
+            passwd (str): The password, used only when the session has to be renewed.
+            path (str): Logged-in view to open, relative to `url`.
+        """
+        page.goto(urljoin(url, path))
+        if page.url.rstrip("/") == url.rstrip("/"):
+            self.invalidate(url, user_name)
+            self.misses += 1
+            PageActions(page).login(user_name, passwd)
+            page.wait_for_url(f"**/{path}")
+            self.save(page.context, url, user_name)
+        return page
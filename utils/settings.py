@@ -0,0 +1,64 @@
+import os
+from pathlib import Path
+
+
+# The project root: where pytest.ini and .env live, whatever the working directory
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+class Settings:
+    """
+    The suite's configuration, read from `.env` once per process.
+
+    `.env` is loaded into the environment on first access (variables already set, e.g. the
+    URLs `--local-site` points at the stand-in site, are not overridden); every value is
+    then read from the environment, so overrides made before a test module reads them apply.
+
+    Attributes:
+        env_file (Path): The dotenv file.
+    """
+
+    def __init__(self, env_file=ROOT_DIR / ".env"):
+        """
+        Initializes the settings; nothing is read until a value is asked for.
+
+        Args:
+            env_file (str | Path): The dotenv file.
+        """
+        self.env_file = Path(env_file)
+        self._loaded = False
+
+    def load(self):
+        """Load the dotenv file into the environment, once."""
+        if not self._loaded:
+            import dotenv
+            dotenv.load_dotenv(self.env_file, override=False)
+            self._loaded = True
+        return self
+
+    def get(self, name: str, default=None):
+        """Return a variable of the environment or the dotenv file."""
+        self.load()
+        return os.environ.get(name, default)
+
+    @property
+    def url(self):
+        """Base URL of the site under test."""
+        return self.get("URL")
+
+    @property
+    def playwright_url(self):
+        """URL of the playwright.dev/python site used by the trace tests."""
+        return self.get("PLAYWRIGHT_URL")
+
+    @property
+    def passwd(self):
+        """Password shared by the site's users."""
+        return self.get("PASSWD")
+
+    def user(self, user_type: str):
+        """User name of a user type, e.g. "VISUAL" -> VISUAL_USER."""
+        return self.get(f"{user_type}_USER")
+
+
+settings = Settings()
@@ -0,0 +1,193 @@
+import csv
+import functools
+import html
+import json
+import math
+import time
+
+from utils.percentiles import rank
+
+
+# Bucket growth factor of the histograms: ~5% relative resolution
+BUCKET_GROWTH = 1.05
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+
+# Page methods timed as navigations / screenshots
+NAVIGATION_METHODS = ("goto", "reload", "go_back", "go_forward", "wait_for_url", "wait_for_load_state")
+SCREENSHOT_METHODS = ("screenshot",)
+
+
+class Histogram:
+    """
+    Compact latency histogram with logarithmic buckets.
+
+    Only non-empty buckets are stored, so thousands of samples take a few dozen entries.
+
+    Attributes:
+        buckets (dict): Bucket index -> sample count.
+        count (int): Number of samples.
+        total (float): Sum of the samples in milliseconds.
+        min (float): Smallest sample.
+        max (float): Largest sample.
+    """
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, ms: float):
+        """Record one sample in milliseconds."""
+        index = math.floor(math.log(max(ms, 0.01)) / _LOG_GROWTH)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+
+    def merge(self, other):
+        """Add the samples of another histogram."""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction: float):
+        """Return the approximate percentile (upper bucket bound, capped at max)."""
+        if not self.count:
+            return 0.0
+        wanted = rank(self.count, fraction)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= wanted:
+                return min(BUCKET_GROWTH ** (index + 1), self.max)
+        return self.max
+
+    def to_dict(self):
+        """Return the summary statistics of the histogram."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "min_ms": self.min if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max,
+        }
+
+
+class Timings:
+    """
+    Times PageActions calls, navigations, expect assertions and screenshots per test.
+
+    `install()` wraps the relevant methods at class level only when timing is
+    enabled; without it nothing is patched, so a disabled run pays nothing.
+
+    Attributes:
+        current_test (str): Node ID the next samples are attributed to.
+        per_test (dict): Node ID -> {(category, name): Histogram}.
+    """
+
+    def __init__(self):
+        self.current_test = "<session>"
+        self.per_test = {}
+        self._originals = []
+
+    def record(self, category: str, name: str, ms: float):
+        """Add one sample for the current test."""
+        histograms = self.per_test.setdefault(self.current_test, {})
+        histogram = histograms.get((category, name))
+        if histogram is None:
+            histogram = histograms[(category, name)] = Histogram()
+        histogram.add(ms)
+
+    def _wrap(self, owner, attribute: str, category: str, name: str):
+        original = owner.__dict__[attribute]
+        perf_counter = time.perf_counter
+        record = self.record
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                record(category, name, (perf_counter() - started) * 1000)
+
+        setattr(owner, attribute, timed)
+        self._originals.append((owner, attribute, original))
+
+    def install(self):
+        """Wrap PageActions, Page navigation/screenshot and the expect assertions."""
+        from playwright.sync_api import Locator, LocatorAssertions, Page, PageAssertions
+        from pages.pageactions import PageActions
+
+        for attribute, value in list(vars(PageActions).items()):
+            if callable(value) and not attribute.startswith("_"):
+                self._wrap(PageActions, attribute, "page_actions", attribute)
+        for attribute in NAVIGATION_METHODS:
+            self._wrap(Page, attribute, "navigation", attribute)
+        for attribute in SCREENSHOT_METHODS:
+            self._wrap(Page, attribute, "screenshot", f"page.{attribute}")
+            self._wrap(Locator, attribute, "screenshot", f"locator.{attribute}")
+        for assertions in (LocatorAssertions, PageAssertions):
+            for attribute in list(vars(assertions)):
+                if attribute.startswith(("to_", "not_to_")):
+                    self._wrap(assertions, attribute, "expect", attribute)
+
+    def uninstall(self):
+        """Restore every wrapped method."""
+        for owner, attribute, original in reversed(self._originals):
+            setattr(owner, attribute, original)
+        self._originals.clear()
+
+    def totals(self):
+        """Return {(category, name): Histogram} merged over all tests."""
+        merged = {}
+        for histograms in self.per_test.values():
+            for key, histogram in histograms.items():
+                merged.setdefault(key, Histogram()).merge(histogram)
+        return merged
+
+    def rows(self):
+        """Yield one flat row per test, category and name."""
+        for nodeid, histograms in self.per_test.items():
+            for (category, name), histogram in sorted(histograms.items()):
+                yield {"test": nodeid, "category": category, "name": name, **histogram.to_dict()}
+
+    def write_json(self, path):
+        """Write per-test and total timings as JSON."""
+        totals = [
+            {"category": category, "name": name, **histogram.to_dict()}
+            for (category, name), histogram in sorted(self.totals().items())
+        ]
+        with open(path, "w", encoding="utf-8") as output:
+            json.dump({"totals": totals, "tests": list(self.rows())}, output, indent=2)
+
+    def write_csv(self, path):
+        """Write per-test timings as CSV."""
+        fields = ["test", "category", "name", "count", "mean_ms", "min_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+        with open(path, "w", encoding="utf-8", newline="") as output:
+            writer = csv.DictWriter(output, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(self.rows())
+
+    @staticmethod
+    def html_table(histograms, title: str):
+        """Render {(category, name): Histogram} as an HTML table."""
+        rows = "".join(
+            f"<tr><td>{html.escape(category)}</td><td>{html.escape(name)}</td><td>{stats['count']}</td>"
+            f"<td>{stats['p50_ms']:.1f}</td><td>{stats['p95_ms']:.1f}</td><td>{stats['max_ms']:.1f}</td></tr>"
+            for (category, name), stats in ((key, histogram.to_dict()) for key, histogram in sorted(histograms.items()))
+        )
+        return (
+            f"<div><h3>{html.escape(title)}</h3><table><tr><th>Category</th><th>Action</th><th>Count</th>"
+            f"<th>p50 ms</th><th>p95 ms</th><th>max ms</th></tr>{rows}</table></div>"
+        )
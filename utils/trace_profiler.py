@@ -0,0 +1,289 @@
+"""
+Offline profiler for Playwright trace archives (e.g. pl_trace.zip or traces/*.zip).
+
+Stream-parses the trace event files inside one or many archives, without
+extracting or loading them fully, and reports:
+
+- the slowest actions, and per action name the duration distribution,
+- each action's split into wait (auto-waiting / retries), network and script time,
+- regressions between two sets of traces.
+
+    $ python -m utils.trace_profiler profile traces/ pl_trace.zip [--top 20] [--json profile.json]
+    $ python -m utils.trace_profiler compare --baseline old/ --candidate new/ [--threshold 1.2] [--min-ms 50]
+"""
+
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.percentiles import nearest_rank
+
+
+def _events(archive, suffix):
+    """Yield the JSON events of every member of an archive ending with `suffix`, line by line."""
+    for name in archive.namelist():
+        if not name.endswith(suffix):
+            continue
+        with archive.open(name) as member:
+            for line in io.TextIOWrapper(member, encoding="utf-8"):
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _network_intervals(archive):
+    """Return the sorted (start, end) intervals of the archive's network resources, in ms."""
+    intervals = []
+    for event in _events(archive, ".network"):
+        if event.get("type") != "resource-snapshot":
+            continue
+        snapshot = event["snapshot"]
+        start = snapshot.get("_monotonicTime")
+        if start is None:
+            continue
+        # Same monotonic millisecond clock as the actions' startTime/endTime
+        intervals.append((start, start + max(snapshot.get("time", 0), 0)))
+    intervals.sort()
+    return intervals
+
+
+def _merge_intervals(intervals):
+    """Merge sorted (start, end) intervals into their disjoint union; its ends are sorted as well."""
+    union = []
+    for start, end in intervals:
+        if union and start <= union[-1][1]:
+            union[-1][1] = max(union[-1][1], end)
+        else:
+            union.append([start, end])
+    return union
+
+
+def _covered(intervals, windows):
+    """
+    Return, per (start, end) window, how many ms of it the union of the sorted intervals covers.
+
+    The windows are swept in start order over the merged union: the first union
+    interval that can still overlap a window only ever moves forward.
+    """
+    union = _merge_intervals(intervals)
+    covered = [0.0] * len(windows)
+    first = 0
+    for index in sorted(range(len(windows)), key=lambda index: windows[index][0]):
+        window_start, window_end = windows[index]
+        while first < len(union) and union[first][1] <= window_start:
+            first += 1
+        position = first
+        while position < len(union) and union[position][0] < window_end:
+            start, end = union[position]
+            covered[index] += max(min(end, window_end) - max(start, window_start), 0.0)
+            position += 1
+    return covered
+
+
+def _action_name(event):
+    return event.get("apiName") or event.get("title") or f"{event.get('class', '')}.{event.get('method', '')}"
+
+
+def _wait_time(logs, end):
+    """Sum the time spent after 'waiting ...' / retry log lines until the next log line."""
+    wait = 0.0
+    for (time, message), following in zip(logs, logs[1:] + [(end, "")]):
+        if "waiting" in message or "retrying" in message:
+            wait += max(following[0] - time, 0)
+    return wait
+
+
+def profile_archive(path):
+    """
+    Parse one trace archive and return its actions.
+
+    Each action is a dict: archive, name, start, duration, wait, network, script (ms) and error.
+    Supports the before/after/log event format (trace v6+) and the older `action` events.
+    """
+    finished = []
+    with zipfile.ZipFile(path) as archive:
+        intervals = _network_intervals(archive)
+        pending = {}
+
+        def finish(name, start, end, logs, error):
+            finished.append((name, start, max(end, start), logs, error))
+
+        for event in _events(archive, ".trace"):
+            kind = event.get("type")
+            if kind == "before":
+                pending[event["callId"]] = (_action_name(event), event["startTime"], [])
+            elif kind == "log" and event.get("callId") in pending:
+                pending[event["callId"]][2].append((event["time"], event.get("message", "")))
+            elif kind == "after" and event.get("callId") in pending:
+                name, start, logs = pending.pop(event["callId"])
+                error = (event.get("error") or {}).get("message") if isinstance(event.get("error"), dict) else event.get("error")
+                finish(name, start, event["endTime"], logs, error)
+            elif kind == "action":
+                metadata = event["metadata"]
+                logs = [(metadata["startTime"], message) for message in metadata.get("log", [])]
+                error = (metadata.get("error") or {}).get("error", {}).get("message") if metadata.get("error") else None
+                finish(_action_name(metadata), metadata["startTime"], metadata["endTime"], logs, error)
+
+    # The network time of all actions is computed in one sweep over the intervals
+    networks = _covered(intervals, [(start, end) for _, start, end, _, _ in finished])
+    actions = []
+    for (name, start, end, logs, error), network in zip(finished, networks):
+        duration = end - start
+        wait = min(_wait_time(logs, end), max(duration - network, 0.0))
+        actions.append({
+            "archive": os.path.basename(path),
+            "name": name,
+            "start": start,
+            "duration": duration,
+            "wait": wait,
+            "network": network,
+            "script": max(duration - network - wait, 0.0),
+            "error": error,
+        })
+    return actions
+
+
+def expand_paths(patterns):
+    """Expand files, directories (recursively, *.zip) and glob patterns into archive paths."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(glob.glob(os.path.join(pattern, "**", "*.zip"), recursive=True)))
+        else:
+            paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    return paths
+
+
+def load_actions(patterns, jobs: int = 0):
+    """Profile all archives matched by `patterns`, in parallel processes when there are many."""
+    paths = expand_paths(patterns)
+    if jobs == 1 or len(paths) < 4:
+        results = map(profile_archive, paths)
+        return [action for actions in results for action in actions]
+    with ProcessPoolExecutor(max_workers=jobs or None) as pool:
+        return [action for actions in pool.map(profile_archive, paths, chunksize=8) for action in actions]
+
+
+def aggregate(actions):
+    """Group actions by name: count, total, p50, p95, max and mean wait/network/script, slowest total first."""
+    groups = {}
+    for action in actions:
+        groups.setdefault(action["name"], []).append(action)
+    rows = []
+    for name, group in groups.items():
+        durations = sorted(action["duration"] for action in group)
+        count = len(group)
+        rows.append({
+            "name": name,
+            "count": count,
+            "total_ms": sum(durations),
+            "p50_ms": nearest_rank(durations, 0.50),
+            "p95_ms": nearest_rank(durations, 0.95),
+            "max_ms": durations[-1],
+            "wait_ms": sum(action["wait"] for action in group) / count,
+            "network_ms": sum(action["network"] for action in group) / count,
+            "script_ms": sum(action["script"] for action in group) / count,
+            "errors": sum(1 for action in group if action["error"]),
+        })
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return rows
+
+
+def compare(baseline_rows, candidate_rows, threshold: float = 1.2, min_ms: float = 50):
+    """
+    Compare per-action p50 between two aggregated sets.
+
+    An action regresses when its candidate p50 is more than `threshold` times
+    and more than `min_ms` above the baseline p50. Its ratio is None when the
+    baseline p50 is 0; it then regresses on `min_ms` alone.
+    """
+    baseline = {row["name"]: row for row in baseline_rows}
+    result = []
+    for row in candidate_rows:
+        base = baseline.get(row["name"])
+        if base is None:
+            continue
+        delta = row["p50_ms"] - base["p50_ms"]
+        ratio = row["p50_ms"] / base["p50_ms"] if base["p50_ms"] else None
+        result.append({
+            "name": row["name"],
+            "baseline_p50_ms": base["p50_ms"],
+            "candidate_p50_ms": row["p50_ms"],
+            "delta_ms": delta,
+            "ratio": ratio,
+            "regression": (ratio is None or ratio > threshold) and delta > min_ms,
+        })
+    result.sort(key=lambda item: item["delta_ms"], reverse=True)
+    return result
+
+
+def format_profile(rows, slowest, top: int):
+    lines = [f"{'action':<40}{'count':>7}{'total ms':>11}{'p50':>9}{'p95':>9}{'max':>9}{'wait':>9}{'net':>9}{'script':>9}"]
+    for row in rows[:top]:
+        lines.append(
+            f"{row['name'][:39]:<40}{row['count']:>7}{row['total_ms']:>11.0f}{row['p50_ms']:>9.0f}{row['p95_ms']:>9.0f}"
+            f"{row['max_ms']:>9.0f}{row['wait_ms']:>9.0f}{row['network_ms']:>9.0f}{row['script_ms']:>9.0f}"
+        )
+    lines.append("")
+    lines.append(f"{'slowest actions':<40}{'ms':>9}  archive")
+    for action in slowest[:top]:
+        lines.append(f"{action['name'][:39]:<40}{action['duration']:>9.0f}  {action['archive']}")
+    return "\n".join(lines)
+
+
+def format_compare(rows):
+    lines = [f"{'action':<40}{'base p50':>10}{'new p50':>10}{'delta':>10}{'ratio':>8}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['name'][:39]:<40}{row['baseline_p50_ms']:>10.0f}{row['candidate_p50_ms']:>10.0f}"
+            f"{row['delta_ms']:>10.0f}{'-' if row['ratio'] is None else format(row['ratio'], '.2f'):>8}{flag}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile Playwright trace archives offline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    profile_parser = commands.add_parser("profile", help="Rank actions across trace archives")
+    profile_parser.add_argument("paths", nargs="+", help="Trace archives, directories or glob patterns")
+    profile_parser.add_argument("--top", type=int, default=20, help="Rows to show")
+    compare_parser = commands.add_parser("compare", help="Flag regressions between two sets of traces")
+    compare_parser.add_argument("--baseline", nargs="+", required=True)
+    compare_parser.add_argument("--candidate", nargs="+", required=True)
+    compare_parser.add_argument("--threshold", type=float, default=1.2, help="p50 ratio counted as a regression")
+    compare_parser.add_argument("--min-ms", type=float, default=50, help="Ignore p50 increases below this")
+    for sub_parser in (profile_parser, compare_parser):
+        sub_parser.add_argument("--jobs", type=int, default=0, help="Parser processes (default: one per CPU)")
+        sub_parser.add_argument("--json", default=None, help="Also write the result as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.command == "profile":
+        actions = load_actions(args.paths, args.jobs)
+        rows = aggregate(actions)
+        slowest = sorted(actions, key=lambda action: action["duration"], reverse=True)
+        print(format_profile(rows, slowest, args.top))
+        result = {"actions": rows, "slowest": slowest[:args.top]}
+        status = 0
+    else:
+        rows = compare(
+            aggregate(load_actions(args.baseline, args.jobs)),
+            aggregate(load_actions(args.candidate, args.jobs)),
+            args.threshold, args.min_ms,
+        )
+        print(format_compare(rows))
+        result = {"comparison": rows}
+        status = 1 if any(row["regression"] for row in rows) else 0
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(result, output, indent=2, default=str)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
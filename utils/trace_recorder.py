@@ -0,0 +1,88 @@
+from pathlib import Path
+
+
+class TraceRecorder:
+    """
+    Failure-only Playwright tracing: one trace chunk per test, kept only when the test fails.
+
+    - Every context created through the pages fixture starts tracing once.
+    - Each test records into its own chunk on every checked-out context; the chunk is
+      written to `<trace_dir>/<nodeid>.zip` if the test failed or was retried,
+      and discarded otherwise.
+    - Only the newest `keep` trace files are kept on disk.
+    - Contexts idle in the ContextPool are not traced: `release` drops a context going
+      back to the pool, `acquire` records into it again once it is handed out.
+
+    Attributes:
+        trace_dir (Path): Directory the kept traces are written to.
+        keep (int): Size of the on-disk ring of traces.
+        contexts (dict): Checked-out traced contexts -> whether a chunk is being recorded.
+        current_test (str): Node ID of the running test, the title of new chunks.
+    """
+
+    def __init__(self, trace_dir, keep: int = 20):
+        """
+        Initializes the recorder.
+
+        Args:
+            trace_dir (str | Path): Directory the kept traces are written to.
+            keep (int): Number of most recent traces to keep on disk.
+        """
+        self.trace_dir = Path(trace_dir)
+        self.keep = keep
+        self.contexts = {}
+        self.current_test = None
+
+    def install(self, context):
+        """Start tracing a new context; its first chunk belongs to the running test."""
+        context.tracing.start(screenshots=True, snapshots=True, sources=True)
+        self.contexts[context] = True
+        context.on("close", lambda _: self.contexts.pop(context, None))
+
+    def acquire(self, context):
+        """Trace a pooled context again as it is handed out; its chunk belongs to the running test."""
+        if context not in self.contexts:
+            context.tracing.start_chunk(title=self.current_test)
+            self.contexts[context] = True
+
+    def release(self, context):
+        """Stop tracing a context going idle in the pool, discarding a chunk no test stopped."""
+        if self.contexts.pop(context, False):
+            context.tracing.stop_chunk()
+
+    def start_test(self, nodeid: str):
+        """Start a chunk named after the test on every checked-out traced context that is not recording."""
+        self.current_test = nodeid
+        for context, recording in list(self.contexts.items()):
+            if not recording:
+                context.tracing.start_chunk(title=nodeid)
+                self.contexts[context] = True
+
+    def stop_test(self, nodeid: str, keep: bool):
+        """
+        Stop the test's chunks, writing them only if `keep` is set.
+
+        Returns the paths of the written traces.
+        """
+        paths = []
+        recording = [context for context, active in self.contexts.items() if active]
+        stem = nodeid.replace("::", "_").replace("/", "_")
+        for index, context in enumerate(recording):
+            if keep:
+                self.trace_dir.mkdir(parents=True, exist_ok=True)
+                suffix = f"-{index}" if len(recording) > 1 else ""
+                path = self.trace_dir / f"{stem}{suffix}.zip"
+                context.tracing.stop_chunk(path=path)
+                paths.append(path)
+            else:
+                context.tracing.stop_chunk()
+            self.contexts[context] = False
+        if paths:
+            self.prune()
+        return paths
+
+    def prune(self):
+        """Delete the oldest traces beyond the ring size."""
+        traces = sorted(self.trace_dir.glob("*.zip"), key=lambda path: path.stat().st_mtime, reverse=True)
+        for path in traces[self.keep:]:
+            path.unlink(missing_ok=True)
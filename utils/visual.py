@@ -0,0 +1,248 @@
+import hashlib
+import io
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+
+# Largest possible YIQ delta between two pixels (black vs white), as in pixelmatch
+MAX_YIQ_DELTA = 35215.0
+
+
+@dataclass
+class VisualResult:
+    """
+    Outcome of comparing one screenshot against its baseline.
+
+    Attributes:
+        name (str): Baseline name, e.g. "tests_test_login_logout.py_test_login-0".
+        status (str): match, new, updated or mismatch.
+        diff_pixels (int): Pixels whose perceptual difference is above the threshold.
+        diff_ratio (float): diff_pixels over the image size.
+        changed_tiles (int): Tiles whose hash differs from the baseline's.
+        diff_path (Path): Diff image, written for mismatches only.
+        message (str): Human readable summary.
+    """
+    name: str
+    status: str
+    diff_pixels: int = 0
+    diff_ratio: float = 0.0
+    changed_tiles: int = 0
+    diff_path: Path = None
+    message: str = ""
+
+    @property
+    def passed(self):
+        return self.status != "mismatch"
+
+
+def decode(data: bytes):
+    """Decode PNG / JPEG / WebP bytes into an HxWx3 uint8 array."""
+    with Image.open(io.BytesIO(data)) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def tile_view(pixels, tile: int):
+    """View an HxW[xC] array, zero-padded to whole tiles, as (rows, cols, tile, tile[, C])."""
+    height, width = pixels.shape[:2]
+    padding = [(0, -height % tile), (0, -width % tile)] + [(0, 0)] * (pixels.ndim - 2)
+    padded = np.pad(pixels, padding)
+    rows, cols = padded.shape[0] // tile, padded.shape[1] // tile
+    tiles = padded.reshape(rows, tile, cols, tile, *pixels.shape[2:])
+    return tiles.swapaxes(1, 2)
+
+
+_hash_weights = {}
+
+
+def tile_hashes(pixels, tile: int):
+    """
+    Return one 64-bit hash per tile (rows x cols), computed in a single vectorized pass.
+
+    Each tile row of RGB bytes is read as 64-bit words (no per-pixel conversion) and
+    the words are combined with fixed random odd weights, wrapping modulo 2**64.
+    `tile` must be a multiple of 8.
+    """
+    words_per_row = tile * 3 // 8
+    weights = _hash_weights.get(tile)
+    if weights is None:
+        rng = np.random.default_rng(0x5EED)
+        weights = rng.integers(1, 2 ** 63, size=tile * words_per_row, dtype=np.uint64) | np.uint64(1)
+        _hash_weights[tile] = weights
+    height, width = pixels.shape[:2]
+    if height % tile or width % tile:
+        pixels = np.pad(pixels, [(0, -height % tile), (0, -width % tile), (0, 0)])
+    rows, cols = pixels.shape[0] // tile, pixels.shape[1] // tile
+    words = np.ascontiguousarray(pixels).reshape(pixels.shape[0], -1).view(np.uint64)
+    tiles = words.reshape(rows, tile, cols, words_per_row).swapaxes(1, 2).reshape(rows, cols, -1)
+    return (tiles * weights).sum(axis=-1, dtype=np.uint64)
+
+
+def yiq_delta(first, second):
+    """Perceptual (YIQ) squared colour difference of two float RGB arrays of the same shape."""
+    difference = first - second
+    red, green, blue = difference[..., 0], difference[..., 1], difference[..., 2]
+    y = 0.29889531 * red + 0.58662247 * green + 0.11448223 * blue
+    i = 0.59597799 * red - 0.27417610 * green - 0.32180189 * blue
+    q = 0.21147017 * red - 0.52261711 * green + 0.31114694 * blue
+    return 0.5053 * y * y + 0.299 * i * i + 0.1957 * q * q
+
+
+def ignore_mask(shape, regions):
+    """Boolean HxW mask of the (x, y, width, height) regions to ignore."""
+    mask = np.zeros(shape[:2], dtype=bool)
+    for x, y, width, height in regions:
+        x, y = max(int(x), 0), max(int(y), 0)
+        mask[y:y + int(height), x:x + int(width)] = True
+    return mask
+
+
+class VisualComparator:
+    """
+    Compares screenshots against stored baselines with NumPy pixel math.
+
+    - Fastest path: a byte-identical screenshot (same sha256 as the baseline's) is a match
+      without decoding anything.
+    - Fast path: per-tile hashes of the screenshot are compared with the hashes stored
+      next to the baseline; when every (non-ignored) tile matches, the baseline image
+      is not even decoded.
+    - Slow path, changed tiles only: a perceptual YIQ difference per pixel; pixels above
+      `threshold` count as different, ignore-regions excepted.
+    - A screenshot fails when more than `tolerance` of its pixels differ; a diff image
+      (faded baseline, differing pixels in red) is written for it.
+    - A missing baseline is created from the screenshot; `update=True` overwrites baselines.
+
+    Attributes:
+        baseline_dir (Path): `<name>.png` baselines and their `<name>.tiles.npz` hashes.
+        diff_dir (Path): Diff images of mismatches.
+        threshold (float): Per-pixel perceptual threshold, 0 (exact) to 1.
+        tolerance (float): Fraction of differing pixels still accepted.
+        tile (int): Tile edge in pixels.
+        update (bool): Overwrite the baselines with the new screenshots.
+    """
+
+    def __init__(self, baseline_dir, diff_dir, threshold: float = 0.1, tolerance: float = 0.0, tile: int = 32,
+                 update: bool = False):
+        """
+        Initializes the comparator.
+
+        Args:
+            baseline_dir (str | Path): Directory of the baselines.
+            diff_dir (str | Path): Directory the diff images are written to.
+            threshold (float): Per-pixel perceptual threshold, 0 (exact) to 1.
+            tolerance (float): Fraction of differing pixels still accepted.
+            tile (int): Tile edge in pixels.
+            update (bool): Overwrite the baselines with the new screenshots.
+        """
+        self.baseline_dir = Path(baseline_dir)
+        self.diff_dir = Path(diff_dir)
+        self.threshold = threshold
+        self.tolerance = tolerance
+        self.tile = tile
+        self.update = update
+        self._lock = threading.Lock()
+
+    def baseline_path(self, name: str):
+        return self.baseline_dir / f"{name}.png"
+
+    def hashes_path(self, name: str):
+        return self.baseline_dir / f"{name}.tiles.npz"
+
+    def _write_baseline(self, name: str, data: bytes, pixels, status: str):
+        """Store the screenshot (as PNG) and its tile hashes as the baseline."""
+        self.baseline_dir.mkdir(parents=True, exist_ok=True)
+        if data[:8] != b"\x89PNG\r\n\x1a\n":
+            buffer = io.BytesIO()
+            Image.fromarray(pixels).save(buffer, format="PNG")
+            data = buffer.getvalue()
+        path = self.baseline_path(name)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        tmp_path = tmp_path.with_suffix(".npz.tmp")
+        with open(tmp_path, "wb") as output:
+            np.savez(output, tiles=tile_hashes(pixels, self.tile), digest=np.frombuffer(hashlib.sha256(data).digest(), np.uint8))
+        os.replace(tmp_path, self.hashes_path(name))
+        return VisualResult(name, status, message=f"{status} baseline {path.name}")
+
+    def _baseline_hashes(self, name: str):
+        """Return the baseline's (tile hashes, sha256 digest of its bytes)."""
+        try:
+            with np.load(self.hashes_path(name)) as stored:
+                return stored["tiles"], stored["digest"].tobytes()
+        except (FileNotFoundError, ValueError, KeyError):
+            data = self.baseline_path(name).read_bytes()
+            return tile_hashes(decode(data), self.tile), hashlib.sha256(data).digest()
+
+    def check(self, name: str, data: bytes, ignore=()):
+        """
+        Compare one encoded screenshot against the baseline `name`.
+
+        Args:
+            name (str): Baseline name.
+            data (bytes): Encoded screenshot (PNG, JPEG or WebP).
+            ignore (list): (x, y, width, height) regions, in image pixels, left out of the comparison.
+
+        Returns:
+            VisualResult
+        """
+        if self.update or not self.baseline_path(name).exists():
+            with self._lock:
+                return self._write_baseline(name, data, decode(data), "updated" if self.update else "new")
+
+        baseline_hashes, baseline_digest = self._baseline_hashes(name)
+        if hashlib.sha256(data).digest() == baseline_digest:
+            return VisualResult(name, "match", message="identical image")
+        pixels = decode(data)
+        with Image.open(self.baseline_path(name)) as image:
+            # Only the header is read here
+            width, height = image.size
+        if (height, width) != pixels.shape[:2]:
+            return VisualResult(
+                name, "mismatch", diff_pixels=pixels.shape[0] * pixels.shape[1], diff_ratio=1.0,
+                message=f"size {pixels.shape[1]}x{pixels.shape[0]} differs from baseline {width}x{height}",
+            )
+
+        hashes = tile_hashes(pixels, self.tile)
+        mask = tile_view(ignore_mask(pixels.shape, ignore), self.tile)
+        changed = (hashes != baseline_hashes) & ~mask.all(axis=(2, 3))
+        changed_tiles = int(changed.sum())
+        if not changed_tiles:
+            return VisualResult(name, "match", message="identical tiles")
+
+        baseline = decode(self.baseline_path(name).read_bytes())
+        actual_tiles = tile_view(pixels, self.tile)[changed].astype(np.float32)
+        baseline_tiles = tile_view(baseline, self.tile)[changed].astype(np.float32)
+        different = yiq_delta(actual_tiles, baseline_tiles) > MAX_YIQ_DELTA * self.threshold ** 2
+        different &= ~mask[changed]
+        diff_pixels = int(different.sum())
+        diff_ratio = diff_pixels / (pixels.shape[0] * pixels.shape[1])
+        if diff_ratio <= self.tolerance:
+            return VisualResult(
+                name, "match", diff_pixels, diff_ratio, changed_tiles,
+                message=f"{diff_pixels} pixels within tolerance",
+            )
+
+        rows, cols = hashes.shape
+        tiles = np.zeros((rows, cols, self.tile, self.tile), dtype=bool)
+        tiles[changed] = different
+        full = tiles.swapaxes(1, 2).reshape(rows * self.tile, cols * self.tile)[:pixels.shape[0], :pixels.shape[1]]
+        diff_path = self._write_diff(name, baseline, full)
+        return VisualResult(
+            name, "mismatch", diff_pixels, diff_ratio, changed_tiles, diff_path,
+            message=f"{diff_pixels} pixels ({diff_ratio:.2%}) differ from baseline in {changed_tiles} tiles",
+        )
+
+    def _write_diff(self, name: str, baseline, different):
+        """Write the faded baseline with the differing pixels in red."""
+        gray = baseline.astype(np.float32).mean(axis=-1, keepdims=True)
+        image = np.repeat(255 - (255 - gray) * 0.3, 3, axis=-1).astype(np.uint8)
+        image[different] = (255, 0, 0)
+        self.diff_dir.mkdir(parents=True, exist_ok=True)
+        path = self.diff_dir / f"{name}.diff.png"
+        Image.fromarray(image).save(path, format="PNG", compress_level=1)
+        return path